@@ -1,64 +1,39 @@
-import os
-from utils.ai_handler import AIHandler
-from playwright.sync_api import sync_playwright
+from utils.ai_handler import AIHandler, CACHE_TTL_DAY, CACHE_TTL_WEEK
+from utils.structured_output import SCHEMAS
+from utils.prompt_builder import PromptBuilder, max_prompt_tokens
+from utils.browser_pool import get_browser_pool
+from utils.fetcher import get_fetcher
+from utils.http_cache import header_charset, HTTP_TTL_BRAND, HTTP_TTL_COMPETITOR
+from utils.html_extract import HtmlDoc
+from utils.summarizer import Summarizer
 from bs4 import BeautifulSoup
-import json
 import requests
+import concurrent.futures
 import time
 import random
 
+# Seconds analyze_competitors waits for the whole batch
+COMPETITOR_SCRAPE_DEADLINE = 30
+# Seconds analyze_serp gives Google before racing DuckDuckGo against it
+SERP_HEDGE_DELAY = 2.0
+# What map-reduce notes keep when long pages/documents are condensed
+TOV_FOCUS = "brand tone of voice, style, values, products and how the brand talks to customers"
+AUDIENCE_FOCUS = "customers, their needs and problems, products, prices and buying situations"
+ENTITIES_FOCUS = "products, ingredients, brands and technical terms"
+# Topics researched at once by research_topics (each one fans out to its competitor pages)
+BULK_RESEARCH_WORKERS = 4
+# Returned by _serp_intent when the model gave no usable answer (compared by identity)
+SERP_INTENT_FALLBACK = {"intent": "Informational", "features": []}
+
 class Strategist:
     def __init__(self, api_key):
         self.ai_handler = AIHandler(api_key, model_name="gemini-2.5-flash")
-
-    # ... (previous methods) ...
-
-    def analyze_competitors(self, urls):
-        """
-        Scrapes competitor URLs to extract outlines (H1-H3).
-        """
-        outlines = []
-        
-        # Try Playwright first
-        try:
-            with sync_playwright() as p:
-                try:
-                    browser = p.chromium.launch(headless=True)
-                except Exception as e:
-                    # print(f"Playwright launch failed: {e}. Installing browsers...")
-                    pass
-                    os.system("playwright install chromium")
-                    browser = p.chromium.launch(headless=True)
-                
-                for url in urls:
-                    try:
-                        page = browser.new_page()
-                        page.goto(url, timeout=15000)
-                        content = page.content()
-                        soup = BeautifulSoup(content, 'html.parser')
-                        
-                        h1 = soup.find('h1').get_text().strip() if soup.find('h1') else "No H1"
-                        headings = [h.get_text().strip() for h in soup.find_all(['h2', 'h3'])]
-                        
-                        outlines.append({
-                            "url": url,
-                            "h1": h1,
-                            "structure": headings[:10] # Limit to top 10 headings
-                        })
-                        page.close()
-                    except Exception as e:
-                        # print(f"Playwright failed for {url}: {e}")
-                        # Fallback to Requests inside loop
-                        self._scrape_fallback(url, outlines)
-                browser.close()
-                
-        except Exception as e:
-            # print(f"Playwright crashed completely: {e}")
-            # Fallback for all URLs if browser fails entirely
-            for url in urls:
-                 self._scrape_fallback(url, outlines)
-
-        return outlines
+        # Shared Chromium, launched once per process
+        self.browser_pool = get_browser_pool()
+        # Plain HTTP first, the browser only for JS-rendered sites
+        self.fetcher = get_fetcher()
+        # Long pages/documents are condensed chunk by chunk instead of cut off
+        self.summarizer = Summarizer(self.ai_handler)
 
     def _scrape_fallback(self, url, outlines_list):
         """Fallback scraper using requests."""
@@ -66,10 +41,10 @@ class Strategist:
             # print(f"Falling back to requests for {url}")
             headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
             response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            doc = HtmlDoc(response.content, header_charset(response.headers))
             
-            h1 = soup.find('h1').get_text().strip() if soup.find('h1') else "No H1 (Requests)"
-            headings = [h.get_text().strip() for h in soup.find_all(['h2', 'h3'])]
+            h1 = doc.h1() if doc.count('h1') else "No H1 (Requests)"
+            headings = [text for _, text in doc.headings(('h2', 'h3'), limit=10)]
             
             outlines_list.append({
                 "url": url,
@@ -93,11 +68,17 @@ class Strategist:
             num_topics: Number of topics
             context_data: Optional string containing competitor headers or sitemap titles
         """
-        context_prompt = ""
-        if context_data:
-            context_prompt = f"Based on the following competitor/existing content analysis:\n{context_data[:5000]}\n\n"
+        builder = PromptBuilder(max_prompt_tokens())
+        builder.add(
+            "context", context_data, by_lines=True,
+            header="Based on the following competitor/existing content analysis:\n"
+        )
+        prompt = builder.build(lambda s: self._topic_ideas_prompt(niche, num_topics, s["context"]))
+        fallback = [{"title": f"Тема {i+1} для {niche}", "description": "Опис недоступний"} for i in range(num_topics)]
+        return self.ai_handler.generate_json(prompt, SCHEMAS["topic_ideas"], fallback=fallback)
 
-        prompt = f"""
+    def _topic_ideas_prompt(self, niche, num_topics, context_prompt):
+        return f"""
         You are an SEO content strategist. Generate {num_topics} article topic ideas for the niche: "{niche}".
         
         {context_prompt}
@@ -116,19 +97,21 @@ class Strategist:
         
         JSON ONLY. NO MARKDOWN.
         """
-        
-        try:
-            response = self.ai_handler.generate_content(prompt)
-            topics = json.loads(response.text.replace('```json', '').replace('```', ''))
-            return topics if isinstance(topics, list) else []
-        except Exception as e:
-            return [{"title": f"Тема {i+1} для {niche}", "description": "Опис недоступний"} for i in range(num_topics)]
 
     def generate_keywords(self, topic, num_keywords=20):
         """
         Generates SEO keywords for a topic.
         """
-        prompt = f"""
+        return self.ai_handler.generate_json(
+            self._keywords_prompt(topic, num_keywords),
+            SCHEMAS["keywords"],
+            fallback=[{"keyword": topic, "type": "Head"}],
+            cache_ttl=CACHE_TTL_DAY,
+            task="extract"
+        )
+
+    def _keywords_prompt(self, topic, num_keywords):
+        return f"""
         Generate {num_keywords} SEO keywords for the topic: "{topic}".
         Include a mix of:
         - Head terms (high volume)
@@ -145,205 +128,299 @@ class Strategist:
         Language: Ukrainian.
         JSON ONLY.
         """
-        try:
-            response = self.ai_handler.generate_content(prompt)
-            return json.loads(response.text.replace('```json', '').replace('```', ''))
-        except:
-            return [{"keyword": topic, "type": "Head"}]
-
-
-
 
     def analyze_serp(self, topic):
         """
         Analyzes SERP for intent and features.
-        """
-        # print(f"Analyzing SERP for: {topic}")
-        results = []
         
-        # Attempt 1: Playwright (Google) - Stealth Mode
+        The intent prompt needs only the topic, so it runs alongside the
+        scrapes. DuckDuckGo is hedged in if Google hasn't answered with
+        results within SERP_HEDGE_DELAY; the first non-empty result list wins.
+        """
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
         try:
-            with sync_playwright() as p:
-                try:
-                    browser = p.chromium.launch(headless=True, args=["--disable-blink-features=AutomationControlled"])
-                except Exception as e:
-                    # print(f"Playwright launch failed: {e}. Installing browsers...")
-                    os.system("playwright install chromium")
-                    browser = p.chromium.launch(headless=True, args=["--disable-blink-features=AutomationControlled"])
-                
-                context = browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                )
-                page = context.new_page()
-                
-                # print(f"Attempt 1: Scraping Google for: {topic}")
-                try:
-                    page.goto(f"https://www.google.com/search?q={topic}", timeout=10000)
-                    page.wait_for_load_state("domcontentloaded")
-                    
-                    links = page.query_selector_all('div.g h3') # Standard Google selector
-                    for h3 in links[:5]:
-                        try:
-                            parent_a = h3.xpath('..')[0]
-                            url = parent_a.get_attribute('href')
-                            title = h3.inner_text()
-                            if url and title and url.startswith('http'):
-                                results.append({"url": url, "title": title})
-                        except:
-                            continue
-                except Exception as e:
-                    # print(f"Google scrape failed: {e}")
-                    pass
-
-                browser.close()
-        except Exception as e:
-            # print(f"Playwright Google failed: {e}")
-            pass
-
-        # Attempt 2: Requests (DuckDuckGo HTML) - Very Robust Fallback
-        if not results:
-            # print("Attempt 2: Using DuckDuckGo HTML (Requests)...")
-            try:
-                import requests
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Referer": "https://duckduckgo.com/"
-                }
-                # DDG HTML version doesn't require JS
-                resp = requests.post("https://html.duckduckgo.com/html/", data={'q': topic}, headers=headers, timeout=10)
-                if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    # DDG HTML selectors
-                    for link in soup.find_all('a', class_='result__a')[:5]:
-                        url = link.get('href')
-                        title = link.get_text(strip=True)
-                        if url and title:
-                            results.append({"url": url, "title": title})
-            except Exception as e:
-                # print(f"DDG Requests failed: {e}")
-                pass
-
-        # Attempt 3: Simulation (Last Resort)
-        if not results:
-            # print("All scraping failed. Returning empty list to trigger manual input or retry.")
-            # Do NOT return fake data anymore, it confuses the user.
-            # Let's return a specific error-like result so the UI can show a warning but not fake info.
-            results = [] 
+            intent_future = executor.submit(self._serp_intent, topic)
+            scrapes = [executor.submit(self._serp_google, topic)]
+            done, _ = concurrent.futures.wait(scrapes, timeout=SERP_HEDGE_DELAY)
+            if not (done and scrapes[0].result()):
+                # Google slow or empty - race DuckDuckGo against it
+                scrapes.append(executor.submit(self._serp_ddg, topic))
 
-
-        # Analyze Intent with Gemini
-        prompt = f"Analyze the search intent for the topic '{topic}' in the context of Ukrainian Google Search. Return JSON with keys: 'intent' (Informational/Commercial/Transactional - translate to Ukrainian), 'features' (list of likely SERP features e.g. 'Відео', 'Сніпет', 'Картинки')."
-        response = self.ai_handler.generate_content(prompt)
-        try:
-            analysis = json.loads(response.text.replace('```json', '').replace('```', ''))
-        except:
-            analysis = {"intent": "Informational", "features": []}
+            # Empty list if every source failed - the UI warns instead of showing fake data
+            results = []
+            pending = set(scrapes)
+            while pending and not results:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    results = results or future.result()
+            analysis = intent_future.result()
+        finally:
+            # A losing scrape ends on its own page timeout
+            executor.shutdown(wait=False, cancel_futures=True)
 
         return {
             "topic": topic,
             "competitors": results,
             "intent": analysis.get("intent"),
-            "serp_features": analysis.get("features")
+            "serp_features": list(analysis.get("features") or []),
+            "intent_fallback": analysis is SERP_INTENT_FALLBACK
         }
 
-    def analyze_competitors(self, urls):
+    def _serp_google(self, topic):
+        """Top-5 organic results from Google (shared headless browser), [] on failure."""
+        results = []
+        try:
+            html = self.browser_pool.page_html(
+                f"https://www.google.com/search?q={topic}", timeout=10000, wait_for="div.g h3"
+            )
+            soup = BeautifulSoup(html, 'html.parser')
+            for h3 in soup.select('div.g h3')[:5]: # Standard Google selector
+                parent_a = h3.parent
+                url = parent_a.get('href') if parent_a else None
+                title = h3.get_text()
+                if url and title and url.startswith('http'):
+                    results.append({"url": url, "title": title})
+        except Exception as e:
+            # print(f"Google scrape failed: {e}")
+            pass
+        return results
+
+    def _serp_ddg(self, topic):
+        """Top-5 results from DuckDuckGo HTML (no JS needed), [] on failure."""
+        results = []
+        try:
+            headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+                "Referer": "https://duckduckgo.com/"
+            }
+            resp = requests.post("https://html.duckduckgo.com/html/", data={'q': topic}, headers=headers, timeout=10)
+            if resp.status_code == 200:
+                soup = BeautifulSoup(resp.text, 'html.parser')
+                # DDG HTML selectors
+                for link in soup.find_all('a', class_='result__a')[:5]:
+                    url = link.get('href')
+                    title = link.get_text(strip=True)
+                    if url and title:
+                        results.append({"url": url, "title": title})
+        except Exception as e:
+            # print(f"DDG Requests failed: {e}")
+            pass
+        return results
+
+    def _serp_intent(self, topic):
+        prompt = f"Analyze the search intent for the topic '{topic}' in the context of Ukrainian Google Search. Return JSON with keys: 'intent' (Informational/Commercial/Transactional - translate to Ukrainian), 'features' (list of likely SERP features e.g. 'Відео', 'Сніпет', 'Картинки')."
+        return self.ai_handler.generate_json(
+            prompt,
+            SCHEMAS["serp_intent"],
+            fallback=SERP_INTENT_FALLBACK,
+            cache_ttl=CACHE_TTL_WEEK,
+            task="classify"
+        )
+
+    def analyze_competitors(self, urls, deadline=COMPETITOR_SCRAPE_DEADLINE):
         """
         Scrapes competitor URLs to extract outlines (H1-H3).
+        
+        Pages load concurrently in separate browser contexts (capped by the
+        browser pool); a URL whose page fails falls back to requests on its
+        own. Whatever finished by the deadline is returned.
+        
+        Args:
+            urls: Competitor URLs
+            deadline: Seconds for the whole batch
+            
+        Returns:
+            List of outlines in URL order (URLs not finished by the deadline are left out)
         """
-        outlines = []
-        with sync_playwright() as p:
+        if not urls:
+            return []
+        started = time.monotonic()
+
+        def scrape(url):
+            remaining = deadline - (time.monotonic() - started)
             try:
-                browser = p.chromium.launch(headless=True)
+                page = self.fetcher.fetch(
+                    url, "headings", timeout=max(1000, min(15000, remaining * 1000)), ttl=HTTP_TTL_COMPETITOR
+                )
+                return self._outline_from_html(url, page.html)
             except Exception as e:
-                # print(f"Playwright launch failed: {e}. Installing browsers...")
-                os.system("playwright install chromium")
-                browser = p.chromium.launch(headless=True)
-            for url in urls:
-                try:
-                    page = browser.new_page()
-                    page.goto(url, timeout=15000)
-                    content = page.content()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    h1 = soup.find('h1').get_text(strip=True) if soup.find('h1') else "No H1"
-                    headings = []
-                    for h in soup.find_all(['h2', 'h3']):
-                        headings.append(f"{h.name.upper()}: {h.get_text(strip=True)}")
-                    
-                    outlines.append({
-                        "url": url,
-                        "h1": h1,
-                        "structure": headings[:10] # Limit for brevity
-                    })
-                    page.close()
-                except Exception as e:
-                    # print(f"Error scraping {url}: {e}")
-                    pass
-            browser.close()
-        return outlines
+                # print(f"Error scraping {url}: {e}")
+                fallback = []
+                self._scrape_fallback(url, fallback)
+                return fallback[0]
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(urls))
+        futures = [executor.submit(scrape, url) for url in urls]
+        concurrent.futures.wait(futures, timeout=deadline)
+        # Don't wait for stragglers - their page timeouts end them in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+        return [future.result() for future in futures if future.done() and not future.cancelled()]
+
+    def research_topics(self, topics, store, workers=BULK_RESEARCH_WORKERS, with_outlines=True, on_progress=None):
+        """
+        Runs SERP analysis (+ competitor outlines) over a keyword list.
+        
+        Topics run concurrently, at most `workers` at a time. Every finished
+        topic is appended to the store right away; topics the store already
+        has a successful result for are skipped, so a re-run resumes. A topic
+        with no SERP results or only the fallback intent is stored with an
+        "error", so the next run retries it.
+        
+        Args:
+            topics: Keywords/topics to research
+            store: utils.research_store.ResearchStore
+            workers: Topics in flight at once
+            with_outlines: Also scrape competitor outlines per topic
+            on_progress: Called as on_progress(done, total, record) from the calling thread
+            
+        Returns:
+            Dict with total, done, skipped, failed, seconds and topics_per_min
+        """
+        already_done = store.done_topics()
+        pending = list(dict.fromkeys(t.strip() for t in topics if t and t.strip() and t.strip() not in already_done))
+        skipped = len(set(t.strip() for t in topics if t and t.strip())) - len(pending)
+        started = time.monotonic()
+
+        def research(topic):
+            try:
+                record = self.analyze_serp(topic)
+                # analyze_serp degrades instead of raising - these results are not worth keeping as done
+                if not record.get("competitors"):
+                    record["error"] = "No SERP results (Google and DuckDuckGo both failed)"
+                elif record.get("intent_fallback"):
+                    record["error"] = "Search intent analysis failed"
+                elif with_outlines:
+                    record["competitor_outlines"] = self.analyze_competitors([r["url"] for r in record["competitors"]])
+            except Exception as e:
+                record = {"topic": topic, "error": str(e)}
+            store.append(record)
+            return record
+
+        done = failed = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(research, topic) for topic in pending]
+            for future in concurrent.futures.as_completed(futures):
+                record = future.result()
+                done += 1
+                failed += 1 if record.get("error") else 0
+                if on_progress:
+                    on_progress(done, len(pending), record)
+
+        seconds = time.monotonic() - started
+        return {
+            "total": len(pending) + skipped,
+            "done": done,
+            "skipped": skipped,
+            "failed": failed,
+            "seconds": seconds,
+            "topics_per_min": (done - failed) / seconds * 60 if seconds > 0 else 0.0
+        }
+
+    def _outline_from_html(self, url, content):
+        doc = HtmlDoc(content)
+        
+        h1 = doc.h1() if doc.count('h1') else "No H1"
+        headings = [f"{tag.upper()}: {text}" for tag, text in doc.headings(('h2', 'h3'), limit=10)]
+        
+        return {
+            "url": url,
+            "h1": h1,
+            "structure": headings[:10] # Limit for brevity
+        }
 
     def extract_entities(self, text_content):
         """
         Uses Gemini to extract entities.
         """
-        prompt = f"Extract key entities (products, ingredients, brands, technical terms) from the following text. Return as a JSON list of strings.\n\nText: {text_content[:2000]}"
-        response = self.ai_handler.generate_content(prompt)
-        try:
-            return json.loads(response.text.replace('```json', '').replace('```', ''))
-        except:
-            return []
+        text_content = self.summarizer.condense(text_content, ENTITIES_FOCUS, 1500)
+        return self.ai_handler.generate_json(
+            self._entities_prompt(text_content), SCHEMAS["string_list"], fallback=[], cache_ttl=CACHE_TTL_WEEK,
+            task="extract"
+        )
+
+    def _entities_prompt(self, text_content):
+        builder = PromptBuilder(max_prompt_tokens("extract"))
+        builder.add("text", text_content, max_tokens=1500)
+        return builder.build(
+            lambda s: f"Extract key entities (products, ingredients, brands, technical terms) from the following text. Return as a JSON list of strings.\n\nText: {s['text']}"
+        )
 
     def suggest_faq(self, topic):
         """
         Generates FAQ questions based on the topic.
         """
-        prompt = f"Generate 5 relevant FAQ questions for the topic '{topic}' that users might ask on Google. Return as a JSON list of strings."
-        response = self.ai_handler.generate_content(prompt)
-        try:
-            return json.loads(response.text.replace('```json', '').replace('```', ''))
-        except:
-            return [f"What is {topic}?", f"How to use {topic}?"]
+        return self.ai_handler.generate_json(
+            self._faq_prompt(topic), SCHEMAS["string_list"], fallback=self._faq_fallback(topic), cache_ttl=CACHE_TTL_WEEK,
+            task="extract"
+        )
+
+    def _faq_prompt(self, topic):
+        return f"Generate 5 relevant FAQ questions for the topic '{topic}' that users might ask on Google. Return as a JSON list of strings."
+
+    def _faq_fallback(self, topic):
+        return [f"What is {topic}?", f"How to use {topic}?"]
 
-    def generate_tov(self, brand_name, industry, url=None, emotional_tone="Нейтральний", formality_level="Нейтральний", unique_trait="", uploaded_docs=None):
+    def generate_tov(self, brand_name, industry, url=None, emotional_tone="Нейтральний", formality_level="Нейтральний", unique_trait="", uploaded_docs=None, site_text=None):
         """
         Generates a Tone of Voice description based on brand info and optional URL scraping.
+        Pass site_text (from a brand snapshot) to skip scraping url.
         """
-        context = ""
-        if url:
+        budget = max_prompt_tokens("long_form")
+        builder = PromptBuilder(budget)
+        scrape_note = ""
+        if not site_text and url:
             try:
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    page = browser.new_page()
-                    page.goto(url, timeout=15000)
-                    # Get text from home page
-                    text = page.inner_text('body')[:5000] # Limit text
-                    context = f"Контент сайту:\n{text}\n\n"
-                    browser.close()
+                # Get text from home page
+                site_text = self.fetcher.fetch(url, "text", ttl=HTTP_TTL_BRAND).text
             except Exception as e:
                 # print(f"ToV Scraping failed: {e}")
-                context = "Could not scrape website. "
-        
-        # Add uploaded documents context
-        if uploaded_docs:
-            # No need to import parser here, text is already extracted in app.py
-            docs_context = "\n\nДодаткові матеріали про бренд:\n"
-            for doc in uploaded_docs[:3]:  # Limit to 3 docs
-                try:
-                    # Check if content is already text (new optimization) or bytes (old way)
-                    if doc.get('is_text', False):
-                        text = doc['content']
-                    else:
-                        # Fallback for backward compatibility
-                        from utils.document_parser import extract_text_from_document
-                        text = extract_text_from_document(doc['content'], doc['type'])
-                        
-                    docs_context += f"\n--- {doc['name']} ---\n{text[:5000]}\n"  # Increased limit to 5000 chars
-                except Exception as e:
-                    # print(f"Error parsing {doc['name']}: {e}")
-                    pass
-            context += docs_context
+                scrape_note = "Could not scrape website. "
+        
+        # Add uploaded documents context - they outrank site text, later documents are cut first
+        docs = []
+        for doc in uploaded_docs or []:
+            try:
+                # Check if content is already text (new optimization) or bytes (old way)
+                if doc.get('is_text', False):
+                    text = doc['content']
+                else:
+                    # Fallback for backward compatibility
+                    from utils.document_parser import extract_text_from_document
+                    text = extract_text_from_document(doc['content'], doc['type'])
+                docs.append((doc['name'], text))
+            except Exception as e:
+                # print(f"Error parsing {doc['name']}: {e}")
+                pass
 
-        prompt = f"""
+        # Long sources are condensed in one parallel batch rather than cut off
+        sources = ([site_text] if site_text else []) + [text for _, text in docs]
+        condensed = self.summarizer.condense_many(sources, TOV_FOCUS, max(1500, budget // max(1, len(sources))))
+        if site_text:
+            builder.add("site", condensed.pop(0), priority=2, min_tokens=200, header="Контент сайту:\n")
+        doc_sections = []
+        for (doc_name, _), text in zip(docs, condensed):
+            name = f"doc{len(doc_sections)}"
+            builder.add(name, text, priority=1, min_tokens=200, header=f"\n--- {doc_name} ---\n")
+            doc_sections.append(name)
+
+        def render(sections):
+            context = scrape_note
+            if sections.get("site"):
+                context += f"{sections['site']}\n\n"
+            docs_context = "".join(f"{sections[name]}\n" for name in doc_sections if sections[name])
+            if docs_context:
+                context += f"\n\nДодаткові матеріали про бренд:\n{docs_context}"
+            return self._tov_prompt(brand_name, industry, emotional_tone, formality_level, unique_trait, context)
+
+        prompt = builder.build(render)
+        
+        # print(f"Generating ToV for {brand_name}...")
+        response = self.ai_handler.generate_content(prompt, task="long_form")
+        # print(f"ToV Generated (Length: {len(response.text)})")
+        return response.text
+
+    def _tov_prompt(self, brand_name, industry, emotional_tone, formality_level, unique_trait, context):
+        return f"""
         Ти - експерт з брендингу. Створи детальний гайд Tone of Voice (Голос Бренду) для бренду.
         
         ВАЖЛИВО: Вся відповідь ОБОВ'ЯЗКОВО має бути УКРАЇНСЬКОЮ мовою!
@@ -392,11 +469,6 @@ class Strategist:
         - Якщо є додаткові матеріали, ОБОВ'ЯЗКОВО посилайся на них (наприклад: "Згідно з вашою стратегією...", "Як зазначено в дослідженні...").
         - Якщо матеріали суперечать один одному, надавай пріоритет завантаженим документам.
         """
-        
-        # print(f"Generating ToV for {brand_name}...")
-        response = self.ai_handler.generate_content(prompt)
-        # print(f"ToV Generated (Length: {len(response.text)})")
-        return response.text
 
     def refine_tov(self, current_tov, instructions):
         """
@@ -415,27 +487,26 @@ class Strategist:
         """
         
         # print(f"Refining ToV...")
-        response = self.ai_handler.generate_content(prompt)
+        response = self.ai_handler.generate_content(prompt, task="long_form")
         # print(f"ToV Refined (Length: {len(response.text)})")
         return response.text
 
-    def generate_audience(self, brand_name, industry, url=None, business_model="B2C", num_personas=2):
+    def generate_audience(self, brand_name, industry, url=None, business_model="B2C", num_personas=2, site_text=None):
         """
         Generates detailed target audience personas with Jobs-to-be-Done framework.
+        Pass site_text (from a brand snapshot) to skip scraping url.
         """
-        context = ""
-        if url:
+        budget = max_prompt_tokens("long_form")
+        builder = PromptBuilder(budget)
+        if not site_text and url:
             try:
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    page = browser.new_page()
-                    page.goto(url, timeout=15000)
-                    text = page.inner_text('body')[:5000]
-                    context = f"Контент сайту:\n{text}\n\n"
-                    browser.close()
+                site_text = self.fetcher.fetch(url, "text", ttl=HTTP_TTL_BRAND).text
             except Exception as e:
                 # print(f"Audience scraping failed: {e}")
-                context = ""
+                pass
+        if site_text:
+            site_text = self.summarizer.condense(site_text, AUDIENCE_FOCUS, budget // 2)
+            builder.add("site", site_text, min_tokens=200, header="Контент сайту:\n")
 
         # Extract business model type
         if "B2B" in business_model and "B2C" in business_model:
@@ -445,7 +516,20 @@ class Strategist:
         else:
             biz_type = "B2C (бізнес для споживачів)"
 
-        prompt = f"""
+        prompt = builder.build(
+            lambda sections: self._audience_prompt(
+                brand_name, industry, biz_type, num_personas,
+                f"{sections['site']}\n\n" if sections.get("site") else ""
+            )
+        )
+        
+        # print(f"Generating {num_personas} personas for {brand_name}...")
+        response = self.ai_handler.generate_content(prompt, task="long_form")
+        # print(f"Personas Generated (Length: {len(response.text)})")
+        return response.text
+
+    def _audience_prompt(self, brand_name, industry, biz_type, num_personas, context):
+        return f"""
         Ти - експерт з маркетингу. Створи {num_personas} детальні персони для бренду.
         
         ВАЖЛИВО: Вся відповідь ОБОВ'ЯЗКОВО має бути УКРАЇНСЬКОЮ мовою!
@@ -512,23 +596,28 @@ class Strategist:
         - Враховуй тип бізнесу ({biz_type})
         - Вся відповідь УКРАЇНСЬКОЮ мовою!
         """
-        
-        # print(f"Generating {num_personas} personas for {brand_name}...")
-        response = self.ai_handler.generate_content(prompt)
-        # print(f"Personas Generated (Length: {len(response.text)})")
-        return response.text
 
     def generate_cjm(self, brand_name, industry, personas_text):
         """
         Generates a Customer Journey Map (CJM) in Markdown table format.
         """
-        prompt = f"""
+        builder = PromptBuilder(max_prompt_tokens("long_form"))
+        builder.add("personas", personas_text, max_tokens=3000)
+        prompt = builder.build(lambda sections: self._cjm_prompt(brand_name, industry, sections["personas"]))
+        
+        # print(f"Generating CJM for {brand_name}...")
+        response = self.ai_handler.generate_content(prompt, task="long_form")
+        # print(f"CJM Generated (Length: {len(response.text)})")
+        return response.text
+
+    def _cjm_prompt(self, brand_name, industry, personas_text):
+        return f"""
         Ти - експерт з Customer Experience. Створи Customer Journey Map (CJM) для бренду.
         
         БРЕНД: {brand_name} ({industry})
         
         ПЕРСОНИ (АУДИТОРІЯ):
-        {personas_text[:3000]}... (скорочено)
+        {personas_text}
         
         ЗАВДАННЯ:
         Створи CJM у вигляді Markdown таблиці.
@@ -552,11 +641,6 @@ class Strategist:
         - Мова: УКРАЇНСЬКА.
         - Будь конкретним для цієї ніші.
         """
-        
-        # print(f"Generating CJM for {brand_name}...")
-        response = self.ai_handler.generate_content(prompt)
-        # print(f"CJM Generated (Length: {len(response.text)})")
-        return response.text
 
     def analyze_competitor_tov(self, url):
         """
@@ -567,45 +651,26 @@ class Strategist:
         text_content = ""
         
         # 1. Scrape Content (Robust Method)
+        # Static HTML first; the fetcher escalates to the browser for JS-rendered shells
         try:
-            with sync_playwright() as p:
-                try:
-                    browser = p.chromium.launch(headless=True)
-                except:
-                    os.system("playwright install chromium")
-                    browser = p.chromium.launch(headless=True)
-                
-                try:
-                    page = browser.new_page()
-                    page.goto(url, timeout=15000)
-                    text_content = page.inner_text('body')[:10000] # Get more text for analysis
-                    page.close()
-                except Exception as e:
-                    # print(f"Playwright failed for {url}: {e}")
-                    # Fallback to Requests
-                    try:
-                        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-                        resp = requests.get(url, headers=headers, timeout=10)
-                        soup = BeautifulSoup(resp.content, 'html.parser')
-                        text_content = soup.get_text(separator=' ', strip=True)[:10000]
-                    except Exception as e2:
-                        # print(f"Requests fallback failed: {e2}")
-                        return {"error": "Could not scrape website"}
-                finally:
-                    browser.close()
+            text_content = self.fetcher.fetch(url, "text", ttl=HTTP_TTL_COMPETITOR).text
         except Exception as e:
-            # print(f"Scraping crashed: {e}")
-            return {"error": str(e)}
+            # print(f"Fetching failed for {url}: {e}")
+            return {"error": "Could not scrape website"}
 
         if not text_content:
             return {"error": "Empty content"}
+        # The whole page is read - long ones are condensed, not cut at 10k characters
+        text_content = self.summarizer.condense(text_content, TOV_FOCUS, 2000)
 
         # 2. Analyze with AI
-        prompt = f"""
+        builder = PromptBuilder(max_prompt_tokens("extract"))
+        builder.add("text", text_content, max_tokens=2000)
+        prompt = builder.build(lambda sections: f"""
         Analyze the text from a competitor's website and extract their Tone of Voice (ToV) characteristics.
         
         TEXT:
-        {text_content[:5000]}...
+        {sections["text"]}
         
         TASK:
         Return a JSON object with the following keys (values must be in UKRAINIAN):
@@ -615,15 +680,17 @@ class Strategist:
         - "values": (list of 3 key values inferred from text)
         
         JSON ONLY. NO MARKDOWN.
-        """
+        """)
         
-        response = self.ai_handler.generate_content(prompt)
-        try:
-            return json.loads(response.text.replace('```json', '').replace('```', ''))
-        except:
-            return {
+        return self.ai_handler.generate_json(
+            prompt,
+            SCHEMAS["competitor_tov"],
+            fallback={
                 "emotional_tone": "Не визначено",
                 "formality_level": "Не визначено",
                 "unique_trait": "Не визначено",
                 "values": []
-            }
+            },
+            cache_ttl=CACHE_TTL_DAY,
+            task="extract"
+        )
@@ -1,4 +1,5 @@
-from utils.ai_handler import AIHandler
+from utils.ai_handler import AIHandler, CACHE_TTL_HOUR
+from utils.structured_output import SCHEMAS
 import json
 
 from bs4 import BeautifulSoup
@@ -50,8 +51,7 @@ class Writer:
         - Competitors cover: 
         {competitor_summary}
         
-        Tone of Voice:
-        {tov}
+        Tone of Voice: follow the Tone of Voice from BRAND CONTEXT.
         
         Requirements:
         - High CTR Title
@@ -68,31 +68,65 @@ class Writer:
             "faq": ["Question 1", "Question 2"]
         }}
         """
-        response = self.ai_handler.generate_content(prompt)
-        try:
-            return json.loads(response.text.replace('```json', '').replace('```', ''))
-        except Exception as e:
-            # print(f"Error parsing outline JSON: {e}")
-            # Fallback outline
-            return {
-                "title": f"Guide to {research_data['topic']}",
-                "sections": [{"heading": "Introduction", "subheadings": [], "notes": "Intro"}],
-                "faq": []
-            }
+        # Fallback outline
+        fallback = {
+            "title": f"Guide to {research_data['topic']}",
+            "sections": [{"heading": "Introduction", "subheadings": [], "notes": "Intro"}],
+            "faq": []
+        }
+        return self.ai_handler.generate_json(
+            prompt, SCHEMAS["outline"], fallback=fallback, cache_ttl=CACHE_TTL_HOUR, context=self._brand_context(tov),
+            task="outline"
+        )
 
     def write_article(self, outline, tov, keywords, reference_patterns=None, internal_links=None):
         """
         Generates the full article content based on the approved outline and optional reference patterns.
         """
+        prompt = self._article_prompt(outline, keywords, reference_patterns, internal_links)
+        response = self.ai_handler.generate_content(
+            prompt, context=self._brand_context(tov, internal_links), task="long_form"
+        )
+        return response.text
+
+    def write_article_stream(self, outline, tov, keywords, reference_patterns=None, internal_links=None):
+        """
+        Same as write_article, but yields Markdown chunks as they are generated.
+        """
+        prompt = self._article_prompt(outline, keywords, reference_patterns, internal_links)
+        return self.ai_handler.stream_content(
+            prompt, context=self._brand_context(tov, internal_links), task="long_form"
+        )
+
+    def _brand_context(self, tov, internal_links=None):
+        """
+        Registers the project's static prompt material as one cached block.
+        
+        ToV and the page inventory are identical across outline/article/rewrite
+        calls within a project, so they are sent once and referenced afterwards.
+        """
+        block = f"""
+        BRAND CONTEXT (reference material for this project)
+        
+        Tone of Voice:
+        {tov}
+        """
+        if internal_links:
+            block += f"""
+        Existing pages on the site:
+        {internal_links}
+        """
+        return self.ai_handler.register_context("brand_context", block)
+
+    def _article_prompt(self, outline, keywords, reference_patterns=None, internal_links=None):
         outline_str = json.dumps(outline, indent=2)
         keywords_str = ", ".join(keywords)
         
         links_instruction = ""
         if internal_links:
-            links_instruction = f"""
+            links_instruction = """
             INTERNAL LINKING (CRITICAL):
-            You have access to the following existing pages on the site:
-            {internal_links}
+            You have access to the existing pages on the site listed in BRAND CONTEXT.
             
             Rules for Internal Linking:
             1. You MUST include at least 3-5 internal links to these pages where contextually relevant.
@@ -120,8 +154,7 @@ class Writer:
         Outline:
         {outline_str}
         
-        Tone of Voice:
-        {tov}
+        Tone of Voice: follow the Tone of Voice from BRAND CONTEXT.
         
         Target Keywords (integrate naturally):
         {keywords_str}
@@ -141,15 +174,27 @@ class Writer:
         2. IMAGES: You MUST include at least 2-3 image placeholders using the format: <img src="placeholder.jpg" alt="Descriptive alt text about the section">.
         3. SCHEMA: You do not need to generate JSON-LD, it will be added later.
         """
-        
-        response = self.ai_handler.generate_content(prompt)
-        return response.text
+        return prompt
 
     def rewrite_article(self, original_article, feedback, tov):
         """
         Rewrites an article based on specific feedback (e.g., SEO audit results).
         """
-        prompt = f"""
+        response = self.ai_handler.generate_content(
+            self._rewrite_prompt(original_article, feedback), context=self._brand_context(tov), task="rewrite"
+        )
+        return response.text
+
+    def rewrite_article_stream(self, original_article, feedback, tov):
+        """
+        Same as rewrite_article, but yields Markdown chunks as they are generated.
+        """
+        return self.ai_handler.stream_content(
+            self._rewrite_prompt(original_article, feedback), context=self._brand_context(tov), task="rewrite"
+        )
+
+    def _rewrite_prompt(self, original_article, feedback):
+        return f"""
         You are an expert SEO Editor. Your goal is to IMPROVE the article's SEO score without breaking existing optimizations.
         
         Original Article:
@@ -158,8 +203,7 @@ class Writer:
         Feedback / Issues to Fix:
         {feedback}
         
-        Tone of Voice:
-        {tov}
+        Tone of Voice: follow the Tone of Voice from BRAND CONTEXT.
         
         CRITICAL INSTRUCTIONS:
         1. **Preserve Keywords**: Do NOT remove existing keywords. Only ADD missing ones.
@@ -170,6 +214,3 @@ class Writer:
         
         Return the FULL rewritten article in Markdown.
         """
-        
-        response = self.ai_handler.generate_content(prompt)
-        return response.text
@@ -15,6 +15,7 @@ from utils.sitemap_parser import ingest_sitemap
 from utils.seo_scorer import calculate_seo_score
 from utils.state_manager import save_state, load_state
 from utils.keyword_loader import load_keywords_from_csv
+from utils.brand_snapshot import take_snapshot, snapshot_text
 
 from agents.strategist import Strategist
 from agents.writer import Writer
@@ -40,6 +41,20 @@ strategist = Strategist(API_KEY) if API_KEY else None
 writer = Writer(API_KEY) if API_KEY else None
 coder = Coder(vector_db)
 
+def wizard_site_text(url):
+    """Brand-site text for the wizard: scraped once per URL and reused by every generation step."""
+    if not url:
+        return None
+    snapshot = st.session_state.get('brand_snapshot')
+    if snapshot_text(snapshot, url) is None:
+        try:
+            snapshot = take_snapshot(strategist.fetcher, url)
+        except Exception as e:
+            print(f"[WARN] Brand snapshot failed: {e}")
+            return None
+        st.session_state['brand_snapshot'] = snapshot
+    return snapshot_text(snapshot, url)
+
 # Page Config
 st.set_page_config(page_title="SEO Content Machine", layout="wide", page_icon="🚀")
 
@@ -277,7 +292,8 @@ if selected_option == "Create New...":
                                 emotional_tone=emotional_tone,
                                 formality_level=formality_level,
                                 unique_trait=unique_trait,
-                                uploaded_docs=uploaded_docs
+                                uploaded_docs=uploaded_docs,
+                                site_text=wizard_site_text(url)
                             )
                             
                             print(f"[DEBUG] Generated ToV length: {len(generated_tov)}")
@@ -409,7 +425,8 @@ if selected_option == "Create New...":
                                 industry, 
                                 url,
                                 business_model=business_model,
-                                num_personas=num_personas
+                                num_personas=num_personas,
+                                site_text=wizard_site_text(url)
                             )
                             st.session_state.new_project_data['audience'] = personas_text
                             st.session_state['audience_editor'] = personas_text
@@ -508,6 +525,10 @@ if selected_option == "Create New...":
                             st.info(f"Видалено старий проект '{brand_name}'")
                     
                     file_manager.create_project(st.session_state.new_project_data)
+                    # Keep the wizard's site scrape so later regenerations don't re-fetch
+                    snapshot = st.session_state.pop('brand_snapshot', None)
+                    if snapshot_text(snapshot, st.session_state.new_project_data.get('website_url')):
+                        file_manager.save_brand_snapshot(brand_name, snapshot)
                     st.session_state['selected_project'] = brand_name
                     # Reset Wizard
                     st.session_state.wizard_step = 1
@@ -0,0 +1,106 @@
+"""
+Microbenchmark: BeautifulSoup html.parser vs utils.html_extract (lxml).
+
+Times the extractions the hot paths do - title + h1 per crawled page,
+the competitor outline, visible text and the audit reads - on real pages
+(URLs through the HTTP cache, or saved .html files). Without arguments a
+synthetic product page is used.
+
+    python bench_html_extract.py https://example.com/ https://example.com/blog/ --repeat 20
+    python bench_html_extract.py saved_page.html
+"""
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.html_extract import HtmlDoc, title_and_h1
+from utils.http_cache import get_http_cache, HTTP_TTL_PAGE
+
+def sample_page():
+    items = "".join(
+        f'<div class="card"><img src="/p{i}.jpg" alt="Товар {i}"><h3>Товар {i}</h3>'
+        f'<p>Опис товару {i}. Свіжі пресовані дріжджі для домашньої випічки.</p><span class="price">{i * 10} грн</span></div>'
+        for i in range(300)
+    )
+    return (
+        "<html><head><title>Пресовані дріжджі - купити</title>"
+        '<script type="application/ld+json">{"@type": "Product", "name": "Дріжджі"}</script>'
+        "<style>.card{display:flex}</style></head><body><nav>" + "<a href='/c'>Категорія</a>" * 80 +
+        "</nav><h1>Пресовані дріжджі</h1><h2>Каталог</h2>" + items + "<script>window.x = 1;</script></body></html>"
+    )
+
+def load_pages(sources):
+    pages = []
+    for source in sources:
+        if os.path.exists(source):
+            with open(source, "r", encoding="utf-8", errors="replace") as f:
+                pages.append((source, f.read()))
+        else:
+            response = get_http_cache().get(source, HTTP_TTL_PAGE)
+            pages.append((source, response.text))
+    return pages
+
+def bs_title_h1(html):
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    h1 = soup.find("h1")
+    return title, h1.get_text(strip=True) if h1 else ""
+
+def bs_outline(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [f"{h.name.upper()}: {h.get_text(strip=True)}" for h in soup.find_all(["h2", "h3"])][:10]
+
+def bs_text(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    return (soup.body or soup).get_text(separator=" ", strip=True)
+
+def bs_audit(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.get_text(), len(soup.find_all("h1")), len(soup.find_all("h2")), [i.get("alt") for i in soup.find_all("img")]
+
+def lxml_outline(html):
+    return [f"{tag.upper()}: {text}" for tag, text in HtmlDoc(html).headings(("h2", "h3"), limit=10)]
+
+def lxml_audit(html):
+    doc = HtmlDoc(html)
+    return doc.text(), doc.count("h1"), doc.count("h2"), [i["alt"] for i in doc.images()]
+
+CASES = [
+    ("title + h1 (crawler)", bs_title_h1, title_and_h1),
+    ("outline (competitors)", bs_outline, lxml_outline),
+    ("visible text (fetcher)", bs_text, lambda html: HtmlDoc(html).text()),
+    ("audit reads (seo_scorer)", bs_audit, lxml_audit),
+]
+
+def timed(fn, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            fn(html)
+    return (time.perf_counter() - started) / (repeat * len(pages)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", help="URLs or .html files (default: synthetic page)")
+    parser.add_argument("--repeat", type=int, default=10, help="Passes over the page set")
+    args = parser.parse_args()
+
+    pages = load_pages(args.sources) if args.sources else [("sample", sample_page())]
+    size_kb = sum(len(html.encode("utf-8")) for _, html in pages) / len(pages) / 1024
+    print(f"{len(pages)} page(s), avg {size_kb:.0f} KB, {args.repeat} passes\n")
+    print(f"{'extraction':<26}{'bs4 ms/page':>12}{'lxml ms/page':>14}{'speedup':>10}")
+    for name, slow, fast in CASES:
+        bs_ms = timed(slow, pages, args.repeat)
+        lxml_ms = timed(fast, pages, args.repeat)
+        print(f"{name:<26}{bs_ms:>12.2f}{lxml_ms:>14.2f}{bs_ms / lxml_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Offline end-to-end benchmark: research -> outline -> article -> audit.
+
+Runs the real Strategist/Writer/Coder code against the bundled fake Gemini
+server, so throughput and tail latency can be measured without quota or
+network access.
+
+    python bench_pipeline.py --runs 20 --concurrency 4 --latency 0.8 --rate-429 0.05
+"""
+import argparse
+import os
+import sys
+import time
+import concurrent.futures
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.fake_llm_server import start_fake_server
+from utils.rate_limiter import get_rate_limiter
+from utils.model_router import MODEL_TIERS
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Pipelines to run")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pipelines in parallel")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-503", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=10_000, help="Rate limiter RPM for the run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(
+        latency=args.latency, jitter=args.jitter, rate_429=args.rate_429, rate_503=args.rate_503,
+        retry_after=1, seed=args.seed
+    )
+    os.environ["SEO_LLM_BACKEND"] = "rest"
+    os.environ["SEO_LLM_BASE_URL"] = base_url
+    os.environ["SEO_CACHE_DISABLED"] = "1"
+
+    from agents.strategist import Strategist
+    from agents.writer import Writer
+    from agents.coder import Coder
+    from utils.seo_scorer import calculate_seo_score
+
+    # Limiters are process-wide; create them with the benchmark budget before agents do
+    for model_name in MODEL_TIERS.values():
+        get_rate_limiter(model_name, rpm=args.rpm, tpm=10**9, max_concurrency=64)
+
+    strategist = Strategist("fake-key")
+    writer = Writer("fake-key")
+    coder = Coder(vector_db=None)
+    tov = "# Tone of Voice\n\nДружній, експертний, без канцеляризмів."
+
+    timings = {"research": [], "outline": [], "article_ttfb": [], "article": [], "audit": [], "total": []}
+    errors = []
+
+    def pipeline(i):
+        topic = f"Тема {i}: пресовані дріжджі"
+        t0 = time.perf_counter()
+        keywords = strategist.generate_keywords(topic, num_keywords=10)
+        strategist.suggest_faq(topic)
+        t1 = time.perf_counter()
+        outline = writer.generate_outline({"topic": topic, "intent": "Інформаційний", "competitor_outlines": []}, tov)
+        t2 = time.perf_counter()
+        chunks = []
+        ttfb = None
+        for chunk in writer.write_article_stream(outline, tov, [k["keyword"] for k in keywords[:5]]):
+            if ttfb is None:
+                ttfb = time.perf_counter() - t2
+            chunks.append(chunk)
+        t3 = time.perf_counter()
+        html = coder.convert_to_html("".join(chunks))
+        calculate_seo_score(html, [k["keyword"] for k in keywords[:5]], {})
+        t4 = time.perf_counter()
+        return {"research": t1 - t0, "outline": t2 - t1, "article_ttfb": ttfb or 0.0,
+                "article": t3 - t2, "audit": t4 - t3, "total": t4 - t0}
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(pipeline, i) for i in range(args.runs)]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                for stage, value in future.result().items():
+                    timings[stage].append(value)
+            except Exception as e:
+                errors.append(e)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    print(f"Pipelines: {args.runs} ({len(errors)} failed), concurrency {args.concurrency}, wall {elapsed:.1f}s")
+    print(f"Throughput: {len(timings['total']) / elapsed * 60:.1f} pipelines/min")
+    print(f"Fake server: {server.RequestHandlerClass.config.requests} requests, "
+          f"{server.RequestHandlerClass.config.errors} injected errors")
+    print(f"{'stage':<14}{'p50 (s)':>10}{'p95 (s)':>10}{'max (s)':>10}")
+    for stage, values in timings.items():
+        print(f"{stage:<14}{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}{max(values or [0]):>10.2f}")
+    print(f"Rate limiter: {strategist.ai_handler.limiter_metrics()}")
+    print(f"{'task':<12}{'p50 (s)':>10}{'p95 (s)':>10}{'SLO (s)':>10}{'misses':>8}  models")
+    for task, stats in strategist.ai_handler.task_latency_stats().items():
+        models = ", ".join(f"{name}: {m['count']} ok/{m['failures']} failed" for name, m in stats["models"].items())
+        print(f"{task:<12}{stats['p50'] or 0:>10.2f}{stats['p95'] or 0:>10.2f}{stats['latency_slo']:>10.1f}"
+              f"{stats['slo_misses']:>8}  {models}")
+    for e in errors[:5]:
+        print(f"Error: {e}")
+
+if __name__ == "__main__":
+    main()
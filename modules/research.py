@@ -1,5 +1,7 @@
 import streamlit as st
 from utils.state_manager import save_state
+from utils.research_store import ResearchStore
+from utils.keyword_loader import load_keywords_from_csv
 
 def render_research(selected_project, strategist, API_KEY, file_manager):
     """
@@ -14,7 +16,9 @@ def render_research(selected_project, strategist, API_KEY, file_manager):
     st.title("🔍 Дослідження та Аналіз")
     
     # Tabs for different research features
-    research_tab1, research_tab2, research_tab3 = st.tabs(["💡 Ідеї Тем", "🔎 SERP Аналіз", "🔑 Генератор Ключів"])
+    research_tab1, research_tab2, research_tab3, research_tab4 = st.tabs(
+        ["💡 Ідеї Тем", "🔎 SERP Аналіз", "🔑 Генератор Ключів", "📦 Пакетний Аналіз"]
+    )
     
     with research_tab1:
         _render_topic_ideas(selected_project, strategist, API_KEY, file_manager)
@@ -24,6 +28,9 @@ def render_research(selected_project, strategist, API_KEY, file_manager):
 
     with research_tab3:
         _render_keyword_generator(selected_project, strategist, API_KEY, file_manager)
+
+    with research_tab4:
+        _render_bulk_research(selected_project, strategist, API_KEY, file_manager)
     
     # Display research results if available
     if st.session_state.get('research_data'):
@@ -83,7 +90,8 @@ def _render_topic_ideas(selected_project, strategist, API_KEY, file_manager):
                         # Load sitemap pages
                         pages_csv = file_manager.read_file(selected_project, "pages.csv")
                         if pages_csv:
-                            context_data += f"Existing pages on site (DO NOT DUPLICATE):\n{pages_csv[:2000]}\n"
+                            # Trimmed to the prompt token budget by Strategist
+                            context_data += f"Existing pages on site (DO NOT DUPLICATE):\n{pages_csv}\n"
                             
                     topics = strategist.generate_topic_ideas(niche_input, num_topics=10, context_data=context_data)
                     st.session_state.topic_ideas = topics
@@ -133,6 +141,76 @@ def _render_keyword_generator(selected_project, strategist, API_KEY, file_manage
             st.success("✅ Ключі збережено в проект!")
 
 
+def _render_bulk_research(selected_project, strategist, API_KEY, file_manager):
+    """Renders the bulk SERP research tab (whole semantic core or a pasted list)."""
+    st.subheader("📦 Пакетний SERP Аналіз")
+    st.markdown("Аналіз видачі, інтенту та структур конкурентів для списку ключів. Результати зберігаються по ходу - перерваний запуск продовжиться з місця зупинки.")
+    
+    store = ResearchStore.for_project(selected_project, base_dir=str(file_manager.base_dir))
+    core_keywords = load_keywords_from_csv(selected_project, file_manager, top_n=None)
+    
+    source = st.radio("Джерело ключів", [f"Semantic Core ({len(core_keywords)})", "Власний список"], horizontal=True)
+    if source == "Власний список":
+        pasted = st.text_area("Ключі (по одному на рядок)", height=150)
+        topics = [line.strip() for line in pasted.splitlines() if line.strip()]
+    else:
+        topics = core_keywords
+    
+    c1, c2 = st.columns(2)
+    with c1:
+        with_outlines = st.checkbox("Завантажувати структури конкурентів", value=True)
+    with c2:
+        workers = st.slider("Паралельних тем", 1, 8, 4)
+    
+    done_topics = store.done_topics()
+    remaining = [t for t in dict.fromkeys(topics) if t not in done_topics]
+    st.caption(f"Готово: {len(set(topics) & done_topics)} з {len(set(topics))}, залишилось: {len(remaining)}")
+    
+    b1, b2 = st.columns(2)
+    with b1:
+        start_btn = st.button("🚀 Запустити / Продовжити", disabled=not remaining, use_container_width=True)
+    with b2:
+        if st.button("🗑️ Очистити результати", use_container_width=True):
+            store.clear()
+            st.rerun()
+    
+    if start_btn:
+        if not API_KEY:
+            st.error("⚠️ API Key не знайдено!")
+        else:
+            progress = st.progress(0.0, text="Починаю...")
+            
+            def on_progress(done, total, record):
+                status = "❌" if record.get("error") else "✅"
+                progress.progress(done / total, text=f"{status} {record['topic']} ({done}/{total})")
+            
+            summary = strategist.research_topics(
+                remaining, store, workers=workers, with_outlines=with_outlines, on_progress=on_progress
+            )
+            st.success(
+                f"Проаналізовано {summary['done'] - summary['failed']} тем за {summary['seconds']:.0f} с "
+                f"({summary['topics_per_min']:.1f} тем/хв), помилок: {summary['failed']}"
+            )
+    
+    records = store.load()
+    if records:
+        import pandas as pd
+        st.dataframe(pd.DataFrame([{
+            "Тема": r["topic"],
+            "Інтент": r.get("intent", ""),
+            "SERP Фічі": ", ".join(r.get("serp_features") or []),
+            "Конкурентів": len(r.get("competitors", [])),
+            "Структур": len(r.get("competitor_outlines", [])),
+            "Помилка": r.get("error", "")
+        } for r in records]), use_container_width=True)
+        
+        picked = st.selectbox("Відкрити результат", [r["topic"] for r in records if not r.get("error")])
+        if picked and st.button("📂 Відкрити в SERP Аналізі"):
+            st.session_state.research_data = next(r for r in records if r["topic"] == picked)
+            save_state(selected_project, {'research_data': st.session_state.research_data})
+            st.rerun()
+
+
 def _render_serp_analysis(selected_project, strategist, API_KEY):
     """Renders the SERP Analysis tab."""
     st.subheader("🔎 SERP Аналіз")
@@ -197,6 +275,8 @@ def _display_research_results(selected_project, strategist, file_manager):
                     urls = [r['url'] for r in data['competitors']]
                     outlines = strategist.analyze_competitors(urls)
                     st.session_state.research_data['competitor_outlines'] = outlines
+                    if len(outlines) < len(urls):
+                        st.toast(f"Завантажено {len(outlines)} з {len(urls)} сайтів - решта не встигла відповісти")
                     
                     # Save state
                     save_state(selected_project, {'research_data': st.session_state.research_data})
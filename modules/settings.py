@@ -1,7 +1,9 @@
 import streamlit as st
 import json
 from utils.report_generator import generate_brand_book_html
-from utils.sitemap_parser import ingest_sitemap
+from utils.sitemap_parser import refresh_sitemap
+from utils.crawl_state import CrawlState
+from utils.brand_snapshot import take_snapshot, snapshot_text
 
 def render_settings(selected_project, strategist, vector_db, file_manager, API_KEY):
     """
@@ -76,12 +78,22 @@ def render_settings(selected_project, strategist, vector_db, file_manager, API_K
                                 industry = config.get("industry", "")
                                 url = config.get("website_url", "")
                                 
+                                # Reuse the project's site snapshot; take one only for older projects
+                                snapshot = file_manager.get_brand_snapshot(selected_project)
+                                if url and snapshot_text(snapshot, url) is None:
+                                    try:
+                                        snapshot = take_snapshot(strategist.fetcher, url)
+                                        file_manager.save_brand_snapshot(selected_project, snapshot)
+                                    except Exception:
+                                        snapshot = None
+                                
                                 personas_text = strategist.generate_audience(
                                     brand_name,
                                     industry,
                                     url,
                                     business_model="B2C",
-                                    num_personas=2
+                                    num_personas=2,
+                                    site_text=snapshot_text(snapshot, url)
                                 )
                                 config["audience"] = personas_text
                                 config_path.write_text(json.dumps(config, indent=4, ensure_ascii=False), encoding="utf-8")
@@ -225,11 +237,17 @@ def render_settings(selected_project, strategist, vector_db, file_manager, API_K
         
         max_pages = 10000  # Full crawl
         
+        crawl_state = CrawlState.for_project(selected_project, base_dir=str(file_manager.base_dir))
+        incremental = st.checkbox(
+            "Лише зміни (інкрементально)", value=len(crawl_state) > 0,
+            help="Сканує лише нові сторінки та ті, в яких змінився lastmod; видалені з sitemap прибирає з бази знань."
+        )
+        
         if st.button("📥 Завантажити Sitemap (Full)", type="primary"):
             if not sitemap_url:
                 st.error("Введіть URL!")
             else:
-                with st.spinner("Сканую карту сайту у багатопотоковому режимі (це займе 1-2 хвилини)..."):
+                with st.spinner("Сканую карту сайту..."):
                     try:
                         # 1. Parse Sitemap
                         st.info("Збираю всі посилання та сканую сторінки...")
@@ -238,25 +256,49 @@ def render_settings(selected_project, strategist, vector_db, file_manager, API_K
                         progress_bar = st.progress(0)
                         status_text = st.empty()
                         
-                        # Run ingestion
-                        df = ingest_sitemap(sitemap_url, max_pages=max_pages)
+                        def on_progress(stats):
+                            # Redraw every 25 pages - each Streamlit update is a websocket message
+                            if stats.done % 25 == 0 or stats.done == stats.total:
+                                progress_bar.progress(stats.done / stats.total)
+                                status_text.text(f"{stats.done}/{stats.total} сторінок, {stats.pages_per_sec:.1f} стор/с")
+                        
+                        # Run ingestion - only new/changed pages are fetched in incremental mode
+                        result = refresh_sitemap(sitemap_url, crawl_state, max_pages=max_pages,
+                                                 on_progress=on_progress, full=not incremental)
+                        df = result["pages"]
                         
                         progress_bar.progress(100)
                         status_text.text("Готово!")
                         
+                        sitemap_report = result["sitemap_report"]
+                        if sitemap_report.get("errors"):
+                            with st.expander(f"⚠️ Не вдалося прочитати {sitemap_report['errors']} з {sitemap_report['sitemaps']} sitemap-файлів"):
+                                for index_url, index_info in sitemap_report.get("indexes", {}).items():
+                                    for failed_url, error in index_info["failed"].items():
+                                        st.write(f"**{index_url}** → {failed_url}: {error}")
+                        
                         if df.empty:
                             st.error("Не знайдено жодної сторінки!")
                         else:
-                            st.success(f"✅ Завантажено {len(df)} сторінок!")
+                            crawl_stats = result["crawl_stats"]
+                            counts = result["counts"]
+                            st.success(
+                                f"✅ Оброблено {counts['listed']} сторінок за {crawl_stats.get('seconds', 0):.0f} с "
+                                f"({crawl_stats.get('pages_per_sec', 0)} стор/с): нових {counts['new']}, "
+                                f"змінених {counts['changed']}, без змін {counts['unchanged'] + counts['skipped']}, "
+                                f"видалених {counts['removed']}, помилок {counts['failed']}"
+                            )
                             
-                            # 2. Save to CSV
+                            # 2. Save crawl state and CSV
+                            crawl_state.save()
                             csv_path = file_manager.get_project_path(selected_project) / "pages.csv"
                             df.to_csv(csv_path, index=False, encoding='utf-8')
                             st.info(f"Збережено в: {csv_path}")
                             
-                            # 3. Ingest into Vector DB
+                            # 3. Push only the differences to Vector DB
                             with st.spinner("Індексую в векторну базу даних..."):
-                                vector_db.add_pages(selected_project, df)
+                                vector_db.add_pages(selected_project, result["changed"])
+                                vector_db.delete_pages(selected_project, result["removed"])
                             
                             st.success("🎉 База знань оновлена! Тепер ШІ може робити внутрішню перелінковку.")
                             
@@ -38,15 +38,22 @@ def render_write(selected_project, writer, coder, file_manager):
             )
             
             if st.button("✅ Затвердити План і Написати Статтю", use_container_width=True):
-                with st.spinner("Пишу статтю (це може зайняти хвилину)..."):
-                    tov = file_manager.get_tov(selected_project)
-                    keywords = load_keywords_from_csv(selected_project, file_manager, top_n=5)
-                    
-                    # Load internal links
-                    pages_content = file_manager.read_file(selected_project, "pages.csv")
-                    internal_links = pages_content if pages_content else None
-                    
-                    article = writer.write_article(edited_outline, tov, keywords, internal_links=internal_links)
+                tov = file_manager.get_tov(selected_project)
+                keywords = load_keywords_from_csv(selected_project, file_manager, top_n=5)
+                
+                # Load internal links
+                pages_content = file_manager.read_file(selected_project, "pages.csv")
+                internal_links = pages_content if pages_content else None
+                
+                # Stream the article as it is generated. Any click (e.g. "Stop") reruns the
+                # script, which closes the stream and discards the partial article.
+                st.button("⏹️ Зупинити генерацію", key="stop_article_stream")
+                with st.container(border=True):
+                    article = st.write_stream(
+                        writer.write_article_stream(edited_outline, tov, keywords, internal_links=internal_links)
+                    )
+                
+                if article:
                     st.session_state.generated_article = article
                     
                     # Save article to project folder (archive)
@@ -158,13 +165,18 @@ def render_write(selected_project, writer, coder, file_manager):
                     st.divider()
                     st.write("### 🔄 Покращення")
                     if st.button("✨ Переписати статтю з урахуванням аудиту", type="primary"):
-                        with st.spinner("Переписую статтю..."):
-                            tov = file_manager.get_tov(selected_project)
-                            feedback_str = "\n".join(audit_result['feedback'])
-                            missing_kw_str = ", ".join(audit_result['missing_keywords'])
-                            full_feedback = f"Fix these issues:\n{feedback_str}\n\nInclude missing keywords:\n{missing_kw_str}"
-                            
-                            new_article = writer.rewrite_article(st.session_state.generated_article, full_feedback, tov)
+                        tov = file_manager.get_tov(selected_project)
+                        feedback_str = "\n".join(audit_result['feedback'])
+                        missing_kw_str = ", ".join(audit_result['missing_keywords'])
+                        full_feedback = f"Fix these issues:\n{feedback_str}\n\nInclude missing keywords:\n{missing_kw_str}"
+                        
+                        st.button("⏹️ Зупинити генерацію", key="stop_rewrite_stream")
+                        with st.container(border=True):
+                            new_article = st.write_stream(
+                                writer.rewrite_article_stream(st.session_state.generated_article, full_feedback, tov)
+                            )
+                        
+                        if new_article:
                             st.session_state.generated_article = new_article
                             st.session_state.audit_result = None # Reset audit
                             st.success("✅ Статтю оновлено! Перевірте вкладку 'Попередній перегляд'.")
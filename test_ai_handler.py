@@ -0,0 +1,177 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from tenacity import wait_none
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.response_cache import ResponseCache
+from utils.rate_limiter import RateLimiter
+from utils.ai_handler import AIHandler
+
+# No real backoff between retries in tests
+AIHandler._generate.retry.wait = wait_none()
+
+def make_handler(cache_dir):
+    with patch("utils.ai_handler.genai"):
+        handler = AIHandler("fake-key")
+    handler.cache = ResponseCache(cache_dir)
+    handler.limiter = RateLimiter(rpm=10_000, tpm=10**9)
+    handler.model = MagicMock()
+    handler.model.generate_content.return_value = MagicMock(text="answer")
+    return handler
+
+class TestAIHandlerCaching(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = make_handler(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cached_call_site(self):
+        self.handler.generate_content("p", cache_ttl=60)
+        response = self.handler.generate_content("p", cache_ttl=60)
+        self.assertEqual(response.text, "answer")
+        self.assertEqual(self.handler.model.generate_content.call_count, 1)
+
+    def test_uncached_call_site_and_bypass(self):
+        self.handler.generate_content("p")
+        self.handler.generate_content("p")
+        self.handler.generate_content("p", cache_ttl=60)
+        self.handler.generate_content("p", cache_ttl=60, bypass_cache=True)
+        self.assertEqual(self.handler.model.generate_content.call_count, 4)
+
+class TestGenerateMany(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = make_handler(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_results_in_order_with_errors(self):
+        def fake_generate(prompt):
+            if prompt == "bad":
+                raise ValueError("boom")
+            time.sleep(0.05 if prompt == "slow" else 0)
+            return MagicMock(text=prompt.upper())
+
+        self.handler.model.generate_content.side_effect = fake_generate
+        results = self.handler.generate_many(["slow", "bad", "fast"], max_concurrency=3)
+        self.assertEqual([r.text for r in results], ["SLOW", None, "FAST"])
+        self.assertFalse(results[1].ok)
+        self.assertIsInstance(results[1].error, ValueError)
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def fake_generate(prompt):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return MagicMock(text=prompt)
+
+        self.handler.model.generate_content.side_effect = fake_generate
+        results = self.handler.generate_many([str(i) for i in range(8)], max_concurrency=2)
+        self.assertEqual(len(results), 8)
+        self.assertLessEqual(state["peak"], 2)
+
+class TestStreamContent(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = make_handler(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_yields_chunks(self):
+        self.handler.model.generate_content.return_value = [MagicMock(text="Пер"), MagicMock(text="ший")]
+        self.assertEqual("".join(self.handler.stream_content("p")), "Перший")
+        self.handler.model.generate_content.assert_called_with("p", stream=True)
+
+    def test_retries_before_first_chunk(self):
+        self.handler.model.generate_content.side_effect = [
+            Exception("429 Resource exhausted. Please retry in 0.01s"),
+            [MagicMock(text="ok")]
+        ]
+        self.assertEqual(list(self.handler.stream_content("p")), ["ok"])
+
+    def test_cancel_releases_limiter(self):
+        self.handler.model.generate_content.return_value = iter([MagicMock(text="a"), MagicMock(text="b")])
+        stream = self.handler.stream_content("p")
+        next(stream)
+        self.assertEqual(self.handler.limiter.metrics()["in_flight"], 1)
+        stream.close()
+        self.assertEqual(self.handler.limiter.metrics()["in_flight"], 0)
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = make_handler(self.tmp.name)
+
+        def slow_generate(prompt):
+            time.sleep(0.1)
+            return MagicMock(text=prompt)
+
+        self.handler.model.generate_content.side_effect = slow_generate
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run_concurrently(self, calls):
+        results = [None] * len(calls)
+
+        def run(i, call):
+            results[i] = call().text
+
+        threads = [threading.Thread(target=run, args=(i, c)) for i, c in enumerate(calls)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_identical_calls_share_one_request(self):
+        results = self._run_concurrently([lambda: self.handler.generate_content("same")] * 3)
+        self.assertEqual(results, ["same"] * 3)
+        self.assertEqual(self.handler.model.generate_content.call_count, 1)
+
+    def test_different_calls_are_not_merged(self):
+        self._run_concurrently([
+            lambda: self.handler.generate_content("a"),
+            lambda: self.handler.generate_content("b")
+        ])
+        self.assertEqual(self.handler.model.generate_content.call_count, 2)
+
+    def test_cross_process_lock_rechecks_cache(self):
+        self.handler.cross_process = True
+        with patch("utils.ai_handler.LOCK_DIR", os.path.join(self.tmp.name, "locks")):
+            self.handler.generate_content("p", cache_ttl=60)
+            self.handler.generate_content("p", cache_ttl=60)
+        self.assertEqual(self.handler.model.generate_content.call_count, 1)
+
+    def test_cross_process_lock_files_are_sharded(self):
+        self.handler.cross_process = True
+        lock_dir = os.path.join(self.tmp.name, "locks")
+        with patch("utils.ai_handler.LOCK_DIR", lock_dir):
+            for i in range(300):
+                self.handler.generate_content(f"p{i}", cache_ttl=60)
+        self.assertLessEqual(len(os.listdir(lock_dir)), 256)
+        self.assertTrue(all(len(name) == len("ab.lock") for name in os.listdir(lock_dir)))
+
+if __name__ == '__main__':
+    unittest.main()
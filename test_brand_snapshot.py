@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.brand_snapshot import find_key_pages, take_snapshot, snapshot_text
+from utils.fetcher import FetchResult
+from utils.file_manager import FileManager
+from agents.strategist import Strategist
+
+HOME = """<html><body><h1>Пекарня</h1>
+<a href="/catalog/">Каталог</a>
+<a href="/pro-nas/">Про нас</a>
+<a href="https://shop.ua/dostavka">Доставка і оплата</a>
+<a href="https://facebook.com/about">Facebook</a>
+<p>Свіжий хліб щодня.</p></body></html>"""
+
+class TestBrandSnapshot(unittest.TestCase):
+
+    def make_fetcher(self):
+        fetcher = MagicMock()
+        fetcher.fetch.side_effect = lambda url, signal, ttl=None: FetchResult(
+            url, HOME if url == "https://shop.ua/" else f"<p>Сторінка {url}</p>", "http"
+        )
+        return fetcher
+
+    def test_key_pages_are_same_site_and_ordered_by_hint(self):
+        self.assertEqual(find_key_pages(HOME, "https://shop.ua/"),
+                         ["https://shop.ua/pro-nas/", "https://shop.ua/dostavka"])
+
+    def test_snapshot_fetches_each_page_once(self):
+        fetcher = self.make_fetcher()
+        snapshot = take_snapshot(fetcher, "https://shop.ua/")
+        self.assertEqual(fetcher.fetch.call_count, 3)
+        text = snapshot_text(snapshot, "https://shop.ua")
+        self.assertIn("Свіжий хліб", text)
+        self.assertIn("--- https://shop.ua/dostavka ---", text)
+        self.assertIsNone(snapshot_text(snapshot, "https://other.ua/"))
+
+    def test_snapshot_persisted_per_project(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_manager = FileManager(tmp)
+            file_manager.create_project({"brand_name": "Пекарня"})
+            self.assertIsNone(file_manager.get_brand_snapshot("Пекарня"))
+            snapshot = take_snapshot(self.make_fetcher(), "https://shop.ua/")
+            file_manager.save_brand_snapshot("Пекарня", snapshot)
+            self.assertEqual(file_manager.get_brand_snapshot("Пекарня"), snapshot)
+
+    def test_generation_with_site_text_does_not_scrape(self):
+        with patch("utils.ai_handler.genai"):
+            strategist = Strategist("fake-key")
+        strategist.fetcher = MagicMock()
+        strategist.ai_handler = MagicMock()
+        strategist.ai_handler.generate_content.return_value.text = "ok"
+        strategist.generate_tov("Пекарня", "Food", "https://shop.ua/", site_text="Свіжий хліб щодня.")
+        strategist.generate_audience("Пекарня", "Food", "https://shop.ua/", site_text="Свіжий хліб щодня.")
+        strategist.fetcher.fetch.assert_not_called()
+        prompt = strategist.ai_handler.generate_content.call_args[0][0]
+        self.assertIn("Свіжий хліб щодня.", prompt)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import concurrent.futures
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.browser_pool import BrowserPool
+
+class FakePage:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.route_handler = None
+
+    async def route(self, pattern, handler):
+        self.route_handler = handler
+
+    async def new_page(self):
+        return FakePage()
+
+    async def close(self):
+        self.browser.open_contexts -= 1
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.open_contexts = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, user_agent=None):
+        self.open_contexts += 1
+        return FakeContext(self)
+
+    async def close(self):
+        self.connected = False
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+        self.stopped = False
+
+    async def start(self):
+        return self
+
+    async def launch(self, headless=True, args=None):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+    async def stop(self):
+        self.stopped = True
+
+class TestBrowserPool(unittest.TestCase):
+
+    def setUp(self):
+        self.playwright = FakePlaywright()
+        patcher = patch("utils.browser_pool.async_playwright", return_value=self.playwright)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = BrowserPool(max_pages=2)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_browser_launched_once_and_pages_capped(self):
+        active = {"now": 0, "max": 0}
+
+        async def work(page):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+            return "ok"
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(lambda _: self.pool.run(work), range(6)))
+
+        self.assertEqual(results, ["ok"] * 6)
+        self.assertEqual(len(self.playwright.browsers), 1)
+        self.assertEqual(active["max"], 2)
+        self.assertEqual(self.playwright.browsers[0].open_contexts, 0)
+
+    def test_crashed_browser_is_relaunched(self):
+        async def work(page):
+            return "ok"
+
+        self.pool.run(work)
+        self.playwright.browsers[0].connected = False
+        self.assertEqual(self.pool.run(work), "ok")
+        self.assertEqual(self.pool.stats()["launches"], 2)
+
+    def test_errors_propagate_and_context_closes(self):
+        async def fail(page):
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.pool.run(fail)
+        self.assertEqual(self.pool.stats()["failures"], 1)
+        self.assertEqual(self.playwright.browsers[0].open_contexts, 0)
+
+    def test_lean_profile_blocks_heavy_resources_and_trackers(self):
+        decisions = {}
+
+        class FakeRoute:
+            def __init__(self, url, resource_type):
+                self.request = type("Request", (), {"url": url, "resource_type": resource_type})()
+
+            async def abort(self):
+                decisions[self.request.url] = "abort"
+
+            async def continue_(self):
+                decisions[self.request.url] = "continue"
+
+        async def work(page):
+            return "ok"
+
+        self.pool.run(work)
+        profile = {"resource_types": {"image", "font"}, "trackers": True}
+        for url, kind in [("https://shop.ua/", "document"), ("https://shop.ua/a.png", "image"),
+                          ("https://www.google-analytics.com/g.js", "script"), ("https://shop.ua/app.js", "script")]:
+            asyncio.run(self.pool._filter(FakeRoute(url, kind), profile))
+        self.assertEqual(decisions, {
+            "https://shop.ua/": "continue", "https://shop.ua/a.png": "abort",
+            "https://www.google-analytics.com/g.js": "abort", "https://shop.ua/app.js": "continue"
+        })
+        self.assertEqual(self.pool.stats()["blocked_requests"], 2)
+
+    def test_page_sizes_are_recorded(self):
+        class FakeRequest:
+            async def sizes(self):
+                return {"responseBodySize": 1000, "responseHeadersSize": 200}
+
+        async def work(page):
+            page.handlers["requestfinished"](FakeRequest())
+            page.handlers["requestfinished"](FakeRequest())
+            return "ok"
+
+        self.pool.run(work)
+        stats = self.pool.stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["avg_page_bytes"], 2400)
+
+    def test_shutdown_closes_browser(self):
+        async def work(page):
+            return "ok"
+
+        self.pool.run(work)
+        self.pool.shutdown()
+        self.assertTrue(self.playwright.stopped)
+        self.assertFalse(self.playwright.browsers[0].connected)
+        with self.assertRaises(RuntimeError):
+            self.pool.run(work)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.context_cache import ContextCache
+from test_ai_handler import make_handler
+
+class TestContextCache(unittest.TestCase):
+
+    def test_local_stand_in_prepends_block(self):
+        cache = ContextCache("gemini-2.5-flash", remote=False)
+        handle = cache.register("tov", "Tone of Voice: дружній")
+        self.assertFalse(handle.is_remote)
+        self.assertEqual(handle.apply("Write."), "Tone of Voice: дружній\n\nWrite.")
+
+    def test_identical_blocks_are_registered_once(self):
+        cache = ContextCache("gemini-2.5-flash", remote=False)
+        first = cache.register("tov", "block")
+        second = cache.register("tov", "block")
+        self.assertIs(first, second)
+        self.assertEqual(cache.stats()["created"], 1)
+        self.assertEqual(cache.stats()["reused"], 1)
+
+    @patch("utils.context_cache.genai")
+    def test_remote_only_above_min_tokens(self, mock_genai):
+        cache = ContextCache("gemini-2.5-flash")
+        self.assertFalse(cache.register("small", "short block").is_remote)
+        handle = cache.register("pages", "url,title,h1\n" * 2000)
+        self.assertTrue(handle.is_remote)
+        mock_genai.caching.CachedContent.create.assert_called_once()
+        self.assertEqual(handle.apply("Write."), "Write.")
+
+    @patch("utils.context_cache.genai")
+    def test_remote_failure_falls_back_to_local(self, mock_genai):
+        mock_genai.caching.CachedContent.create.side_effect = Exception("400 caching not supported")
+        cache = ContextCache("gemini-2.5-flash")
+        self.assertFalse(cache.register("pages", "x" * 10000).is_remote)
+
+    @patch("utils.context_cache.genai")
+    def test_least_recently_used_block_is_dropped_and_deleted(self, mock_genai):
+        mock_genai.caching.CachedContent.create.side_effect = lambda **kwargs: MagicMock()
+        cache = ContextCache("gemini-2.5-flash", max_handles=2)
+        first = cache.register("a", "a," * 10000)
+        second = cache.register("b", "b," * 10000)
+        cache.register("a", "a," * 10000)
+        cache.register("c", "c," * 10000)
+        self.assertEqual(cache.stats()["blocks"], 2)
+        second.cached_content.delete.assert_called_once()
+        first.cached_content.delete.assert_not_called()
+        self.assertIs(cache.register("a", "a," * 10000), first)
+
+    @patch("utils.context_cache.genai")
+    def test_expired_blocks_are_dropped_and_deleted(self, mock_genai):
+        mock_genai.caching.CachedContent.create.side_effect = lambda **kwargs: MagicMock()
+        cache = ContextCache("gemini-2.5-flash")
+        stale = cache.register("a", "a," * 10000)
+        stale.expires_at = 0
+        cache.register("b", "short block")
+        self.assertEqual(cache.stats()["blocks"], 1)
+        stale.cached_content.delete.assert_called_once()
+        fresh = cache.register("a", "a," * 10000)
+        self.assertIsNot(fresh, stale)
+        self.assertEqual(mock_genai.caching.CachedContent.create.call_count, 2)
+
+class TestAIHandlerContext(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = make_handler(self.tmp.name)
+        self.handler.context_cache = ContextCache("gemini-2.5-flash", remote=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_local_context_is_sent_as_prefix(self):
+        context = self.handler.register_context("tov", "BRAND")
+        self.handler.generate_content("Write.", context=context)
+        self.handler.model.generate_content.assert_called_with("BRAND\n\nWrite.")
+
+    def test_remote_context_uses_cached_model(self):
+        context = self.handler.register_context("tov", "BRAND")
+        context.cached_content = MagicMock()
+        cached_model = MagicMock()
+        cached_model.generate_content.return_value = MagicMock(text="ok")
+        context._model = cached_model
+        self.assertEqual(self.handler.generate_content("Write.", context=context).text, "ok")
+        cached_model.generate_content.assert_called_with("Write.")
+        self.handler.model.generate_content.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,398 @@
+import unittest
+import gzip
+from unittest.mock import patch
+import tempfile
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.crawler import crawl_pages
+from utils.http_cache import HttpCache
+from utils.crawl_state import CrawlState
+from utils.sitemap_parser import ingest_sitemap, iter_sitemap, parse_sitemap, refresh_sitemap, SitemapEntry, SitemapReport
+
+PAGE_COUNT = 20
+PAGE_DELAY = 0.2
+CHILD_COUNT = 6
+CHILD_DELAY = 0.3
+# /heavy{i}: title + H1 up front, then HEAVY_CHUNKS slow chunks of product listing
+HEAVY_CHUNKS = 10
+HEAVY_CHUNK = ("<div class='product'>Борошно пшеничне</div>" * 1200).encode("cp1251")
+NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+def sitemapindex(base, paths):
+    return (f'<sitemapindex xmlns="{NS}">' + "".join(
+        f"<sitemap><loc>{base}{path}</loc></sitemap>" for path in paths) + "</sitemapindex>").encode("utf-8")
+
+def urlset(base, numbers):
+    return (f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{NS}">' + "".join(
+        f"<url><loc>{base}/p{i}</loc><lastmod>2025-01-0{i % 9 + 1}</lastmod><priority>0.8</priority></url>"
+        for i in numbers) + "</urlset>").encode("utf-8")
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = set()
+    # /live.xml lists /v{i} with these lastmods; page bodies (and ETags) follow versions
+    live = {}
+    versions = {}
+    page_hits = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        _Handler.connections.add(self.client_address)
+        base = f"http://{self.headers['Host']}"
+        if self.path in ("/sitemap.xml", "/sitemap.xml.gz"):
+            body = urlset(base, range(PAGE_COUNT))
+            if self.path.endswith(".gz"):
+                body = gzip.compress(body)
+            content_type = "application/xml"
+        elif self.path == "/index.xml":
+            body = sitemapindex(base, ["/sitemap.xml.gz", "/index.xml"])
+            content_type = "application/xml"
+        elif self.path == "/shop.xml":
+            # Category sitemaps, one missing, one listing the index again
+            body = sitemapindex(base, [f"/cat{i}.xml" for i in range(CHILD_COUNT)] + ["/gone.xml", "/shop.xml"])
+            content_type = "application/xml"
+        elif self.path.startswith("/cat"):
+            time.sleep(CHILD_DELAY)
+            i = int(self.path[4:-4])
+            body = urlset(base, range(i * 10, i * 10 + 10))
+            content_type = "application/xml"
+        elif self.path in ("/live.xml", "/live-index.xml"):
+            if self.path == "/live-index.xml":
+                body = sitemapindex(base, ["/live.xml", "/gone.xml"])
+            else:
+                body = (f'<urlset xmlns="{NS}">' + "".join(
+                    f"<url><loc>{base}/v{i}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>"
+                    for i, lastmod in _Handler.live.items()) + "</urlset>").encode("utf-8")
+            content_type = "application/xml"
+        elif self.path == "/meta-cp1251":
+            # Charset only in <meta>, none in the header
+            body = ('<html><head><meta charset="windows-1251"><title>Млин</title></head>'
+                    '<body><h1>Борошно</h1></body></html>').encode("cp1251")
+            content_type = "text/html"
+        elif self.path in ("/heavy-sitemap.xml", "/bare-sitemap.xml"):
+            body = (f'<urlset xmlns="{NS}">' + "".join(
+                f"<url><loc>{base}/{self.path[1:].split('-')[0]}{i}</loc></url>" for i in range(PAGE_COUNT)) + "</urlset>").encode("utf-8")
+            content_type = "application/xml"
+        elif self.path.startswith(("/heavy", "/bare", "/no-h1")):
+            # /bare{i}: a heavy page without validators
+            etag = None if self.path.startswith("/bare") else '"h1"'
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            head = (f"<html><head><title>Каталог {self.path}</title></head><body>"
+                    + ("" if self.path.startswith("/no-h1") else "<h1>Борошно</h1>")).encode("cp1251")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=windows-1251")
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(head) + HEAVY_CHUNKS * len(HEAVY_CHUNK)))
+            self.end_headers()
+            try:
+                self.wfile.write(head)
+                for _ in range(HEAVY_CHUNKS):
+                    time.sleep(0.03)
+                    self.wfile.write(HEAVY_CHUNK)
+            except (BrokenPipeError, ConnectionResetError):
+                # The crawler hung up after the H1
+                self.close_connection = True
+            return
+        elif self.path.startswith("/v"):
+            i = int(self.path[2:])
+            etag = f'"{_Handler.versions[i]}"'
+            _Handler.page_hits.append((i, self.headers.get("If-None-Match")))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = f"<html><title>Сторінка {i}</title><h1>Версія {_Handler.versions[i]}</h1></html>".encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        elif self.path.startswith("/level"):
+            # /level0.xml -> /level1.xml -> ... each one index deeper
+            depth = int(self.path[6:-4])
+            body = sitemapindex(base, [f"/level{depth + 1}.xml", "/sitemap.xml"])
+            content_type = "application/xml"
+        elif self.path.startswith("/p"):
+            time.sleep(PAGE_DELAY)
+            body = f"<html><head><title>Сторінка {self.path[2:]}</title></head><body><h1>Товар {self.path[2:]}</h1></body></html>".encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 64  # the default backlog of 5 drops concurrent connects
+
+class TestCrawler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _Server(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        _Handler.connections = set()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = HttpCache(self.tmp.name)
+
+    def test_pages_crawled_concurrently_on_pooled_connections(self):
+        urls = [f"{self.base}/p{i}" for i in range(PAGE_COUNT)]
+        started = time.monotonic()
+        records, stats = crawl_pages(urls, concurrency=10, cache=self.cache)
+        self.assertLess(time.monotonic() - started, PAGE_COUNT * PAGE_DELAY / 4)
+        self.assertEqual([r["url"] for r in records], urls)
+        self.assertEqual({k: records[3][k] for k in ("url", "title", "h1")},
+                         {"url": urls[3], "title": "Сторінка 3", "h1": "Товар 3"})
+        self.assertEqual(len(records[3]["content_hash"]), 40)
+        self.assertLessEqual(len(_Handler.connections), 10)
+        self.assertEqual((stats["ok"], stats["failed"]), (PAGE_COUNT, 0))
+        self.assertGreater(stats["pages_per_sec"], 0)
+
+    def test_download_stops_after_h1(self):
+        urls = [f"{self.base}/heavy{i}" for i in range(4)]
+        records, stats = crawl_pages(urls, cache=self.cache)
+        self.assertEqual(records[0]["title"], "Каталог /heavy0")
+        self.assertEqual(records[0]["h1"], "Борошно")
+        self.assertEqual(stats["partial"], 4)
+
+        full_cache = HttpCache(os.path.join(self.tmp.name, "full"))
+        full_records, full_stats = crawl_pages(urls, cache=full_cache, partial=False)
+        self.assertEqual([(r["title"], r["h1"]) for r in full_records], [(r["title"], r["h1"]) for r in records])
+        self.assertLess(stats["bytes"], full_stats["bytes"] / 4)
+        self.assertLess(stats["avg_latency_ms"], full_stats["avg_latency_ms"] / 2)
+
+        # Cut-short bodies are not cached
+        _, again = crawl_pages(urls, cache=self.cache)
+        self.assertEqual(again["from_cache"], 0)
+
+    def test_unchanged_heavy_pages_stay_unchanged_on_refresh(self):
+        state = CrawlState(os.path.join(self.tmp.name, "crawl_state.json"))
+        with patch("utils.sitemap_parser.get_http_cache", return_value=self.cache), \
+             patch("utils.crawler.get_http_cache", return_value=self.cache):
+            first = refresh_sitemap(f"{self.base}/heavy-sitemap.xml", state)
+            self.assertEqual((first["counts"]["new"], first["crawl_stats"]["partial"]), (PAGE_COUNT, PAGE_COUNT))
+            self.assertIsNone(state.get(f"{self.base}/heavy0")["content_hash"])
+            # Cut-short pages are revalidated with the ETag kept in state
+            second = refresh_sitemap(f"{self.base}/heavy-sitemap.xml", state)
+            self.assertEqual((second["counts"]["unchanged"], second["counts"]["changed"]), (PAGE_COUNT, 0))
+            self.assertEqual(second["crawl_stats"]["bytes"], 0)
+            self.assertTrue(second["changed"].empty)
+
+            # Without validators the heads are read again, but title/H1 decide
+            refresh_sitemap(f"{self.base}/bare-sitemap.xml", state)
+            third = refresh_sitemap(f"{self.base}/bare-sitemap.xml", state)
+            self.assertEqual((third["counts"]["unchanged"], third["counts"]["changed"]), (PAGE_COUNT, 0))
+
+    def test_page_without_h1_read_in_full(self):
+        records, stats = crawl_pages([f"{self.base}/no-h1"], cache=self.cache)
+        self.assertEqual((records[0]["title"], records[0]["h1"]), ("Каталог /no-h1", "Каталог /no-h1"))
+        self.assertEqual(stats["partial"], 0)
+        self.assertEqual(stats["bytes"], len(self.cache.lookup(f"{self.base}/no-h1", ttl=60).content))
+
+    def test_meta_charset_page_decoded(self):
+        url = f"{self.base}/meta-cp1251"
+        for partial in (True, False, True):
+            # Third run is served from the cache
+            records, _ = crawl_pages([url], cache=self.cache, partial=partial)
+            self.assertEqual((records[0]["title"], records[0]["h1"]), ("Млин", "Борошно"))
+        self.assertIn("Борошно", self.cache.lookup(url, ttl=60).text)
+
+    def test_failures_counted_and_cached_pages_skip_network(self):
+        urls = [f"{self.base}/p0", f"{self.base}/missing", "http://127.0.0.1:1/closed"]
+        records, stats = crawl_pages(urls, cache=self.cache)
+        self.assertEqual([r["url"] for r in records], urls[:1])
+        self.assertEqual(stats["failed"], 2)
+
+        seen = []
+        _, stats = crawl_pages(urls[:1], cache=self.cache, on_progress=lambda s: seen.append(s.done))
+        self.assertEqual(stats["from_cache"], 1)
+        self.assertEqual(seen, [1])
+
+    def test_ingest_sitemap_reports_throughput(self):
+        with patch("utils.sitemap_parser.get_http_cache", return_value=self.cache), \
+             patch("utils.crawler.get_http_cache", return_value=self.cache):
+            df = ingest_sitemap(f"{self.base}/sitemap.xml", max_pages=5)
+        self.assertEqual(len(df), 5)
+        self.assertEqual(list(df.columns), ["url", "title", "h1"])
+        self.assertEqual(df.attrs["crawl_stats"]["done"], 5)
+
+    def test_gzipped_index_streamed_with_cycle_skipped(self):
+        entries = list(iter_sitemap(f"{self.base}/index.xml", http_cache=self.cache))
+        self.assertEqual(len(entries), PAGE_COUNT)
+        self.assertEqual(entries[1], SitemapEntry(f"{self.base}/p1", "2025-01-02", None, "0.8"))
+
+    def test_index_children_fetched_concurrently_with_report(self):
+        report = SitemapReport()
+        started = time.monotonic()
+        entries = list(iter_sitemap(f"{self.base}/shop.xml", http_cache=self.cache, report=report))
+        self.assertLess(time.monotonic() - started, CHILD_COUNT * CHILD_DELAY / 2)
+        self.assertEqual(sorted(e.loc for e in entries), sorted(f"{self.base}/p{i}" for i in range(CHILD_COUNT * 10)))
+
+        summary = report.as_dict()
+        self.assertEqual((summary["sitemaps"], summary["pages"], summary["errors"]), (CHILD_COUNT + 2, CHILD_COUNT * 10, 1))
+        index = summary["indexes"][f"{self.base}/shop.xml"]
+        self.assertEqual(index["children"], CHILD_COUNT + 2)
+        self.assertEqual(list(index["failed"]), [f"{self.base}/gone.xml"])
+        self.assertIn("404", index["failed"][f"{self.base}/gone.xml"])
+
+    def test_nested_indexes_stop_at_depth_limit(self):
+        report = SitemapReport()
+        entries = list(iter_sitemap(f"{self.base}/level0.xml", http_cache=self.cache, max_depth=2, report=report))
+        self.assertEqual(len(entries), PAGE_COUNT)
+        self.assertIsNone(report.sitemaps[f"{self.base}/level2.xml"]["error"])
+        self.assertIn("deeper than 2", report.errors()[f"{self.base}/level3.xml"])
+        self.assertNotIn(f"{self.base}/level4.xml", report.sitemaps)
+
+    def test_early_stop_releases_sitemap_readers(self):
+        entries = iter_sitemap(f"{self.base}/shop.xml", http_cache=self.cache)
+        next(entries)
+        entries.close()
+        time.sleep(CHILD_DELAY + 0.5)
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith("sitemap-reader")])
+
+    def test_incremental_refresh_fetches_only_changes(self):
+        _Handler.live = {0: "2025-01-01", 1: "2025-01-01", 2: "2025-01-01", 3: None}
+        _Handler.versions = {i: "a" for i in range(5)}
+        _Handler.page_hits = []
+        state = CrawlState(os.path.join(self.tmp.name, "crawl_state.json"))
+        sitemap = f"{self.base}/live.xml"
+
+        with patch("utils.sitemap_parser.get_http_cache", return_value=self.cache), \
+             patch("utils.crawler.get_http_cache", return_value=self.cache):
+            first = refresh_sitemap(sitemap, state)
+            self.assertEqual((first["counts"]["new"], len(first["changed"]), len(_Handler.page_hits)), (4, 4, 4))
+            state.save()
+
+            # Nothing changed: lastmod pages skipped, the one without lastmod revalidated (304)
+            _Handler.page_hits = []
+            state = CrawlState(state.path)
+            second = refresh_sitemap(sitemap, state)
+            self.assertEqual(_Handler.page_hits, [(3, '"a"')])
+            self.assertEqual((second["counts"]["skipped"], second["counts"]["unchanged"]), (3, 1))
+            self.assertTrue(second["changed"].empty)
+
+            # /v1 updated, /v2 dropped, /v4 added
+            _Handler.page_hits = []
+            _Handler.versions[1] = "b"
+            _Handler.live = {0: "2025-01-01", 1: "2025-02-01", 3: None, 4: "2025-02-01"}
+            third = refresh_sitemap(sitemap, state)
+            self.assertEqual(sorted(i for i, _ in _Handler.page_hits), [1, 3, 4])
+            self.assertEqual(sorted(third["changed"]["url"]), [f"{self.base}/v1", f"{self.base}/v4"])
+            self.assertEqual(third["changed"].set_index("url").loc[f"{self.base}/v1", "h1"], "Версія b")
+            self.assertEqual(third["removed"], [f"{self.base}/v2"])
+            self.assertEqual(sorted(third["pages"]["url"]), [f"{self.base}/v{i}" for i in (0, 1, 3, 4)])
+
+            # A sitemap file that failed to load never deletes pages
+            _Handler.live = {0: "2025-01-01"}
+            fourth = refresh_sitemap(f"{self.base}/live-index.xml", state)
+            self.assertEqual((fourth["removed"], len(state)), ([], 4))
+
+    def test_stored_validators_revalidate_after_cache_eviction(self):
+        _Handler.live = {0: None, 1: None}
+        _Handler.versions = {0: "a", 1: "a"}
+        state = CrawlState(os.path.join(self.tmp.name, "crawl_state.json"))
+        with patch("utils.sitemap_parser.get_http_cache", return_value=self.cache), \
+             patch("utils.crawler.get_http_cache", return_value=self.cache):
+            refresh_sitemap(f"{self.base}/live.xml", state)
+            self.cache.clear()
+            _Handler.page_hits = []
+            _Handler.versions[1] = "b"
+            result = refresh_sitemap(f"{self.base}/live.xml", state)
+        self.assertEqual(sorted(_Handler.page_hits), [(0, '"a"'), (1, '"a"')])
+        self.assertEqual((result["counts"]["unchanged"], result["counts"]["changed"]), (1, 1))
+        self.assertEqual(list(result["changed"]["url"]), [f"{self.base}/v1"])
+        self.assertEqual(state.get(f"{self.base}/v0")["h1"], "Версія a")
+        self.assertEqual(state.get(f"{self.base}/v1")["etag"], '"b"')
+
+    def test_records_parsed_incrementally(self):
+        body = gzip.compress(urlset("https://shop.ua", range(5000)))
+        chunks = [body[i:i + 1024] for i in range(0, len(body), 1024)]
+        fed = []
+
+        def feed():
+            for chunk in chunks:
+                fed.append(chunk)
+                yield chunk
+
+        records = parse_sitemap(feed())
+        kind, first = next(records)
+        self.assertEqual((kind, first.loc), ("url", "https://shop.ua/p0"))
+        self.assertLess(len(fed), len(chunks))
+        self.assertEqual(sum(1 for _ in records), 4999)
+
+    def test_failing_callback_ends_crawl(self):
+        produced = []
+
+        def urls():
+            for i in range(2000):
+                produced.append(i)
+                yield f"{self.base}/p{i % PAGE_COUNT}"
+
+        def on_progress(stats):
+            if stats.done == 3:
+                raise RuntimeError("progress bar gone")
+
+        outcome = []
+
+        def run():
+            try:
+                crawl_pages(urls(), concurrency=4, cache=self.cache, on_progress=on_progress)
+            except RuntimeError as e:
+                outcome.append(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(str(outcome[0]), "progress bar gone")
+        self.assertLess(len(produced), 2000)
+
+    def test_crawl_starts_while_urls_are_still_produced(self):
+        produced_all = []
+        first_page_done = []
+
+        def slow_urls():
+            for i in range(5):
+                yield f"{self.base}/p{i}"
+                time.sleep(0.3)
+            produced_all.append(time.monotonic())
+
+        records, _ = crawl_pages(slow_urls(), cache=self.cache,
+                                 on_progress=lambda s: first_page_done.append(time.monotonic()))
+        self.assertEqual(len(records), 5)
+        self.assertLess(first_page_done[0], produced_all[0])
+
+if __name__ == '__main__':
+    unittest.main()
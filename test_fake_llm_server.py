@@ -0,0 +1,45 @@
+import unittest
+import tempfile
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.fake_llm_server import start_fake_server
+from utils.rate_limiter import RateLimiter
+from utils.structured_output import SCHEMAS, matches_schema
+from utils.ai_handler import AIHandler, RestBackend, APIError
+
+class TestFakeServerBackend(unittest.TestCase):
+
+    def _handler(self, **config):
+        server, base_url = start_fake_server(latency=0, jitter=0, chunk_delay=0, seed=1, **config)
+        self.addCleanup(server.shutdown)
+        handler = AIHandler("fake-key", use_cache=False, backend=RestBackend(base_url))
+        handler.limiter = RateLimiter(rpm=10_000, tpm=10**9)
+        return handler, server
+
+    def test_schema_valid_json(self):
+        handler, _ = self._handler()
+        outline = handler.generate_json("Create an outline", SCHEMAS["outline"], fallback=None)
+        self.assertIsNotNone(outline)
+        self.assertTrue(matches_schema(outline, SCHEMAS["outline"]))
+
+    def test_streaming_chunks(self):
+        handler, _ = self._handler(stream_chunks=5)
+        chunks = list(handler.stream_content("Write an article"))
+        self.assertGreaterEqual(len(chunks), 5)
+        self.assertIn("## ", "".join(chunks))
+
+    def test_injected_errors(self):
+        handler, server = self._handler(rate_429=1.0)
+        with self.assertRaises(Exception) as ctx:
+            handler.model.generate_content("p")
+        error = handler._classify_error(ctx.exception)
+        self.assertIsInstance(error, APIError)
+        self.assertGreater(handler.limiter.metrics()["paused_for"], 0)  # Retry-After honored
+        self.assertEqual(server.RequestHandlerClass.config.errors, 1)
+
+if __name__ == '__main__':
+    unittest.main()
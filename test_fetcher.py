@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import MagicMock
+import tempfile
+import threading
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.fetcher import Fetcher, has_signals
+from utils.http_cache import HttpCache
+
+PAGES = {
+    "/static": "<html><body><h1>Пресовані дріжджі</h1><h2>Як зберігати</h2><p>" + "Текст статті. " * 60 + "</p></body></html>",
+    "/shell": '<html><body><div id="root"></div><script src="/app.js"></script></body></html>',
+}
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = PAGES.get(self.path.split("?")[0], "").encode("utf-8")
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestFetcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = MagicMock()
+        self.pool.page_html.return_value = "<html><body><h1>Rendered</h1></body></html>"
+        self.cache = HttpCache(os.path.join(self.tmp.name, "http"))
+        self.fetcher = Fetcher(
+            browser_pool=self.pool, tiers_path=os.path.join(self.tmp.name, "tiers.json"), http_cache=self.cache
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_static_page_served_over_http(self):
+        result = self.fetcher.fetch(f"{self.base}/static", "headings")
+        self.assertEqual(result.tier, "http")
+        self.assertIn("Пресовані дріжджі", result.text)
+        self.pool.page_html.assert_not_called()
+
+    def test_js_shell_escalates_and_domain_is_remembered(self):
+        result = self.fetcher.fetch(f"{self.base}/shell", "headings")
+        self.assertEqual(result.tier, "browser")
+        self.assertEqual(self.fetcher.stats()["escalations"], 1)
+
+        # A fresh fetcher (next process) skips the HTTP attempt for this domain
+        fetcher = Fetcher(browser_pool=self.pool, tiers_path=self.fetcher.tiers_path, http_cache=self.cache)
+        fetcher._http_get = MagicMock()
+        self.assertEqual(fetcher.fetch(f"{self.base}/static", "headings").tier, "browser")
+        fetcher._http_get.assert_not_called()
+
+    def test_browser_failure_falls_back_to_static_html(self):
+        self.pool.page_html.side_effect = Exception("browser missing")
+        result = self.fetcher.fetch(f"{self.base}/shell", "text")
+        self.assertEqual(result.tier, "http")
+
+    def test_stats_report_share_per_tier(self):
+        self.fetcher.fetch(f"{self.base}/static", "text")
+        self.fetcher.fetch(f"{self.base}/static", "text")
+        stats = self.fetcher.stats()
+        self.assertEqual(stats["served"], {"http": 2, "browser": 0})
+        self.assertEqual(stats["share"]["http"], 1.0)
+
+    def test_signals(self):
+        self.assertTrue(has_signals(PAGES["/static"], "headings"))
+        self.assertTrue(has_signals(PAGES["/static"], "text"))
+        self.assertFalse(has_signals(PAGES["/shell"], "text"))
+
+if __name__ == '__main__':
+    unittest.main()
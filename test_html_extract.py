@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+
+from bs4 import BeautifulSoup
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.html_extract import HtmlDoc, TitleH1Parser, title_and_h1
+from utils.seo_scorer import calculate_seo_score
+
+PAGE = """<html><head><title> Пресовані дріжджі | Shop </title>
+<style>.a{color:red}</style>
+<script type="application/ld+json">{"@context": "https://schema.org", "@graph": [{"@type": "Article"}, {"@type": "FAQPage"}]}</script>
+<script type="application/ld+json">{broken</script>
+</head><body><!-- banner -->
+<h1>Купити <span>дріжджі</span></h1>
+<p>Свіжі дріжджі<b>для</b> випічки.</p><script>var x = "hidden";</script><noscript>Enable JS</noscript>
+<h2>Як зберігати</h2><img src="/a.jpg" alt="Дріжджі"><img src="/b.jpg">
+<h3>У холодильнику</h3><p>До 12 днів.</p>
+</body></html>"""
+
+class TestHtmlExtract(unittest.TestCase):
+
+    def test_targeted_extractors(self):
+        doc = HtmlDoc(PAGE)
+        self.assertEqual(doc.title(), "Пресовані дріжджі | Shop")
+        self.assertEqual(doc.h1(), "Купити дріжджі")
+        self.assertEqual(doc.headings(("h2", "h3")), [("h2", "Як зберігати"), ("h3", "У холодильнику")])
+        self.assertEqual(doc.images(), [{"src": "/a.jpg", "alt": "Дріжджі"}, {"src": "/b.jpg", "alt": None}])
+        self.assertEqual([block["@type"] for block in doc.json_ld()], ["Article", "FAQPage"])
+
+    def test_visible_text_matches_beautifulsoup(self):
+        soup = BeautifulSoup(PAGE, "html.parser")
+        for tag in soup(["script", "style", "noscript", "template"]):
+            tag.decompose()
+        self.assertEqual(HtmlDoc(PAGE).text(), soup.body.get_text(separator=" ", strip=True))
+        self.assertNotIn("hidden", HtmlDoc(PAGE).text())
+
+    def test_streaming_title_and_h1(self):
+        self.assertEqual(title_and_h1(PAGE), ("Пресовані дріжджі | Shop", "Купити дріжджі"))
+        self.assertEqual(title_and_h1(PAGE.encode("utf-8")), ("Пресовані дріжджі | Shop", "Купити дріжджі"))
+        self.assertEqual(title_and_h1("<html><body><p>No headings</p></body></html>"), ("", ""))
+        self.assertEqual(title_and_h1(""), ("", ""))
+
+    def test_meta_charset_bytes(self):
+        raw = ('<html><head><meta http-equiv="Content-Type" content="text/html; charset=windows-1251">'
+               '<title>Борошно | Млин</title></head><body><h1>Борошно пшеничне</h1></body></html>').encode("cp1251")
+        self.assertEqual(HtmlDoc(raw).h1(), "Борошно пшеничне")
+        self.assertEqual(title_and_h1(raw), ("Борошно | Млин", "Борошно пшеничне"))
+        # A header charset wins over the page's own declaration
+        self.assertEqual(HtmlDoc(raw.decode("cp1251").encode("utf-8"), "utf-8").title(), "Борошно | Млин")
+
+        parser = TitleH1Parser()
+        for offset in range(0, len(raw), 10):
+            parser.feed(raw[offset:offset + 10])
+        self.assertEqual(parser.close(), ("Борошно | Млин", "Борошно пшеничне"))
+
+    def test_empty_and_fragment_documents(self):
+        self.assertEqual(HtmlDoc("").text(), "")
+        self.assertEqual(HtmlDoc("<h2>Фрагмент</h2><p>текст</p>").headings(), [("h2", "Фрагмент")])
+
+    def test_seo_score_reads(self):
+        result = calculate_seo_score(PAGE, ["дріжджі", "борошно"], None)
+        self.assertEqual(result["missing_keywords"], ["борошно"])
+        self.assertIn("1 images missing alt text.", result["feedback"])
+        self.assertNotIn("Document must have exactly one H1 tag.", result["feedback"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.http_cache import HttpCache
+
+BODY = ("<html><body><h1>Сторінка</h1>" + "<p>Текст статті.</p>" * 200 + "</body></html>").encode("utf-8")
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        _Handler.requests_seen.append(self.headers.get("If-None-Match"))
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+class TestHttpCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        _Handler.requests_seen = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fresh_entry_served_without_request(self):
+        first = self.cache.get(f"{self.base}/page", ttl=60)
+        second = self.cache.get(f"{self.base}/page", ttl=60)
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.content, BODY)
+        self.assertIn("Сторінка", second.text)
+        self.assertEqual(len(_Handler.requests_seen), 1)
+
+    def test_stale_entry_revalidated_with_etag(self):
+        self.cache.get(f"{self.base}/page", ttl=60)
+        response = self.cache.get(f"{self.base}/page", ttl=0)
+        self.assertTrue(response.revalidated)
+        self.assertEqual(response.content, BODY)
+        self.assertEqual(_Handler.requests_seen, [None, '"v1"'])
+        stats = self.cache.stats()
+        self.assertEqual((stats["misses"], stats["revalidated"]), (1, 1))
+        self.assertEqual(stats["bytes_downloaded"], len(BODY))
+
+    def test_stale_entry_served_when_server_unreachable(self):
+        self.cache.get(f"{self.base}/page", ttl=60)
+        with patch("requests.get", side_effect=requests.ConnectionError("down")):
+            response = self.cache.get(f"{self.base}/page", ttl=0)
+        self.assertEqual(response.content, BODY)
+        with patch("requests.get", side_effect=requests.ConnectionError("down")):
+            with self.assertRaises(requests.ConnectionError):
+                self.cache.get(f"{self.base}/other", ttl=0)
+
+    def test_errors_are_not_stored(self):
+        self.assertEqual(self.cache.get(f"{self.base}/missing", ttl=60).status_code, 404)
+        self.cache.get(f"{self.base}/missing", ttl=60)
+        self.assertEqual(len(_Handler.requests_seen), 2)
+
+    def test_stream_stores_then_replays_and_revalidates(self):
+        self.assertEqual(b"".join(self.cache.stream(f"{self.base}/page", ttl=60, chunk_size=1000)), BODY)
+        self.assertEqual(b"".join(self.cache.stream(f"{self.base}/page", ttl=60)), BODY)
+        self.assertEqual(b"".join(self.cache.stream(f"{self.base}/page", ttl=0)), BODY)
+        self.assertEqual(_Handler.requests_seen, [None, '"v1"'])
+        with self.assertRaises(requests.HTTPError):
+            list(self.cache.stream(f"{self.base}/missing", ttl=60))
+
+    def test_bodies_stored_compressed_and_evicted_lru(self):
+        self.cache.get(f"{self.base}/page", ttl=60)
+        self.assertLess(self.cache.stats()["bytes"], len(BODY) / 4)
+
+        cache = HttpCache(os.path.join(self.tmp.name, "small"), max_bytes=2500)
+        for i in range(3):
+            cache.store(f"https://shop.ua/{i}", os.urandom(1000))
+            time.sleep(0.01)
+        self.assertLessEqual(cache.stats()["bytes"], 2500)
+        self.assertIsNone(cache.lookup("https://shop.ua/0", ttl=60))
+        self.assertIsNotNone(cache.lookup("https://shop.ua/2", ttl=60))
+
+if __name__ == '__main__':
+    unittest.main()
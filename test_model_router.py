@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock
+import tempfile
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.model_router import ModelRouter
+from utils.rate_limiter import get_rate_limiter
+from test_ai_handler import make_handler
+
+def make_router(prefix):
+    return ModelRouter(tiers={"lite": f"{prefix}-lite", "fast": f"{prefix}-fast", "pro": f"{prefix}-pro"})
+
+class TestModelRouter(unittest.TestCase):
+
+    def test_light_tasks_go_to_lite_tier(self):
+        router = make_router("route")
+        candidates = router.candidates("classify")
+        self.assertEqual([name for name, _ in candidates], ["route-lite", "route-fast"])
+        self.assertEqual(candidates[0][1], {"max_output_tokens": 1024})
+        self.assertEqual(router.candidates("long_form")[0][0], "route-fast")
+
+    def test_paused_tier_is_tried_last(self):
+        router = make_router("paused")
+        get_rate_limiter("paused-lite").backoff(30)
+        self.assertEqual([name for name, _ in router.candidates("extract")], ["paused-fast", "paused-lite"])
+
+    def test_unknown_task_raises(self):
+        with self.assertRaises(ValueError):
+            make_router("x").candidates("poetry")
+
+    def test_stats_percentiles_and_slo_misses(self):
+        router = make_router("stats")
+        for seconds in [1, 2, 3, 4, 100]:
+            router.record("outline", "stats-fast", seconds)
+        router.record("outline", "stats-lite", 0, ok=False)
+        stats = router.stats()["outline"]
+        self.assertEqual(stats["count"], 5)
+        self.assertEqual(stats["p50"], 3)
+        self.assertEqual(stats["p95"], 100)
+        self.assertEqual(stats["slo_misses"], 1)
+        self.assertEqual(stats["models"]["stats-lite"]["failures"], 1)
+
+class TestAIHandlerRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = make_handler(self.tmp.name)
+        self.handler.router = make_router("handler")
+        self.lite = MagicMock()
+        self.fast = MagicMock()
+        self.fast.generate_content.return_value = MagicMock(text="fast answer")
+        self.handler._models.update({"handler-lite": self.lite, "handler-fast": self.fast})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_routed_call_uses_task_model_and_output_cap(self):
+        self.lite.generate_content.return_value = MagicMock(text="lite answer")
+        response = self.handler.generate_content("Classify.", task="classify")
+        self.assertEqual(response.text, "lite answer")
+        self.lite.generate_content.assert_called_once_with("Classify.", generation_config={"max_output_tokens": 1024})
+        self.handler.model.generate_content.assert_not_called()
+        self.assertEqual(self.handler.task_latency_stats()["classify"]["count"], 1)
+
+    def test_overloaded_tier_falls_back(self):
+        self.lite.generate_content.side_effect = Exception("503 The model is overloaded")
+        response = self.handler.generate_content("Extract.", task="extract")
+        self.assertEqual(response.text, "fast answer")
+        stats = self.handler.task_latency_stats()["extract"]["models"]
+        self.assertEqual(stats["handler-lite"]["failures"], 1)
+        self.assertEqual(stats["handler-fast"]["count"], 1)
+
+    def test_stream_rotates_tiers_before_first_chunk(self):
+        self.lite.generate_content.side_effect = Exception("503 The model is overloaded")
+        self.fast.generate_content.return_value = [MagicMock(text="a"), MagicMock(text="b")]
+        chunks = list(self.handler.stream_content("Write.", task="classify"))
+        self.assertEqual(chunks, ["a", "b"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.prompt_builder import PromptBuilder, max_prompt_tokens, TRUNCATED_MARKER
+from utils.rate_limiter import estimate_tokens
+
+class TestEstimateTokens(unittest.TestCase):
+
+    def test_cyrillic_counts_denser_than_latin(self):
+        self.assertGreater(estimate_tokens("Пресовані дріжджі" * 50), estimate_tokens("Pressed yeast abc" * 50))
+
+class TestPromptBuilder(unittest.TestCase):
+
+    def test_small_sections_pass_through(self):
+        builder = PromptBuilder(1000)
+        builder.add("site", "Короткий текст.", header="Сайт:\n")
+        prompt = builder.build(lambda s: f"Task.\n{s['site']}")
+        self.assertEqual(prompt, "Task.\nСайт:\nКороткий текст.")
+        self.assertEqual(builder.report["site"]["status"], "full")
+
+    def test_prompt_stays_under_ceiling(self):
+        builder = PromptBuilder(500)
+        builder.add("docs", "Речення про бренд. " * 400, priority=1)
+        builder.add("site", "Текст сайту тут. " * 400, priority=2)
+        prompt = builder.build(lambda s: f"Task.\n{s['docs']}\n{s['site']}")
+        self.assertLessEqual(estimate_tokens(prompt), 500)
+        # The lower-priority section is cut first
+        self.assertEqual(builder.report["site"]["status"], "dropped")
+        self.assertEqual(builder.report["docs"]["status"], "trimmed")
+        self.assertTrue(builder.fit()["docs"].endswith(TRUNCATED_MARKER))
+
+    def test_min_tokens_drops_instead_of_stub(self):
+        builder = PromptBuilder(300)
+        builder.add("docs", "a " * 400, priority=1)
+        builder.add("site", "b " * 400, priority=2, min_tokens=200)
+        fitted = builder.fit(fixed_tokens=50)
+        self.assertEqual(fitted["site"], "")
+        self.assertTrue(fitted["docs"])
+
+    def test_section_cap_and_line_mode(self):
+        csv = "\n".join(f"https://example.com/page-{i},Сторінка {i},H1 {i}" for i in range(1000))
+        builder = PromptBuilder(100_000)
+        builder.add("pages", csv, max_tokens=300, by_lines=True)
+        text = builder.fit()["pages"]
+        self.assertLessEqual(estimate_tokens(text), 300)
+        self.assertIn("рядків пропущено", text)
+        self.assertTrue(text.splitlines()[0].endswith("H1 0"))
+
+    def test_max_prompt_tokens_env_cap(self):
+        self.assertEqual(max_prompt_tokens("classify"), 2000)
+        with patch.dict(os.environ, {"SEO_MAX_PROMPT_TOKENS": "1500"}):
+            self.assertEqual(max_prompt_tokens("long_form"), 1500)
+
+    def test_invalid_max_prompt_tokens_env_is_ignored(self):
+        for value in ("8k", "", "0", "-100"):
+            with patch.dict(os.environ, {"SEO_MAX_PROMPT_TOKENS": value}), \
+                    patch("utils.prompt_builder._warned_overrides", set()):
+                with self.assertLogs("utils.prompt_builder", level="WARNING"):
+                    self.assertEqual(max_prompt_tokens("classify"), 2000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from unittest.mock import patch
+
+from utils.rate_limiter import RateLimiter, parse_retry_after, env_limits
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_requests_per_period(self):
+        limiter = RateLimiter(rpm=2, tpm=1_000_000, period=1.0)
+        self.assertLess(limiter.acquire(1), 0.05)
+        limiter.release(1)
+        limiter.acquire(1)
+        limiter.release(1)
+        waited = limiter.acquire(1)  # Third call must wait for refill (0.5s)
+        limiter.release(1)
+        self.assertGreater(waited, 0.3)
+
+    def test_tokens_per_period(self):
+        limiter = RateLimiter(rpm=100, tpm=1000, period=1.0)
+        limiter.acquire(1000)
+        limiter.release(1000)
+        waited = limiter.acquire(500)
+        limiter.release(500)
+        self.assertGreater(waited, 0.3)
+
+    def test_release_refunds_overestimate(self):
+        limiter = RateLimiter(rpm=100, tpm=1000, period=100.0)
+        limiter.acquire(1000)
+        limiter.release(1000, actual_tokens=100)
+        self.assertLess(limiter.acquire(800), 0.1)
+
+    def test_concurrency_cap_and_fifo(self):
+        limiter = RateLimiter(rpm=100, tpm=1_000_000, max_concurrency=1, period=1.0)
+        order = []
+        limiter.acquire(1)
+
+        def worker(i):
+            limiter.acquire(1)
+            order.append(i)
+            limiter.release(1)
+
+        threads = []
+        for i in range(3):
+            t = threading.Thread(target=worker, args=(i,))
+            t.start()
+            threads.append(t)
+            time.sleep(0.05)
+        self.assertEqual(limiter.metrics()["queue_depth"], 3)
+        limiter.release(1)
+        for t in threads:
+            t.join(timeout=2)
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_backoff_pauses_admission(self):
+        limiter = RateLimiter(rpm=100, tpm=1_000_000, period=1.0)
+        limiter.backoff(0.3)
+        waited = limiter.acquire(1)
+        limiter.release(1)
+        self.assertGreater(waited, 0.2)
+        self.assertEqual(limiter.metrics()["throttled"], 1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("429 Quota exceeded. Please retry in 37.5s."), 37.5)
+        self.assertEqual(parse_retry_after("retry_delay {\n  seconds: 12\n}"), 12.0)
+        self.assertIsNone(parse_retry_after("500 Internal error"))
+
+    def test_env_limits_per_model_and_global(self):
+        env = {"SEO_RPM_GEMINI_2_5_FLASH": "1000", "SEO_RPM": "300", "SEO_TPM": "oops"}
+        with patch.dict(os.environ, env):
+            self.assertEqual(env_limits("gemini-2.5-flash"), {"rpm": 1000})
+            self.assertEqual(env_limits("gemini-2.5-pro"), {"rpm": 300})
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(env_limits("gemini-2.5-flash"), {})
+
+if __name__ == '__main__':
+    unittest.main()
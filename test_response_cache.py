@@ -0,0 +1,49 @@
+import unittest
+import tempfile
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.response_cache import ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name, max_bytes=10_000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_depends_on_model_config_and_prompt(self):
+        base = ResponseCache.make_key("m", {"temperature": 0}, "prompt")
+        self.assertEqual(base, ResponseCache.make_key("m", {"temperature": 0}, "prompt"))
+        self.assertNotEqual(base, ResponseCache.make_key("m2", {"temperature": 0}, "prompt"))
+        self.assertNotEqual(base, ResponseCache.make_key("m", {"temperature": 1}, "prompt"))
+        self.assertNotEqual(base, ResponseCache.make_key("m", {"temperature": 0}, "prompt!"))
+
+    def test_hit_miss_and_ttl(self):
+        self.assertIsNone(self.cache.get("k", ttl=60))
+        self.cache.set("k", "Привіт")
+        self.assertEqual(self.cache.get("k", ttl=60), "Привіт")
+        self.assertIsNone(self.cache.get("k", ttl=-1))  # Expired entries are dropped
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_lru_eviction(self):
+        payload = "x" * 3000
+        for i in range(3):
+            self.cache.set(f"k{i}", payload)
+            time.sleep(0.01)
+        self.cache.get("k0", ttl=60)  # k0 becomes most recently used
+        self.cache.set("k3", payload)
+        self.assertIsNotNone(self.cache.get("k0", ttl=60))
+        self.assertIsNone(self.cache.get("k1", ttl=60))
+        self.assertLessEqual(self.cache.stats()["bytes"], 10_000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from agents.strategist import Strategist, SERP_INTENT_FALLBACK
+from utils.fetcher import FetchResult
+from utils.research_store import ResearchStore
+
+def make_strategist():
+    with patch("utils.ai_handler.genai"):
+        strategist = Strategist("fake-key")
+    strategist.browser_pool = MagicMock()
+    strategist.fetcher = MagicMock()
+    return strategist
+
+def slow_page(delays):
+    def fetch(url, signal="headings", timeout=15000, ttl=None):
+        delay = delays[url]
+        if delay is None:
+            raise Exception("net::ERR_CONNECTION_REFUSED")
+        time.sleep(delay)
+        return FetchResult(url, f"<h1>{url}</h1><h2>Section</h2>", "http")
+    return fetch
+
+class TestAnalyzeCompetitors(unittest.TestCase):
+
+    def test_pages_load_concurrently(self):
+        strategist = make_strategist()
+        delays = {f"https://site{i}.com": 0.3 for i in range(5)}
+        strategist.fetcher.fetch.side_effect = slow_page(delays)
+        started = time.monotonic()
+        outlines = strategist.analyze_competitors(list(delays))
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual([o["url"] for o in outlines], list(delays))
+        self.assertEqual(outlines[0]["structure"], ["H2: Section"])
+
+    def test_failed_url_falls_back_on_its_own(self):
+        strategist = make_strategist()
+        strategist.fetcher.fetch.side_effect = slow_page({"https://ok.com": 0, "https://bad.com": None})
+
+        def fallback(url, outlines):
+            outlines.append({"url": url, "h1": "No H1 (Requests)", "structure": []})
+
+        with patch.object(strategist, "_scrape_fallback", side_effect=fallback) as mock_fallback:
+            outlines = strategist.analyze_competitors(["https://ok.com", "https://bad.com"])
+        mock_fallback.assert_called_once()
+        self.assertEqual([o["h1"] for o in outlines], ["https://ok.com", "No H1 (Requests)"])
+
+    def test_deadline_returns_partial_results(self):
+        strategist = make_strategist()
+        strategist.fetcher.fetch.side_effect = slow_page({"https://fast.com": 0, "https://slow.com": 2})
+        started = time.monotonic()
+        outlines = strategist.analyze_competitors(["https://fast.com", "https://slow.com"], deadline=0.3)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual([o["url"] for o in outlines], ["https://fast.com"])
+
+class TestAnalyzeSerp(unittest.TestCase):
+
+    def make(self, google_delay, google_results):
+        strategist = make_strategist()
+
+        def google(topic):
+            time.sleep(google_delay)
+            return google_results
+
+        def intent(topic):
+            time.sleep(0.4)
+            return {"intent": "Інформаційний", "features": ["Сніпет"]}
+
+        strategist._serp_google = MagicMock(side_effect=google)
+        strategist._serp_ddg = MagicMock(return_value=[{"url": "https://ddg.com", "title": "DDG"}])
+        strategist._serp_intent = MagicMock(side_effect=intent)
+        return strategist
+
+    def test_intent_runs_alongside_google(self):
+        strategist = self.make(0.4, [{"url": "https://g.com", "title": "G"}])
+        started = time.monotonic()
+        result = strategist.analyze_serp("дріжджі")
+        self.assertLess(time.monotonic() - started, 0.7)
+        self.assertEqual(result, {
+            "topic": "дріжджі", "competitors": [{"url": "https://g.com", "title": "G"}],
+            "intent": "Інформаційний", "serp_features": ["Сніпет"], "intent_fallback": False
+        })
+        strategist._serp_ddg.assert_not_called()
+
+    def test_slow_google_is_hedged_with_duckduckgo(self):
+        strategist = self.make(1.5, [{"url": "https://g.com", "title": "G"}])
+        started = time.monotonic()
+        with patch("agents.strategist.SERP_HEDGE_DELAY", 0.2):
+            result = strategist.analyze_serp("дріжджі")
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(result["competitors"], [{"url": "https://ddg.com", "title": "DDG"}])
+
+    def test_empty_google_falls_back_immediately(self):
+        strategist = self.make(0, [])
+        self.assertEqual(strategist.analyze_serp("дріжджі")["competitors"][0]["title"], "DDG")
+
+class TestResearchTopics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ResearchStore(os.path.join(self.tmp.name, "Brand", "research.jsonl"))
+
+    def test_topics_run_concurrently_and_are_stored(self):
+        strategist = make_strategist()
+
+        def serp(topic):
+            time.sleep(0.3)
+            return {"topic": topic, "competitors": [{"url": "https://a.com"}], "intent": "Інформаційний"}
+
+        strategist.analyze_serp = MagicMock(side_effect=serp)
+        strategist.analyze_competitors = MagicMock(return_value=[{"url": "https://a.com", "h1": "A", "structure": []}])
+        progress = []
+        started = time.monotonic()
+        summary = strategist.research_topics(
+            [f"тема {i}" for i in range(4)], self.store, workers=4,
+            on_progress=lambda done, total, record: progress.append((done, total))
+        )
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(summary["done"], 4)
+        self.assertGreater(summary["topics_per_min"], 0)
+        self.assertEqual(progress[-1], (4, 4))
+        self.assertEqual(len(self.store.load()[0]["competitor_outlines"]), 1)
+
+    def test_rerun_resumes_and_retries_failures(self):
+        strategist = make_strategist()
+        strategist.analyze_serp = MagicMock(side_effect=lambda t: {"topic": t, "competitors": [{"url": "https://a.com"}]})
+        strategist.research_topics(["дріжджі", "борошно"], self.store, with_outlines=False)
+
+        strategist.analyze_serp = MagicMock(side_effect=Exception("503"))
+        self.store.append({"topic": "цукор", "error": "timeout"})
+        summary = strategist.research_topics(["дріжджі", "борошно", "цукор"], self.store, with_outlines=False)
+        strategist.analyze_serp.assert_called_once_with("цукор")
+        self.assertEqual((summary["skipped"], summary["failed"]), (2, 1))
+        self.assertEqual(self.store.done_topics(), {"дріжджі", "борошно"})
+
+    def test_degraded_serp_results_are_retried(self):
+        strategist = make_strategist()
+        strategist._serp_google = MagicMock(return_value=[])
+        strategist._serp_ddg = MagicMock(return_value=[])
+        strategist._serp_intent = MagicMock(return_value={"intent": "Інформаційний", "features": []})
+        strategist.analyze_competitors = MagicMock()
+        summary = strategist.research_topics(["дріжджі"], self.store)
+        self.assertEqual(summary["failed"], 1)
+        self.assertIn("No SERP results", self.store.load()[0]["error"])
+        strategist.analyze_competitors.assert_not_called()
+
+        # Results came back, but the intent call fell back - still not done
+        strategist._serp_google = MagicMock(return_value=[{"url": "https://g.com", "title": "G"}])
+        strategist._serp_intent = MagicMock(return_value=SERP_INTENT_FALLBACK)
+        summary = strategist.research_topics(["дріжджі"], self.store, with_outlines=False)
+        self.assertEqual((summary["skipped"], summary["failed"]), (0, 1))
+        self.assertEqual(self.store.done_topics(), set())
+
+if __name__ == '__main__':
+    unittest.main()
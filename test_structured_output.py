@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock
+import tempfile
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.structured_output import parse_json, matches_schema, json_generation_config, SCHEMAS
+from test_ai_handler import make_handler
+
+class TestParseJson(unittest.TestCase):
+
+    def test_fenced_and_prose_wrapped(self):
+        text = 'Ось результат:\n```json\n{"intent": "Інформаційний", "features": ["Відео"]}\n```\nСподіваюсь, допоможе!'
+        self.assertEqual(parse_json(text), {"intent": "Інформаційний", "features": ["Відео"]})
+
+    def test_trailing_commas(self):
+        self.assertEqual(parse_json('["a", "b",]'), ["a", "b"])
+        self.assertEqual(parse_json('{"a": [1, 2,], }'), {"a": [1, 2]})
+
+    def test_truncated_output(self):
+        text = '[{"keyword": "дріжджі", "type": "Head"}, {"keyword": "пресовані дріж'
+        self.assertEqual(parse_json(text), [{"keyword": "дріжджі", "type": "Head"}])
+        self.assertEqual(parse_json('{"intent": "Комерційний", "features": ["Відео", "Сні'), {"intent": "Комерційний", "features": ["Відео"]})
+
+    def test_unrepairable(self):
+        with self.assertRaises(ValueError):
+            parse_json("Вибачте, я не можу це зробити.")
+
+    def test_matches_schema(self):
+        self.assertTrue(matches_schema({"intent": "x", "features": []}, SCHEMAS["serp_intent"]))
+        self.assertFalse(matches_schema({"intent": "x"}, SCHEMAS["serp_intent"]))
+        self.assertFalse(matches_schema(["a", 1], SCHEMAS["string_list"]))
+
+    def test_json_mode_config(self):
+        self.assertEqual(json_generation_config("gemini-2.5-flash", SCHEMAS["string_list"])["response_mime_type"], "application/json")
+        self.assertIsNone(json_generation_config("gemini-pro", SCHEMAS["string_list"]))
+
+class TestGenerateJson(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = make_handler(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_local_repair_avoids_reask(self):
+        self.handler.model.generate_content.return_value = MagicMock(text='```json\n["a", "b",]\n```')
+        self.assertEqual(self.handler.generate_json("p", SCHEMAS["string_list"], fallback=[]), ["a", "b"])
+        self.assertEqual(self.handler.model.generate_content.call_count, 1)
+
+    def test_reask_when_repair_fails(self):
+        self.handler.model.generate_content.side_effect = [MagicMock(text="not json at all"), MagicMock(text='["fixed"]')]
+        self.assertEqual(self.handler.generate_json("p", SCHEMAS["string_list"], fallback=[]), ["fixed"])
+        self.assertEqual(self.handler.model.generate_content.call_count, 2)
+
+    def test_fallback(self):
+        self.handler.model.generate_content.return_value = MagicMock(text="nope")
+        self.assertEqual(self.handler.generate_json("p", SCHEMAS["string_list"], fallback=["x"]), ["x"])
+
+    def test_prose_regenerated_and_broken_json_repaired(self):
+        self.handler.model.generate_content.side_effect = [MagicMock(text="Вибачте, не можу."), MagicMock(text='["a"]')]
+        self.assertEqual(self.handler.generate_json("Список тем", SCHEMAS["string_list"], fallback=[]), ["a"])
+        self.assertIn("Список тем", str(self.handler.model.generate_content.call_args_list[1]))
+
+        self.handler.model.generate_content.side_effect = [MagicMock(text='["a", 1]'), MagicMock(text='["a", "1"]')]
+        self.assertEqual(self.handler.generate_json("Інші теми", SCHEMAS["string_list"], fallback=[]), ["a", "1"])
+        retry_prompt = str(self.handler.model.generate_content.call_args_list[3])
+        self.assertIn("could not be parsed", retry_prompt)
+        self.assertNotIn("Інші теми", retry_prompt)
+
+    def test_unusable_text_not_left_in_cache(self):
+        self.handler.model.generate_content.return_value = MagicMock(text="nope")
+        self.assertEqual(self.handler.generate_json("p", SCHEMAS["string_list"], fallback=["x"], cache_ttl=60), ["x"])
+        self.assertEqual(self.handler.cache.stats()["bytes"], 0)
+
+        # The next call generates fresh instead of re-reading the bad text
+        self.handler.model.generate_content.return_value = MagicMock(text='["ok"]')
+        self.assertEqual(self.handler.generate_json("p", SCHEMAS["string_list"], fallback=["x"], cache_ttl=60), ["ok"])
+        self.assertEqual(self.handler.model.generate_content.call_count, 3)
+        self.assertEqual(self.handler.generate_json("p", SCHEMAS["string_list"], fallback=["x"], cache_ttl=60), ["ok"])
+        self.assertEqual(self.handler.model.generate_content.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
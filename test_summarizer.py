@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock, PropertyMock
+import concurrent.futures
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.ai_handler import BatchResult
+from utils.model_router import MODEL_TIERS
+from utils.summarizer import Summarizer, split_chunks
+from test_ai_handler import make_handler
+
+def long_text(paragraphs=8, marker="Абзац"):
+    return "\n".join(f"{marker} {i}. " + "Дріжджі зберігають у холодильнику до двох тижнів. " * 40 for i in range(paragraphs))
+
+class FakeHandler:
+    """generate_many/generate_content stand-in that answers with the chunk's first line."""
+
+    def __init__(self, delay=0.0, fail_on=None, blocked_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.blocked_on = blocked_on
+        self.map_calls = 0
+        self.reduce_calls = 0
+        self._lock = threading.Lock()
+
+    def generate_many(self, prompts, max_concurrency=4, **kwargs):
+        def run(prompt):
+            time.sleep(self.delay)
+            with self._lock:
+                self.map_calls += 1
+            first_line = prompt.split("TEXT:\n", 1)[1].split(".")[0]
+            if self.fail_on and self.fail_on in first_line:
+                return BatchResult(error=Exception("503"))
+            if self.blocked_on and self.blocked_on in first_line:
+                blocked = MagicMock()
+                type(blocked).text = PropertyMock(side_effect=ValueError("finish_reason: SAFETY"))
+                return BatchResult(response=blocked)
+            return BatchResult(response=MagicMock(text=f"Нотатка: {first_line}"))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+            return list(executor.map(run, prompts))
+
+    def generate_content(self, prompt, **kwargs):
+        self.reduce_calls += 1
+        return MagicMock(text="Підсумок")
+
+class TestSummarizer(unittest.TestCase):
+
+    def test_chunks_cover_text_in_order(self):
+        text = long_text()
+        chunks = split_chunks(text, 1000)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("\n".join(chunks), text)
+
+    def test_short_text_passes_through(self):
+        handler = FakeHandler()
+        self.assertEqual(Summarizer(handler).condense("Короткий текст.", "тон", 500), "Короткий текст.")
+        self.assertEqual(handler.map_calls, 0)
+
+    def test_chunks_mapped_in_parallel_and_joined_in_order(self):
+        handler = FakeHandler(delay=0.3)
+        summarizer = Summarizer(handler, chunk_tokens=1000)
+        started = time.monotonic()
+        notes = summarizer.condense(long_text(), "тон", 2000)
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(notes.split("\n\n"), [f"Нотатка: Абзац {i}" for i in range(8)])
+        self.assertEqual(handler.reduce_calls, 0)
+
+    def test_failed_chunk_keeps_raw_opening(self):
+        summarizer = Summarizer(FakeHandler(fail_on="Абзац 3"), chunk_tokens=1000)
+        notes = summarizer.condense(long_text(), "тон", 2000).split("\n\n")
+        self.assertTrue(notes[3].startswith("Абзац 3. Дріжджі"))
+
+    def test_blocked_chunk_keeps_raw_opening(self):
+        summarizer = Summarizer(FakeHandler(blocked_on="Абзац 3"), chunk_tokens=1000)
+        notes = summarizer.condense(long_text(), "тон", 2000).split("\n\n")
+        self.assertTrue(notes[3].startswith("Абзац 3. Дріжджі"))
+        self.assertTrue(notes[4].startswith("Нотатка: Абзац 4"))
+
+    def test_reduce_runs_only_over_budget(self):
+        handler = FakeHandler()
+        self.assertEqual(Summarizer(handler, chunk_tokens=1000).condense(long_text(), "тон", 20), "Підсумок")
+        self.assertEqual(handler.reduce_calls, 1)
+
+    def test_chunk_results_cached_by_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            handler = make_handler(tmp)
+            handler._models.update({model: handler.model for model in MODEL_TIERS.values()})
+            summarizer = Summarizer(handler, chunk_tokens=1000)
+            summarizer.condense(long_text(), "тон", 2000)
+            first = handler.model.generate_content.call_count
+            summarizer.condense(long_text(), "тон", 2000)
+            self.assertEqual(handler.model.generate_content.call_count, first)
+
+            # One changed paragraph - only its chunk is summarized again
+            changed = long_text().replace("Абзац 7.", "Розділ 7.")
+            summarizer.condense(changed, "тон", 2000)
+            self.assertEqual(handler.model.generate_content.call_count, first + 1)
+
+if __name__ == '__main__':
+    unittest.main()
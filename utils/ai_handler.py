@@ -1,58 +1,580 @@
 import google.generativeai as genai
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import concurrent.futures
+import json
+import os
+import threading
 import time
+from types import SimpleNamespace
+
+import requests
+
+from utils.response_cache import ResponseCache, CachedResponse
+from utils.context_cache import get_context_cache
+from utils.model_router import get_model_router
+from utils.single_flight import SingleFlight, FileLock
+from utils.structured_output import parse_structured, has_json_payload, repair_prompt, json_generation_config
+from utils.rate_limiter import (
+    get_rate_limiter, parse_retry_after, estimate_tokens,
+    DEFAULT_BACKOFF_SECONDS, OUTPUT_TOKEN_RESERVE
+)
+
+# Per-call-site cache lifetimes (seconds)
+CACHE_TTL_HOUR = 60 * 60
+CACHE_TTL_DAY = 24 * CACHE_TTL_HOUR
+CACHE_TTL_WEEK = 7 * CACHE_TTL_DAY
+
+LOCK_DIR = ".cache/locks"
+# Cross-process locks are sharded by this many key hex chars (16**2 = 256 files at most),
+# so the lock directory never grows with the number of prompts
+LOCK_SHARD_CHARS = 2
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_response_cache(cache_dir=".cache/llm"):
+    """Returns the process-wide ResponseCache for cache_dir."""
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = ResponseCache(cache_dir)
+        return _caches[cache_dir]
+
+# Concurrent identical calls within this process share one in-flight request
+_single_flight = SingleFlight()
 
 class APIError(Exception):
     """Custom exception for API errors"""
     pass
 
+class RateLimitError(APIError):
+    """429 from the API. The shared rate limiter already paused for the retry hint."""
+    pass
+
+_backoff = wait_exponential(multiplier=1, min=4, max=10)
+
+def _retry_wait(retry_state):
+    """Rate-limit retries wait inside the limiter; everything else backs off exponentially."""
+    if isinstance(retry_state.outcome.exception(), RateLimitError):
+        return 0
+    return _backoff(retry_state)
+
+def _usage_tokens(response):
+    """Total tokens reported by the API for a response, or None."""
+    total = getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+    return total if isinstance(total, int) and total > 0 else None
+
+class BatchResult:
+    """Outcome of one prompt in AIHandler.generate_many()."""
+
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def text(self):
+        return self.response.text if self.ok else None
+
+class LLMBackend:
+    """
+    Interface between AIHandler and a model provider.
+
+    get_model() returns an object with the GenerativeModel calling
+    convention: generate_content(prompt, generation_config=None, stream=False)
+    returning a response with `.text` and `.usage_metadata` (or an iterable
+    of such chunks when stream=True).
+    """
+
+    # Whether ContextCache may create provider-side cached content
+    supports_cached_content = False
+
+    def get_model(self, model_name, generation_config=None):
+        raise NotImplementedError
+
+class GeminiBackend(LLMBackend):
+    """Google AI Studio via the google-generativeai SDK."""
+
+    supports_cached_content = True
+
+    def __init__(self, api_key):
+        genai.configure(api_key=api_key)
+
+    def get_model(self, model_name, generation_config=None):
+        return genai.GenerativeModel(model_name, generation_config=generation_config)
+
+class RestBackend(LLMBackend):
+    """
+    Speaks the Gemini REST protocol to any base URL.
+
+    Used with the bundled fake server (utils/fake_llm_server.py) for offline
+    load tests, but works against generativelanguage.googleapis.com too.
+    """
+
+    def __init__(self, base_url, api_key=None, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get_model(self, model_name, generation_config=None):
+        return _RestModel(self, model_name, generation_config)
+
+class _RestModel:
+    def __init__(self, backend, model_name, generation_config=None):
+        self.backend = backend
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        config = dict(self.generation_config or {}, **(generation_config or {}))
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if config:
+            body["generationConfig"] = _to_rest_config(config)
+
+        method = "streamGenerateContent" if stream else "generateContent"
+        url = f"{self.backend.base_url}/v1beta/models/{self.model_name}:{method}"
+        params = {"alt": "sse"} if stream else {}
+        if self.backend.api_key:
+            params["key"] = self.backend.api_key
+
+        response = self.backend.session.post(url, params=params, json=body, stream=stream, timeout=self.backend.timeout)
+        if response.status_code != 200:
+            retry_after = response.headers.get("Retry-After")
+            hint = f" Please retry in {retry_after}s." if retry_after else ""
+            raise Exception(f"{response.status_code} {response.text[:500]}{hint}")
+
+        if stream:
+            return _iter_sse(response)
+        return _RestResponse(response.json())
+
+class _RestResponse:
+    def __init__(self, payload):
+        parts = payload.get("candidates", [{}])[0].get("content", {}).get("parts", [])
+        self.text = "".join(part.get("text", "") for part in parts)
+        usage = payload.get("usageMetadata", {})
+        self.usage_metadata = SimpleNamespace(total_token_count=usage.get("totalTokenCount"))
+
+def _iter_sse(response):
+    with response:
+        for line in response.iter_lines(decode_unicode=True):
+            if line and line.startswith("data:"):
+                yield _RestResponse(json.loads(line[5:]))
+
+_REST_CONFIG_KEYS = {
+    "response_mime_type": "responseMimeType",
+    "response_schema": "responseSchema",
+    "max_output_tokens": "maxOutputTokens",
+    "temperature": "temperature",
+    "top_p": "topP",
+    "top_k": "topK",
+}
+
+def _to_rest_config(config):
+    rest = {}
+    for key, value in config.items():
+        if key == "response_schema":
+            value = _to_rest_schema(value)
+        rest[_REST_CONFIG_KEYS.get(key, key)] = value
+    return rest
+
+def _to_rest_schema(schema):
+    """REST expects upper-case type names."""
+    rest = dict(schema)
+    if isinstance(rest.get("type"), str):
+        rest["type"] = rest["type"].upper()
+    if "properties" in rest:
+        rest["properties"] = {name: _to_rest_schema(sub) for name, sub in rest["properties"].items()}
+    if "items" in rest:
+        rest["items"] = _to_rest_schema(rest["items"])
+    return rest
+
+def create_backend(api_key):
+    """
+    Backend selected by environment:
+    SEO_LLM_BACKEND=rest with SEO_LLM_BASE_URL=http://127.0.0.1:8765 targets a
+    REST endpoint (e.g. the fake server); anything else uses the Gemini SDK.
+    """
+    if os.getenv("SEO_LLM_BACKEND") == "rest":
+        return RestBackend(os.getenv("SEO_LLM_BASE_URL", "http://127.0.0.1:8765"), api_key)
+    return GeminiBackend(api_key)
+
 class AIHandler:
     """Centralized AI handler with retry logic and error handling."""
     
-    def __init__(self, api_key, model_name="gemini-2.5-flash"):
+    def __init__(self, api_key, model_name="gemini-2.5-flash", generation_config=None, use_cache=True, cross_process=None, backend=None):
         """
         Initialize the AI handler with API key and model.
         
         Args:
             api_key: Google AI API key
             model_name: Model to use (default: gemini-2.5-flash for higher rate limits)
+            generation_config: Optional generation config passed to the model
+            use_cache: Enable the on-disk response cache (SEO_CACHE_DISABLED=1 turns it off globally)
+            cross_process: Also deduplicate cached calls across worker processes via lock files
+                (default: SEO_SINGLE_FLIGHT_PROCESSES=1)
+            backend: LLMBackend to use (default: create_backend() from environment)
         """
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
+        self.backend = backend or create_backend(api_key)
+        self.model = self.backend.get_model(model_name, generation_config)
         self.model_name = model_name
+        self._models = {model_name: self.model}
+        self._models_lock = threading.Lock()
+        self.router = get_model_router()
+        self.generation_config = generation_config
+        self.cache = get_response_cache() if use_cache and not os.getenv("SEO_CACHE_DISABLED") else None
+        if cross_process is None:
+            cross_process = os.getenv("SEO_SINGLE_FLIGHT_PROCESSES") == "1"
+        self.cross_process = cross_process
+        self.limiter = get_rate_limiter(model_name)
+        self.context_cache = get_context_cache(model_name, remote=self.backend.supports_cached_content)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((APIError, Exception)),
-        reraise=True
-    )
-    def generate_content(self, prompt):
+    def register_context(self, name, text):
+        """
+        Registers a large static prompt block (ToV, site inventory) once per project.
+        
+        Args:
+            name: Display name of the block
+            text: Block content
+            
+        Returns:
+            ContextHandle to pass as `context=` to generation methods
         """
-        Generate content with automatic retry on rate limit or server errors.
+        return self.context_cache.register(name, text)
+
+    def generate_content(self, prompt, cache_ttl=None, bypass_cache=False, generation_config=None, context=None, task=None):
+        """
+        Generate content, serving repeated prompts from the response cache.
         
         Args:
             prompt: Text prompt for generation
+            cache_ttl: Cache lifetime in seconds for this call site (None = don't cache)
+            bypass_cache: Skip the cache lookup and refresh the stored entry
+            generation_config: Per-call generation config (e.g. JSON mode)
+            context: Optional ContextHandle from register_context()
+            task: Task type for the model router (see utils.model_router.TASK_ROUTES);
+                None = this handler's model
             
         Returns:
-            GenerateContentResponse object
+            GenerateContentResponse object (CachedResponse on cache hit)
             
         Raises:
             APIError: If all retries fail
         """
+        key = self._cache_key(prompt, generation_config, context, task)
+        if self.cache is None or cache_ttl is None:
+            return _single_flight.do(key, lambda: self._generate_routed(prompt, generation_config, context, task))
+
+        if not bypass_cache:
+            cached_text = self.cache.get(key, cache_ttl)
+            if cached_text is not None:
+                return CachedResponse(cached_text)
+
+        def generate_and_store():
+            if self.cross_process:
+                # Another worker may be generating the same prompt - wait for it, then re-check the cache
+                with FileLock(os.path.join(LOCK_DIR, f"{key[:LOCK_SHARD_CHARS]}.lock")):
+                    if not bypass_cache:
+                        cached_text = self.cache.get(key, cache_ttl)
+                        if cached_text is not None:
+                            return CachedResponse(cached_text)
+                    return self._generate_and_store(key, prompt, generation_config, context, task)
+            return self._generate_and_store(key, prompt, generation_config, context, task)
+
+        return _single_flight.do(key, generate_and_store)
+
+    def _generate_and_store(self, key, prompt, generation_config, context, task):
+        response = self._generate_routed(prompt, generation_config, context, task)
         try:
-            response = self.model.generate_content(prompt)
+            self.cache.set(key, response.text)
+        except Exception:
+            # Blocked/empty responses have no text - never cache them
+            pass
+        return response
+
+    def generate_json(self, prompt, schema, fallback=None, cache_ttl=None, context=None, task=None):
+        """
+        Generate structured output matching a JSON schema.
+        
+        Uses native JSON mode where the model supports it, repairs common
+        defects locally (fences, prose, trailing commas, truncation) and only
+        re-asks the model to fix the broken output when repair fails. A reply
+        with no JSON at all (a refusal, plain prose) is regenerated from the
+        prompt instead. Text that yields no valid value is never left cached.
+        
+        Args:
+            prompt: Text prompt for generation
+            schema: Response schema (see utils.structured_output.SCHEMAS)
+            fallback: Value returned if no valid JSON could be obtained
+            cache_ttl: Cache lifetime in seconds for this call site
+            context: Optional ContextHandle from register_context()
+            task: Task type for the model router
+            
+        Returns:
+            Parsed JSON value or fallback
+        """
+        config = json_generation_config(self.model_name, schema)
+        try:
+            text = self.generate_content(
+                prompt, cache_ttl=cache_ttl, generation_config=config, context=context, task=task
+            ).text
+        except Exception:
+            return fallback
+
+        value = parse_structured(text, schema)
+        if value is not None:
+            return value
+
+        try:
+            if has_json_payload(text):
+                # Broken or off-schema JSON - ask the model to fix what it wrote
+                retry_text = self._generate_routed(repair_prompt(text, schema), config, None, task).text
+            else:
+                # Nothing to repair - generate again from the task itself
+                retry_text = self._generate_routed(prompt, config, context, task).text
+        except Exception:
+            retry_text = None
+        value = parse_structured(retry_text, schema)
+        if self.cache is not None and cache_ttl is not None:
+            key = self._cache_key(prompt, config, context, task)
+            if value is None:
+                # The unusable text would otherwise be re-read (and re-repaired) until it expires
+                self.cache.delete(key)
+            else:
+                # Store the good text so the next cache hit parses cleanly
+                self.cache.set(key, retry_text)
+        return fallback if value is None else value
+
+    def generate_many(self, prompts, max_concurrency=4, **kwargs):
+        """
+        Runs independent prompts concurrently on a thread pool.
+        
+        Every call still goes through the cache and the shared rate limiter,
+        so parallelism is bounded by both max_concurrency and the model quota.
+        
+        Args:
+            prompts: List of text prompts
+            max_concurrency: Max calls in flight from this batch
+            **kwargs: Passed to generate_content (cache_ttl, bypass_cache, generation_config, task)
+            
+        Returns:
+            List of BatchResult in the same order as prompts
+        """
+        return self._run_concurrent(lambda p: self.generate_content(p, **kwargs), prompts, max_concurrency)
+
+    def generate_json_many(self, prompts, schema, max_concurrency=4, cache_ttl=None, task=None):
+        """
+        generate_json() for many prompts at once.
+        
+        Returns:
+            List of parsed values in prompt order (None where no valid JSON was obtained)
+        """
+        results = self._run_concurrent(
+            lambda p: self.generate_json(p, schema, cache_ttl=cache_ttl, task=task), prompts, max_concurrency
+        )
+        return [result.response for result in results]
+
+    def _run_concurrent(self, fn, items, max_concurrency):
+        if not items:
+            return []
+
+        def run(item):
+            try:
+                return BatchResult(response=fn(item))
+            except Exception as e:
+                return BatchResult(error=e)
+
+        workers = max(1, min(max_concurrency, len(items)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, items))
+
+    def _cache_key(self, prompt, generation_config=None, context=None, task=None):
+        config = dict(self.generation_config or {}, **(generation_config or {}))
+        if context is not None:
+            config["context"] = context.key
+        if task is not None:
+            # Routed calls may be answered by any tier of the task's route
+            config["task"] = task
+        return ResponseCache.make_key(self.model_name, config, prompt)
+
+    def cache_stats(self):
+        """Returns response cache hit/miss counters (empty dict if disabled)."""
+        return self.cache.stats() if self.cache else {}
+
+    def single_flight_stats(self):
+        """Returns how many calls ran vs. were shared with an identical in-flight call."""
+        return _single_flight.stats()
+
+    def limiter_metrics(self):
+        """Returns queue depth and wait-time metrics of the model's rate limiter."""
+        return self.limiter.metrics()
+
+    def count_tokens(self, text):
+        """
+        Exact token count from the API, or the local estimate when offline.
+        
+        Costs a round trip - pass as PromptBuilder(count=...) only where the
+        local estimate is not precise enough.
+        """
+        try:
+            return self.model.count_tokens(text).total_tokens
+        except Exception:
+            return estimate_tokens(text)
+
+    def task_latency_stats(self):
+        """Returns p50/p95 latency per routed task type (see ModelRouter.stats)."""
+        return self.router.stats()
+
+    def _model_for(self, model_name):
+        """GenerativeModel for model_name, created once per handler."""
+        with self._models_lock:
+            if model_name not in self._models:
+                self._models[model_name] = self.backend.get_model(model_name, self.generation_config)
+            return self._models[model_name]
+
+    def _limiter_for(self, model_name):
+        return self.limiter if model_name == self.model_name else get_rate_limiter(model_name)
+
+    def _generate_routed(self, prompt, generation_config=None, context=None, task=None):
+        """
+        _generate() on the task's model, moving on to the next tier when a
+        model stays overloaded (rate limited or 5xx) after retries.
+        """
+        if task is None:
+            return self._generate(prompt, generation_config, context)
+
+        error = None
+        for model_name, route_config in self.router.candidates(task):
+            config = dict(route_config, **(generation_config or {}))
+            started = time.perf_counter()
+            try:
+                response = self._generate(prompt, config, context, model_name)
+            except APIError as e:
+                self.router.record(task, model_name, time.perf_counter() - started, ok=False)
+                error = e
+                continue
+            self.router.record(task, model_name, time.perf_counter() - started)
             return response
-        except Exception as e:
-            error_str = str(e)
-            # Check for rate limit or server errors
-            if "429" in error_str or "Resource exhausted" in error_str:
-                raise APIError(f"Rate limit exceeded: {error_str}")
-            elif "500" in error_str or "503" in error_str:
-                raise APIError(f"Server error: {error_str}")
+        raise error
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=_retry_wait,
+        retry=retry_if_exception_type((APIError, Exception)),
+        reraise=True
+    )
+    def _generate(self, prompt, generation_config=None, context=None, model_name=None):
+        """
+        Calls the model within the rate limiter budget, with automatic retry
+        on rate limit or server errors.
+        """
+        model_name = model_name or self.model_name
+        limiter = self._limiter_for(model_name)
+        model, prompt = self._resolve_context(prompt, context, model_name)
+        est_tokens = estimate_tokens(prompt) + OUTPUT_TOKEN_RESERVE
+        actual_tokens = None
+        limiter.acquire(est_tokens)
+        try:
+            if generation_config:
+                response = model.generate_content(prompt, generation_config=generation_config)
             else:
-                # Re-raise other exceptions
-                raise
+                response = model.generate_content(prompt)
+            actual_tokens = _usage_tokens(response)
+            return response
+        except Exception as e:
+            raise self._classify_error(e, limiter)
+        finally:
+            limiter.release(est_tokens, actual_tokens)
+
+    def stream_content(self, prompt, max_attempts=3, context=None, task=None):
+        """
+        Generate content as a stream of text chunks.
+        
+        Failures before the first chunk are retried like generate_content();
+        once text has been yielded an error is raised to the caller, since
+        the partial output cannot be replayed. Closing the generator early
+        (e.g. the user cancels) releases the rate limiter slot.
+        
+        Args:
+            prompt: Text prompt for generation
+            max_attempts: Attempts before the first chunk arrives
+            context: Optional ContextHandle from register_context()
+            task: Task type for the model router; retries rotate through the route's tiers
+            
+        Yields:
+            Text chunks in arrival order
+        """
+        if task is None:
+            candidates = [(self.model_name, None)]
+        else:
+            candidates = self.router.candidates(task)
+        attempt = 0
+        while True:
+            model_name, generation_config = candidates[attempt % len(candidates)]
+            attempt += 1
+            limiter = self._limiter_for(model_name)
+            model, call_prompt = self._resolve_context(prompt, context, model_name)
+            yielded = False
+            est_tokens = estimate_tokens(call_prompt) + OUTPUT_TOKEN_RESERVE
+            actual_tokens = None
+            started = time.perf_counter()
+            limiter.acquire(est_tokens)
+            try:
+                if generation_config:
+                    response = model.generate_content(call_prompt, generation_config=generation_config, stream=True)
+                else:
+                    response = model.generate_content(call_prompt, stream=True)
+                for chunk in response:
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunk without text parts (e.g. safety metadata only)
+                        continue
+                    if text:
+                        yielded = True
+                        yield text
+                actual_tokens = _usage_tokens(response)
+                if task is not None:
+                    self.router.record(task, model_name, time.perf_counter() - started)
+                return
+            except Exception as e:
+                error = self._classify_error(e, limiter)
+                if task is not None and isinstance(error, APIError):
+                    self.router.record(task, model_name, time.perf_counter() - started, ok=False)
+                if yielded or attempt >= max_attempts or not isinstance(error, APIError):
+                    raise error
+            finally:
+                limiter.release(est_tokens, actual_tokens)
+            if not isinstance(error, RateLimitError) and len(candidates) == 1:
+                time.sleep(min(10, 4 * attempt))
+
+    def _resolve_context(self, prompt, context, model_name=None):
+        """Returns (model, prompt) for a call, honoring a registered static block."""
+        model_name = model_name or self.model_name
+        model = self.model if model_name == self.model_name else self._model_for(model_name)
+        if context is None:
+            return model, prompt
+        if context.is_remote and context.expired():
+            # Remote cache is about to lapse - re-register (falls back to local on failure)
+            context = self.context_cache.register(context.name, context.text)
+        if context.is_remote and model_name == self.model_name:
+            return context.model(), prompt
+        # Cached content is bound to this handler's model - other tiers get the block inline
+        return model, context.apply(prompt, inline=True)
+
+    def _classify_error(self, e, limiter=None):
+        """Maps an API exception to APIError/RateLimitError (or returns it unchanged)."""
+        error_str = str(e)
+        # Check for rate limit or server errors
+        if "429" in error_str or "Resource exhausted" in error_str:
+            (limiter or self.limiter).backoff(parse_retry_after(error_str) or DEFAULT_BACKOFF_SECONDS)
+            return RateLimitError(f"Rate limit exceeded: {error_str}")
+        elif "500" in error_str or "503" in error_str:
+            return APIError(f"Server error: {error_str}")
+        # Re-raise other exceptions
+        return e
     
     def generate_with_fallback(self, prompt, fallback_value=None):
         """
@@ -0,0 +1,96 @@
+import concurrent.futures
+import time
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from utils.http_cache import HTTP_TTL_BRAND
+
+SNAPSHOT_FILENAME = "brand_snapshot.json"
+# Key pages besides the homepage, in the order they are preferred
+KEY_PAGE_HINTS = [
+    ("about", "o-nas", "pro-nas", "про нас", "о нас", "about-us"),
+    ("company", "kompaniya", "компанія", "історія"),
+    ("delivery", "dostavka", "доставка", "oplata", "оплата", "payment"),
+    ("faq", "garantiya", "гарантія", "питання"),
+]
+MAX_KEY_PAGES = 3
+# Text kept per page; prompts trim further to their own budgets
+PAGE_TEXT_CHARS = 6000
+
+def find_key_pages(html, base_url, limit=MAX_KEY_PAGES):
+    """
+    Picks same-site links that look like "about", "delivery" or "FAQ" pages.
+
+    Args:
+        html: Homepage HTML
+        base_url: Homepage URL (for relative links and the domain check)
+        limit: Max pages returned
+
+    Returns:
+        List of absolute URLs, one per KEY_PAGE_HINTS group at most
+    """
+    domain = urlparse(base_url).netloc.lower()
+    soup = BeautifulSoup(html or "", "html.parser")
+    links = []
+    for a in soup.find_all("a", href=True):
+        url = urljoin(base_url, a["href"]).split("#")[0]
+        if urlparse(url).netloc.lower() == domain and url.rstrip("/") != base_url.rstrip("/"):
+            links.append((url, f"{urlparse(url).path} {a.get_text(' ', strip=True)}".lower()))
+
+    pages = []
+    for hints in KEY_PAGE_HINTS:
+        match = next((url for url, label in links if url not in pages and any(h in label for h in hints)), None)
+        if match:
+            pages.append(match)
+        if len(pages) >= limit:
+            break
+    return pages
+
+def take_snapshot(fetcher, url, max_pages=MAX_KEY_PAGES):
+    """
+    Fetches the brand homepage and a few key pages once.
+
+    Args:
+        fetcher: utils.fetcher.Fetcher
+        url: Brand homepage URL
+        max_pages: Key pages fetched besides the homepage
+
+    Returns:
+        Dict with url, taken_at (unix time) and pages [{url, text}]
+
+    Raises:
+        Exception if the homepage can't be fetched
+    """
+    home = fetcher.fetch(url, "text", ttl=HTTP_TTL_BRAND)
+    pages = [{"url": url, "text": home.text[:PAGE_TEXT_CHARS]}]
+
+    key_urls = find_key_pages(home.html, url, max_pages)
+    if key_urls:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(key_urls)) as executor:
+            futures = [executor.submit(fetcher.fetch, u, "text", ttl=HTTP_TTL_BRAND) for u in key_urls]
+            for key_url, future in zip(key_urls, futures):
+                try:
+                    pages.append({"url": key_url, "text": future.result().text[:PAGE_TEXT_CHARS]})
+                except Exception:
+                    # A missing "about" page still leaves the homepage
+                    pass
+    return {"url": url, "taken_at": time.time(), "pages": pages}
+
+def snapshot_text(snapshot, url=None):
+    """
+    Joins snapshot pages into one site-context block.
+
+    Args:
+        snapshot: Dict from take_snapshot (or None)
+        url: If given, the snapshot must be of this URL
+
+    Returns:
+        Text, or None when there is no usable snapshot
+    """
+    if not snapshot or not snapshot.get("pages"):
+        return None
+    if url and snapshot.get("url", "").rstrip("/") != url.rstrip("/"):
+        return None
+    home, *others = snapshot["pages"]
+    return "\n\n".join([home["text"]] + [f"--- {page['url']} ---\n{page['text']}" for page in others])
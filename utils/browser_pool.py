@@ -0,0 +1,281 @@
+import asyncio
+import atexit
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled"]
+# Enough for a full SERP top-5 at once
+DEFAULT_MAX_PAGES = 6
+# Relaunch Chromium after this many pages (when idle) to cap memory growth
+RECYCLE_AFTER_PAGES = 500
+
+# Analytics/ads hosts never needed to read a page's content
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "facebook.com", "hotjar.com", "clarity.ms",
+    "mc.yandex.ru", "tiktok.com", "criteo.com", "bing.com", "linkedin.com", "twitter.com",
+)
+
+# Request interception profiles: resource types to abort and whether to drop trackers.
+# Scrapes only read headings/text, so "lean" keeps just documents, scripts and XHR.
+BLOCK_PROFILES = {
+    "lean": {"resource_types": {"image", "media", "font", "stylesheet", "imageset", "texttrack"}, "trackers": True},
+    "trackers": {"resource_types": set(), "trackers": True},
+    "none": None,
+}
+DEFAULT_BLOCK_PROFILE = "lean"
+
+class BrowserPool:
+    """
+    One long-lived headless Chromium shared by every scrape in the process.
+
+    Playwright objects are bound to the thread/loop that created them, while
+    Streamlit runs each rerun on a different thread - so the browser lives on
+    a dedicated event-loop thread and callers submit work to it. Every call
+    gets its own browser context (isolated cookies/storage), concurrent pages
+    are capped, and a crashed or disconnected browser is relaunched on the
+    next call.
+
+    Usage:
+        pool = get_browser_pool()
+        html = pool.page_html("https://example.com")
+    """
+
+    def __init__(self, max_pages=None, headless=True, recycle_after=RECYCLE_AFTER_PAGES, block_profile=None):
+        """
+        Args:
+            max_pages: Max pages open at once (default: SEO_BROWSER_MAX_PAGES or 6)
+            headless: Run Chromium headless
+            recycle_after: Relaunch the browser after this many pages
+            block_profile: Key of BLOCK_PROFILES (default: SEO_BROWSER_BLOCK or "lean")
+        """
+        self.max_pages = max_pages or int(os.getenv("SEO_BROWSER_MAX_PAGES", DEFAULT_MAX_PAGES))
+        self.block_profile = block_profile or os.getenv("SEO_BROWSER_BLOCK", DEFAULT_BLOCK_PROFILE)
+        if self.block_profile not in BLOCK_PROFILES:
+            raise ValueError(f"Unknown block profile: {self.block_profile}")
+        self.headless = headless
+        self.recycle_after = recycle_after
+        if sys.platform.startswith("win"):
+            # Playwright needs subprocess support, which only the Proactor loop has on Windows
+            self._loop = asyncio.ProactorEventLoop()
+        else:
+            self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+        self._thread.start()
+        self._semaphore = None
+        self._launch_lock = None
+        self._playwright = None
+        self._browser = None
+        self._install_attempted = False
+        self._closed = False
+        self._in_flight = 0
+        self._pages_since_launch = 0
+        self.launches = 0
+        self.pages = 0
+        self.failures = 0
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+        self.load_seconds = 0.0
+
+    def run(self, fn, timeout=60, user_agent=None):
+        """
+        Runs `async fn(page)` on a fresh page in its own browser context.
+
+        Args:
+            fn: Coroutine function taking a Playwright async Page
+            timeout: Overall seconds to wait, including time queued for a page slot
+            user_agent: Context user agent (default: desktop Chrome)
+
+        Returns:
+            Whatever fn returns (exceptions from fn are re-raised)
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool is shut down")
+        future = asyncio.run_coroutine_threadsafe(self._run(fn, user_agent), self._loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def page_html(self, url, timeout=15000, user_agent=None, wait_until="domcontentloaded", wait_for=None):
+        """
+        Rendered HTML of url.
+        
+        Args:
+            url: Page URL
+            timeout: goto timeout in ms, like Playwright
+            user_agent: Context user agent
+            wait_until: Load state to wait for - DOM readiness by default, not the full load event
+            wait_for: Optional CSS selector to wait briefly for (client-rendered content)
+        """
+        async def fetch(page):
+            await self._open(page, url, timeout, wait_until, wait_for)
+            return await page.content()
+        return self.run(fetch, timeout=timeout / 1000 + 30, user_agent=user_agent)
+
+    def page_text(self, url, timeout=15000, user_agent=None, wait_until="domcontentloaded", wait_for=None):
+        """Visible text of url's <body> (arguments as in page_html)."""
+        async def fetch(page):
+            await self._open(page, url, timeout, wait_until, wait_for)
+            return await page.inner_text("body")
+        return self.run(fetch, timeout=timeout / 1000 + 30, user_agent=user_agent)
+
+    async def _open(self, page, url, timeout, wait_until, wait_for):
+        await page.goto(url, timeout=timeout, wait_until=wait_until)
+        if wait_for:
+            try:
+                await page.wait_for_selector(wait_for, timeout=min(timeout, 5000))
+            except Exception:
+                # Read whatever rendered
+                pass
+
+    async def _run(self, fn, user_agent):
+        if self._semaphore is None:
+            # Created lazily so they bind to the pool's loop
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+            self._launch_lock = asyncio.Lock()
+        async with self._semaphore:
+            browser = await self._acquire_browser()
+            self._in_flight += 1
+            context = None
+            sizes = []
+            started = time.perf_counter()
+            try:
+                context = await browser.new_context(user_agent=user_agent or DEFAULT_USER_AGENT)
+                profile = BLOCK_PROFILES[self.block_profile]
+                if profile:
+                    await context.route("**/*", lambda route: self._filter(route, profile))
+                page = await context.new_page()
+                page.on("requestfinished", lambda request: sizes.append(asyncio.ensure_future(request.sizes())))
+                self.pages += 1
+                self._pages_since_launch += 1
+                started = time.perf_counter()
+                return await fn(page)
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                self._in_flight -= 1
+                await self._record(started, sizes)
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        # Browser died mid-call - the next call relaunches it
+                        pass
+
+    async def _filter(self, route, profile):
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        tracker = profile["trackers"] and any(host == d or host.endswith("." + d) for d in TRACKER_DOMAINS)
+        if tracker or request.resource_type in profile["resource_types"]:
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _record(self, started, sizes):
+        self.load_seconds += time.perf_counter() - started
+        self.requests += len(sizes)
+        for result in await asyncio.gather(*sizes, return_exceptions=True):
+            if isinstance(result, dict):
+                self.bytes += result.get("responseBodySize", 0) + result.get("responseHeadersSize", 0)
+
+    async def _acquire_browser(self):
+        async with self._launch_lock:
+            healthy = self._browser is not None and self._browser.is_connected()
+            recycle = healthy and self._pages_since_launch >= self.recycle_after and self._in_flight == 0
+            if not healthy or recycle:
+                await self._launch()
+            return self._browser
+
+    async def _launch(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        except Exception:
+            if self._install_attempted:
+                raise
+            # First run on a fresh machine - download Chromium once, then retry
+            self._install_attempted = True
+            await self._loop.run_in_executor(None, _install_chromium)
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        self._pages_since_launch = 0
+        self.launches += 1
+
+    def stats(self):
+        """Pool health plus per-page load time, bytes and request counts under the block profile."""
+        return {
+            "launches": self.launches,
+            "pages": self.pages,
+            "failures": self.failures,
+            "in_flight": self._in_flight,
+            "max_pages": self.max_pages,
+            "connected": bool(self._browser is not None and self._browser.is_connected()),
+            "block_profile": self.block_profile,
+            "requests": self.requests,
+            "blocked_requests": self.blocked,
+            "bytes": self.bytes,
+            "avg_page_bytes": self.bytes / self.pages if self.pages else 0,
+            "avg_page_seconds": self.load_seconds / self.pages if self.pages else 0.0
+        }
+
+    def shutdown(self, timeout=10):
+        """Closes the browser and Playwright, then stops the loop thread."""
+        if self._closed:
+            return
+        self._closed = True
+
+        async def close():
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+
+        try:
+            asyncio.run_coroutine_threadsafe(close(), self._loop).result(timeout)
+        except Exception:
+            pass
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+
+def _install_chromium():
+    subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=False)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool():
+    """Returns the process-wide BrowserPool (started on first use, closed at exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,184 @@
+import datetime
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import google.generativeai as genai
+
+from utils.rate_limiter import estimate_tokens
+
+# Explicit caching is only accepted above a per-model input size
+MIN_CACHE_TOKENS = {
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-flash-lite": 1024,
+    "gemini-2.5-pro": 4096,
+}
+DEFAULT_MIN_CACHE_TOKENS = 4096
+DEFAULT_CONTEXT_TTL = 60 * 60
+# Blocks kept per model; least recently used ones are dropped (and their remote cache deleted)
+MAX_CONTEXT_HANDLES = 32
+# Re-create remote caches this long before they expire
+_EXPIRY_MARGIN = 60
+
+class ContextHandle:
+    """
+    Reference to a registered static prompt block.
+
+    When `cached_content` is set, the block lives in Gemini cached content
+    and prompts are sent without it. Otherwise the handle is a local
+    stand-in and the block is prepended to the prompt, which still lets the
+    API's implicit prefix caching kick in.
+    """
+
+    def __init__(self, key, name, text, cached_content=None, expires_at=None):
+        self.key = key
+        self.name = name
+        self.text = text
+        self.cached_content = cached_content
+        self.expires_at = expires_at
+        self._model = None
+
+    @property
+    def is_remote(self):
+        return self.cached_content is not None
+
+    def expired(self):
+        return self.expires_at is not None and time.time() > self.expires_at - _EXPIRY_MARGIN
+
+    def release(self):
+        """Deletes the remote cached content (billed storage) - best effort."""
+        if self.cached_content is not None:
+            try:
+                self.cached_content.delete()
+            except Exception:
+                # Already expired on the server, or the API is unreachable - its TTL ends it anyway
+                pass
+
+    def model(self):
+        """GenerativeModel bound to the remote cached content."""
+        if self._model is None:
+            self._model = genai.GenerativeModel.from_cached_content(self.cached_content)
+        return self._model
+
+    def apply(self, prompt, inline=False):
+        """
+        Prompt to send for this handle (block prepended for local handles).
+
+        Args:
+            prompt: Per-call prompt
+            inline: Prepend the block even for a remote handle (when calling
+                a model other than the one the cached content belongs to)
+        """
+        if self.is_remote and not inline:
+            return prompt
+        return f"{self.text}\n\n{prompt}"
+
+class ContextCache:
+    """
+    Registry of large per-project static blocks for one model.
+
+    Holds at most max_handles blocks, least recently registered first out;
+    expired blocks are dropped on the next register(). A dropped remote
+    block's cached content is deleted, so an edited ToV doesn't leave the
+    old one stored on the provider side.
+    """
+
+    def __init__(self, model_name, ttl=DEFAULT_CONTEXT_TTL, remote=True, max_handles=MAX_CONTEXT_HANDLES):
+        """
+        Args:
+            model_name: Gemini model the cached content is created for
+            ttl: Remote cache lifetime in seconds
+            remote: Use Gemini cached content (False = local stand-in only)
+            max_handles: Blocks kept before the least recently used is dropped
+        """
+        self.model_name = model_name
+        self.ttl = ttl
+        self.remote = remote
+        self.max_handles = max_handles
+        self.min_tokens = MIN_CACHE_TOKENS.get(model_name, DEFAULT_MIN_CACHE_TOKENS)
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def register(self, name, text):
+        """
+        Registers a static block and returns its handle.
+
+        Registering identical text again returns the existing handle, so
+        callers can simply register on every request.
+
+        Args:
+            name: Display name (e.g. "tov:Світ Пекаря")
+            text: Block content
+        """
+        key = hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
+        dropped = []
+        try:
+            with self._lock:
+                return self._register(key, name, text, dropped)
+        finally:
+            # Remote deletes are API calls - made outside the lock
+            for handle in dropped:
+                handle.release()
+
+    def _register(self, key, name, text, dropped):
+        for other_key in [k for k, h in self._handles.items() if h.expired()]:
+            dropped.append(self._handles.pop(other_key))
+
+        handle = self._handles.get(key)
+        if handle is not None:
+            self._handles.move_to_end(key)
+            self.reused += 1
+            return handle
+
+        cached_content = None
+        expires_at = None
+        if self.remote and estimate_tokens(text) >= self.min_tokens:
+            try:
+                cached_content = genai.caching.CachedContent.create(
+                    model=f"models/{self.model_name}",
+                    display_name=name[:100],
+                    contents=[text],
+                    ttl=datetime.timedelta(seconds=self.ttl)
+                )
+                expires_at = time.time() + self.ttl
+            except Exception:
+                # Unsupported model/tier or API error - fall back to the local stand-in
+                cached_content = None
+
+        handle = ContextHandle(key, name, text, cached_content, expires_at)
+        self._handles[key] = handle
+        self.created += 1
+        while len(self._handles) > self.max_handles:
+            dropped.append(self._handles.popitem(last=False)[1])
+        return handle
+
+    def stats(self):
+        with self._lock:
+            return {
+                "blocks": len(self._handles),
+                "remote": sum(1 for h in self._handles.values() if h.is_remote),
+                "created": self.created,
+                "reused": self.reused
+            }
+
+_context_caches = {}
+_context_caches_lock = threading.Lock()
+
+def get_context_cache(model_name, remote=True):
+    """
+    Returns the process-wide ContextCache for a model.
+    
+    Args:
+        model_name: Gemini model name
+        remote: Allow provider-side cached content (SEO_CONTEXT_CACHE=local disables it globally)
+    """
+    remote = remote and os.getenv("SEO_CONTEXT_CACHE", "gemini") != "local"
+    with _context_caches_lock:
+        key = (model_name, remote)
+        if key not in _context_caches:
+            _context_caches[key] = ContextCache(model_name, remote=remote)
+        return _context_caches[key]
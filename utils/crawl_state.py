@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+CRAWL_STATE_FILENAME = "crawl_state.json"
+
+class CrawlState:
+    """
+    Per-project record of the last sitemap crawl.
+
+    One entry per page URL: sitemap lastmod, ETag / Last-Modified, content
+    hash and the extracted title/H1. An incremental refresh compares the
+    sitemap against it and revalidates pages with the stored validators,
+    so only new or changed pages are downloaded and indexed.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: JSON file, e.g. projects/<brand>/crawl_state.json
+        """
+        self.path = path
+        self.pages = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def for_project(cls, project_name, base_dir="projects"):
+        return cls(os.path.join(base_dir, project_name, CRAWL_STATE_FILENAME))
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.pages = json.load(f).get("pages", {})
+        except (OSError, ValueError):
+            self.pages = {}
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, url):
+        return url in self.pages
+
+    def get(self, url):
+        return self.pages.get(url)
+
+    def update(self, url, title, h1, lastmod=None, etag=None, last_modified=None, content_hash=None):
+        """Records a crawled page."""
+        with self._lock:
+            self.pages[url] = {
+                "title": title,
+                "h1": h1,
+                "lastmod": lastmod,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
+                "crawled_at": time.time()
+            }
+
+    def remove(self, urls):
+        with self._lock:
+            for url in urls:
+                self.pages.pop(url, None)
+
+    def clear(self):
+        with self._lock:
+            self.pages = {}
+
+    def save(self):
+        """Writes the state atomically (a killed process leaves the previous file intact)."""
+        with self._lock:
+            data = json.dumps({"saved_at": time.time(), "pages": self.pages}, ensure_ascii=False)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def to_dataframe(self):
+        """All known pages as a DataFrame(url, title, h1) - the pages.csv layout."""
+        return pd.DataFrame(
+            [{"url": url, "title": page["title"], "h1": page["h1"]} for url, page in self.pages.items()],
+            columns=["url", "title", "h1"]
+        )
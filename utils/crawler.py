@@ -0,0 +1,238 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import threading
+import time
+
+import aiohttp
+
+from utils.http_cache import get_http_cache, header_charset, HTTP_TTL_PAGE
+from utils.html_extract import title_and_h1, TitleH1Parser
+
+CRAWLER_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+# Pages in flight at once (SEO_CRAWL_CONCURRENCY overrides)
+DEFAULT_CRAWL_CONCURRENCY = 32
+# Resolved host addresses are reused for this long
+DNS_CACHE_SECONDS = 600
+
+def crawl_concurrency():
+    try:
+        return max(1, int(os.getenv("SEO_CRAWL_CONCURRENCY", DEFAULT_CRAWL_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_CRAWL_CONCURRENCY
+
+class CrawlStats:
+    """Counters for one crawl."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.ok = 0
+        self.failed = 0
+        self.from_cache = 0
+        self.partial = 0
+        self.bytes = 0
+        self.latency = 0.0
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+    @property
+    def pages_per_sec(self):
+        seconds = self.seconds or (time.monotonic() - self.started)
+        return self.done / seconds if seconds > 0 else 0.0
+
+    @property
+    def avg_latency_ms(self):
+        return self.latency / self.done * 1000 if self.done else 0.0
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "done": self.done,
+            "ok": self.ok,
+            "failed": self.failed,
+            "from_cache": self.from_cache,
+            "partial": self.partial,
+            "bytes": self.bytes,
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "seconds": round(self.seconds, 2),
+            "pages_per_sec": round(self.pages_per_sec, 1)
+        }
+
+class _HeadReader:
+    """aread() callback: parses chunks as they arrive and stops at the first </h1>."""
+
+    def __init__(self):
+        self.parser = None
+
+    def __call__(self, chunk, headers):
+        if self.parser is None:
+            # No charset in the header - the parser reads the page's <meta charset>
+            self.parser = TitleH1Parser(header_charset(headers))
+        return self.parser.feed(chunk)
+
+    def result(self, response):
+        if self.parser is None:
+            # Served from the cache - nothing was streamed
+            return title_and_h1(response.content, header_charset(response.headers))
+        return self.parser.close()
+
+def _conditional_headers(known):
+    """If-None-Match / If-Modified-Since from an earlier crawl's validators."""
+    headers = {}
+    if known and known.get("etag"):
+        headers["If-None-Match"] = known["etag"]
+    if known and known.get("last_modified"):
+        headers["If-Modified-Since"] = known["last_modified"]
+    return headers
+
+async def _crawl(urls, concurrency, timeout, ttl, cache, partial, validators, on_page):
+    stats = CrawlStats(0)
+    order = []
+    # Bounded, so a slow crawl holds back the producer instead of buffering a whole sitemap
+    queue = asyncio.Queue(maxsize=concurrency * 4)
+    loop = asyncio.get_running_loop()
+    # Set when the crawl ends early (a failing worker or callback) - the producer gives up
+    stop = threading.Event()
+
+    def put(item):
+        # Timed waits, so a producer blocked on a full queue notices stop
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.2)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    def produce():
+        # Runs in a thread: urls may be a generator doing blocking I/O (a streamed sitemap)
+        try:
+            for url in urls:
+                order.append(url)
+                stats.total += 1
+                if not put(url):
+                    break
+        finally:
+            if stop.is_set():
+                # Lets a streamed sitemap release its reader threads
+                close = getattr(urls, "close", None)
+                if close:
+                    close()
+            else:
+                for _ in range(concurrency):
+                    if not put(None):
+                        break
+
+    # One pooled keep-alive session: connections (with their TLS sessions)
+    # are reused per host and DNS answers are cached; gzip/deflate (and
+    # brotli when installed) are decoded by aiohttp
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, ttl_dns_cache=DNS_CACHE_SECONDS)
+    async with aiohttp.ClientSession(
+        connector=connector, headers={"User-Agent": CRAWLER_USER_AGENT, "Accept-Language": "uk,en;q=0.8"}
+    ) as session:
+
+        async def worker():
+            while True:
+                url = await queue.get()
+                if url is None:
+                    return
+                record = None
+                started = time.monotonic()
+                try:
+                    # Validators of a page the HTTP cache no longer holds (the cache's own take precedence)
+                    headers = _conditional_headers(validators.get(url)) if validators else None
+                    if partial:
+                        reader = _HeadReader()
+                        response = await cache.aread(url, ttl, session, reader, timeout=timeout, headers=headers)
+                    else:
+                        response = await cache.aget(url, ttl, session, timeout=timeout, headers=headers)
+                    stats.bytes += 0 if response.from_cache else len(response.content)
+                    stats.from_cache += 1 if response.from_cache else 0
+                    stats.partial += 1 if response.partial else 0
+                    if response.status_code == 200:
+                        # Stops parsing at the first </h1>
+                        title, h1 = reader.result(response) if partial else title_and_h1(
+                            response.content, header_charset(response.headers))
+                        record = {"url": url, "title": title, "h1": h1 or title,
+                                  "etag": response.headers.get("ETag"),
+                                  "last_modified": response.headers.get("Last-Modified"),
+                                  # A cut-short body ends wherever the chunks happened to stop - not comparable
+                                  "content_hash": None if response.partial else hashlib.sha1(response.content).hexdigest(),
+                                  "not_modified": False}
+                    elif response.status_code == 304:
+                        # Matched the caller's validators - unchanged, and there is no body to read
+                        record = {"url": url, "title": None, "h1": None,
+                                  "etag": response.headers.get("ETag"),
+                                  "last_modified": response.headers.get("Last-Modified"),
+                                  "content_hash": None, "not_modified": True}
+                except Exception:
+                    # Network errors, bad URLs - counted as failed; a dead worker would stall the producer
+                    pass
+                stats.latency += time.monotonic() - started
+                stats.done += 1
+                if record:
+                    stats.ok += 1
+                else:
+                    stats.failed += 1
+                if on_page:
+                    on_page(record, stats)
+
+        producer = loop.run_in_executor(None, produce)
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # On error: cancel the other workers and wait for the producer to give up
+            stop.set()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await producer
+    stats.seconds = time.monotonic() - stats.started
+    return stats, order
+
+def crawl_pages(urls, concurrency=None, timeout=10, ttl=HTTP_TTL_PAGE, cache=None, on_progress=None, partial=True,
+                validators=None):
+    """
+    Fetches pages concurrently on one pooled asyncio HTTP session and reads title + H1.
+
+    Args:
+        urls: Page URLs - any iterable; a generator (e.g. a streamed sitemap)
+              is consumed while pages are already being fetched
+        concurrency: Pages in flight at once (default: crawl_concurrency())
+        timeout: Per-request timeout in seconds
+        ttl: HTTP cache freshness; unchanged pages are revalidated with a 304
+        cache: HttpCache (default: process-wide cache)
+        on_progress: Called as on_progress(stats) after every page, from the calling thread
+            (stats.total grows while urls is still being read)
+        partial: Stop each download once <title> and the first <h1> are parsed
+            (the full body is read when no <h1> appears); cut-short pages get
+            content_hash None but keep their ETag / Last-Modified
+        validators: {url: {"etag", "last_modified"}} from an earlier crawl (e.g. CrawlState.pages),
+            sent as a conditional request when the HTTP cache has no copy of the page
+
+    Returns:
+        (records, stats) - records are {url, title, h1, etag, last_modified, content_hash,
+        not_modified} for pages that loaded, in URL order (a 304 to the caller's validators
+        gives not_modified=True and no title/h1); stats is a dict with pages_per_sec, bytes, partial
+        (pages cut short), avg_latency_ms, failures etc.
+    """
+    results = {}
+
+    def on_page(record, stats):
+        if record:
+            results[record["url"]] = record
+        if on_progress:
+            on_progress(stats)
+
+    stats, order = asyncio.run(_crawl(
+        urls, concurrency or crawl_concurrency(), timeout, ttl, cache or get_http_cache(), partial, validators, on_page
+    ))
+    return [results[url] for url in order if url in results], stats.as_dict()
@@ -0,0 +1,218 @@
+"""
+Offline stand-in for the Gemini REST API, for load tests and benchmarks.
+
+Serves generateContent and streamGenerateContent (SSE) with canned
+responses: schema-valid JSON when the request carries a responseSchema,
+Markdown articles otherwise. Latency, jitter, error injection and stream
+chunking are configurable.
+
+Run standalone:
+    python -m utils.fake_llm_server --port 8765 --latency 0.8 --jitter 0.3 --rate-429 0.05
+
+Then point the app at it:
+    SEO_LLM_BACKEND=rest SEO_LLM_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PATH_RE = re.compile(r"^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)")
+
+_ARTICLE_SECTIONS = [
+    "Що це таке і навіщо це потрібно",
+    "Як обрати правильний варіант",
+    "Покрокова інструкція",
+    "Типові помилки та як їх уникнути",
+    "Поради від експертів",
+]
+
+_PARAGRAPH = (
+    "Це тестовий абзац, згенерований локальним сервером для навантажувального тестування. "
+    "Він містить кілька речень середньої довжини, щоб аудит читабельності працював як зі справжнім текстом. "
+    "**Важливо:** зміст не має значення, лише обсяг і структура."
+)
+
+class FakeConfig:
+    """Behaviour knobs of the fake server."""
+
+    def __init__(self, latency=0.5, jitter=0.2, rate_429=0.0, rate_503=0.0, stream_chunks=20,
+                 chunk_delay=0.05, retry_after=1, seed=None):
+        """
+        Args:
+            latency: Base seconds before the (first) response byte
+            jitter: Extra uniform random latency in [0, jitter]
+            rate_429: Probability of a 429 with Retry-After
+            rate_503: Probability of a 503
+            stream_chunks: Number of SSE chunks per streamed response
+            chunk_delay: Seconds between streamed chunks
+            retry_after: Retry-After header value on 429
+            seed: Random seed for reproducible runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.stream_chunks = stream_chunks
+        self.chunk_delay = chunk_delay
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+def fake_value(schema, rng, depth=0):
+    """Builds a value that satisfies a (Gemini-style) response schema."""
+    kind = str(schema.get("type", "string")).lower()
+    if kind == "object":
+        return {name: fake_value(sub, rng, depth + 1) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = rng.randint(3, 6) if depth < 2 else 2
+        return [fake_value(schema.get("items", {}), rng, depth + 1) for _ in range(count)]
+    if kind in ("integer", "number"):
+        return rng.randint(1, 100)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if schema.get("enum"):
+        return rng.choice(schema["enum"])
+    return rng.choice(["Пресовані дріжджі", "Випічка вдома", "Борошно вищого ґатунку", "Закваска", "Рецепт хліба"])
+
+def fake_article(rng):
+    parts = []
+    for heading in rng.sample(_ARTICLE_SECTIONS, 4):
+        parts.append(f"## {heading}\n\n{_PARAGRAPH}\n\n{_PARAGRAPH}\n")
+        parts.append(f"### Деталі\n\n- Перший пункт\n- Другий пункт\n\n{_PARAGRAPH}\n")
+    parts.insert(1, '<img src="placeholder.jpg" alt="Ілюстрація до розділу">\n')
+    return "\n".join(parts)
+
+def _payload(text, prompt_tokens):
+    out_tokens = len(text) // 4 + 1
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": out_tokens,
+            "totalTokenCount": prompt_tokens + out_tokens
+        }
+    }
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # Set per server class
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        match = _PATH_RE.match(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not match:
+            return self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+        cfg = self.config
+        with cfg.lock:
+            cfg.requests += 1
+            roll = cfg.random.random()
+            delay = cfg.latency + cfg.random.uniform(0, cfg.jitter)
+            seed = cfg.random.random()
+        time.sleep(delay)
+
+        if roll < cfg.rate_429:
+            with cfg.lock:
+                cfg.errors += 1
+            return self._send_json(429, {"error": {"code": 429, "message": "Resource exhausted (fake)"}},
+                                   {"Retry-After": str(cfg.retry_after)})
+        if roll < cfg.rate_429 + cfg.rate_503:
+            with cfg.lock:
+                cfg.errors += 1
+            return self._send_json(503, {"error": {"code": 503, "message": "Service unavailable (fake)"}})
+
+        prompt = "".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        rng = random.Random(seed)
+        schema = body.get("generationConfig", {}).get("responseSchema")
+        text = json.dumps(fake_value(schema, rng), ensure_ascii=False) if schema else fake_article(rng)
+        prompt_tokens = len(prompt) // 4 + 1
+
+        if match.group(2) == "streamGenerateContent":
+            return self._send_stream(text, prompt_tokens)
+        return self._send_json(200, _payload(text, prompt_tokens))
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, text, prompt_tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        size = max(1, len(text) // max(1, self.config.stream_chunks) + 1)
+        try:
+            for start in range(0, len(text), size):
+                chunk = json.dumps(_payload(text[start:start + size], prompt_tokens), ensure_ascii=False)
+                self.wfile.write(f"data: {chunk}\r\n\r\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.config.chunk_delay)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            pass
+        self.close_connection = True
+
+def start_fake_server(host="127.0.0.1", port=0, **config):
+    """
+    Starts the fake server on a daemon thread.
+
+    Args:
+        host: Bind address
+        port: Port (0 = pick a free one)
+        **config: FakeConfig options
+
+    Returns:
+        (server, base_url) - call server.shutdown() to stop it
+    """
+    handler = type("FakeGeminiHandler", (_Handler,), {"config": FakeConfig(**config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini REST server for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-503", type=float, default=0.0)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(
+        args.host, args.port,
+        latency=args.latency, jitter=args.jitter, rate_429=args.rate_429, rate_503=args.rate_503,
+        stream_chunks=args.stream_chunks, chunk_delay=args.chunk_delay, seed=args.seed
+    )
+    print(f"Fake Gemini server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
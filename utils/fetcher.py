@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from utils.browser_pool import get_browser_pool
+from utils.html_extract import HtmlDoc
+from utils.http_cache import get_http_cache, HTTP_TTL_PAGE
+
+HTTP_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+# Visible text below this is treated as a JS-rendered shell
+MIN_TEXT_CHARS = 500
+# How long a domain's learned tier is trusted
+TIER_TTL = 7 * 24 * 60 * 60
+
+# What the browser tier waits for after DOM readiness, per signal
+SIGNAL_SELECTORS = {"headings": "h1, h2, h3", "text": "p"}
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+class FetchResult:
+    """Page fetched by Fetcher: rendered or static HTML plus which tier served it."""
+
+    def __init__(self, url, html, tier):
+        self.url = url
+        self.html = html
+        self.tier = tier
+        self._text = None
+
+    @property
+    def text(self):
+        """Visible text of the page body."""
+        if self._text is None:
+            self._text = HtmlDoc(self.html).text()
+        return self._text
+
+def has_signals(html, signal):
+    """
+    Checks that static HTML already carries what the caller needs.
+
+    Args:
+        html: Page HTML
+        signal: "headings" (an h1/h2/h3) or "text" (MIN_TEXT_CHARS of body text)
+    """
+    if not html:
+        return False
+    if signal == "headings":
+        return bool(HtmlDoc(html).headings(limit=1))
+    return len(FetchResult(None, html, TIER_HTTP).text) >= MIN_TEXT_CHARS
+
+class Fetcher:
+    """
+    HTTP-first page fetcher that escalates to the headless browser only when needed.
+
+    A plain GET on a pooled session is tried first; if the response lacks the
+    signal the caller needs (headings, body text) the page is rendered in the
+    shared browser pool. The tier each domain needed is remembered on disk,
+    so known JS-rendered sites go straight to the browser next time. Both
+    tiers read through the HTTP cache (rendered pages under a "rendered:" key).
+    """
+
+    def __init__(self, browser_pool=None, tiers_path=".cache/fetch_tiers.json", http_timeout=10, pool_size=16,
+                 http_cache=None):
+        """
+        Args:
+            browser_pool: BrowserPool for escalation (default: process-wide pool)
+            http_cache: HttpCache for both tiers (default: process-wide cache)
+            tiers_path: JSON file with the learned tier per domain
+            http_timeout: Seconds for the HTTP tier
+            pool_size: Connections kept per host by the HTTP session
+        """
+        self.browser_pool = browser_pool or get_browser_pool()
+        self.http_cache = http_cache or get_http_cache()
+        self.tiers_path = tiers_path
+        self.http_timeout = http_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": HTTP_USER_AGENT, "Accept-Language": "uk,en;q=0.8"})
+        self._lock = threading.Lock()
+        self._tiers = self._load_tiers()
+        self.served = {TIER_HTTP: 0, TIER_BROWSER: 0}
+        self.escalations = 0
+
+    def fetch(self, url, signal="headings", timeout=15000, ttl=HTTP_TTL_PAGE):
+        """
+        Fetches a page through the cheapest tier that yields the needed signal.
+
+        Args:
+            url: Page URL
+            signal: What the caller reads - "headings" or "text"
+            timeout: Browser-tier page timeout in ms
+            ttl: Cache freshness for this use case (see utils.http_cache)
+
+        Returns:
+            FetchResult
+
+        Raises:
+            Exception from the browser tier when neither tier produced a page
+        """
+        domain = urlparse(url).netloc.lower()
+        html = None
+        if self._known_tier(domain) != TIER_BROWSER:
+            html = self._http_get(url, ttl)
+            if has_signals(html, signal):
+                self._remember(domain, TIER_HTTP)
+                return self._served(FetchResult(url, html, TIER_HTTP))
+
+        cached = self.http_cache.lookup(f"rendered:{url}", ttl)
+        if cached is not None and has_signals(cached.text, signal):
+            return self._served(FetchResult(url, cached.text, TIER_BROWSER))
+        try:
+            rendered = self.browser_pool.page_html(url, timeout=timeout, wait_for=SIGNAL_SELECTORS.get(signal))
+        except Exception:
+            if html:
+                # Browser unavailable - a thin static page beats nothing
+                return self._served(FetchResult(url, html, TIER_HTTP))
+            raise
+        self.http_cache.store(f"rendered:{url}", rendered.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"})
+        if html is not None:
+            self.escalations += 1
+        self._remember(domain, TIER_BROWSER)
+        return self._served(FetchResult(url, rendered, TIER_BROWSER))
+
+    def _http_get(self, url, ttl=HTTP_TTL_PAGE):
+        try:
+            response = self.http_cache.get(url, ttl, session=self.session, timeout=self.http_timeout)
+        except requests.RequestException:
+            return None
+        content_type = response.headers.get("Content-Type", "")
+        if response.status_code != 200 or "html" not in content_type:
+            # Bot walls (403/503) and non-HTML go to the browser
+            return None
+        return response.text
+
+    def _served(self, result):
+        with self._lock:
+            self.served[result.tier] += 1
+        return result
+
+    def _known_tier(self, domain):
+        with self._lock:
+            entry = self._tiers.get(domain)
+        if entry and time.time() - entry["at"] < TIER_TTL:
+            return entry["tier"]
+        return None
+
+    def _remember(self, domain, tier):
+        with self._lock:
+            entry = self._tiers.get(domain)
+            if entry and entry["tier"] == tier and time.time() - entry["at"] < TIER_TTL / 2:
+                return
+            self._tiers[domain] = {"tier": tier, "at": time.time()}
+            self._save_tiers()
+
+    def _load_tiers(self):
+        try:
+            with open(self.tiers_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_tiers(self):
+        try:
+            os.makedirs(os.path.dirname(self.tiers_path) or ".", exist_ok=True)
+            tmp_path = f"{self.tiers_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._tiers, f)
+            os.replace(tmp_path, self.tiers_path)
+        except OSError:
+            # The tier map is only an optimization
+            pass
+
+    def stats(self):
+        """Fetches served per tier and their share of the total."""
+        with self._lock:
+            total = sum(self.served.values())
+            return {
+                "served": dict(self.served),
+                "share": {tier: (count / total if total else 0.0) for tier, count in self.served.items()},
+                "escalations": self.escalations,
+                "known_domains": len(self._tiers)
+            }
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+def get_fetcher():
+    """Returns the process-wide Fetcher."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = Fetcher()
+        return _fetcher
@@ -2,6 +2,8 @@ import os
 import shutil
 from pathlib import Path
 
+from utils.brand_snapshot import SNAPSHOT_FILENAME
+
 class FileManager:
     def __init__(self, base_dir="projects"):
         self.base_dir = Path(base_dir)
@@ -58,6 +60,21 @@ class FileManager:
         path = self.base_dir / brand_name / filename
         path.write_text(content, encoding="utf-8")
 
+    def get_brand_snapshot(self, brand_name):
+        """Retrieves the saved brand-site snapshot (see utils.brand_snapshot), or None."""
+        import json
+        content = self.read_file(brand_name, SNAPSHOT_FILENAME)
+        if content:
+            try:
+                return json.loads(content)
+            except ValueError:
+                pass
+        return None
+
+    def save_brand_snapshot(self, brand_name, snapshot):
+        import json
+        self.save_file(brand_name, SNAPSHOT_FILENAME, json.dumps(snapshot, indent=4, ensure_ascii=False))
+
     def save_asset(self, brand_name, uploaded_file):
         """Saves an uploaded file to the assets directory."""
         asset_path = self.base_dir / brand_name / "assets" / uploaded_file.name
@@ -0,0 +1,412 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from utils.html_extract import declared_charset
+
+# Per-use-case freshness (seconds); past it entries are revalidated, not refetched
+HTTP_TTL_SITEMAP = 6 * 60 * 60
+HTTP_TTL_PAGE = 24 * 60 * 60
+HTTP_TTL_BRAND = 24 * 60 * 60
+HTTP_TTL_COMPETITOR = 3 * 24 * 60 * 60
+
+# Response headers kept with an entry
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+def header_charset(headers):
+    """Charset given in the Content-Type header, or None."""
+    # Stored headers are a plain dict - requests looks up "content-type" in lower case
+    headers = CaseInsensitiveDict(headers)
+    encoding = get_encoding_from_headers(headers)
+    if encoding and encoding.lower() == "iso-8859-1" and "charset" not in headers.get("Content-Type", "").lower():
+        # requests' default for text/* without charset, not something the server said
+        return None
+    return encoding
+
+def response_encoding(headers, content=b""):
+    """Body charset: Content-Type header, then the page's <meta charset>, then UTF-8."""
+    return header_charset(headers) or declared_charset(content) or "utf-8"
+
+class HttpResponse:
+    """Response served by HttpCache (from disk or the network)."""
+
+    def __init__(self, url, status_code, headers, content, from_cache=False, revalidated=False, partial=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+        # Body cut short by HttpCache.aread - content is only its beginning
+        self.partial = partial
+
+    @property
+    def text(self):
+        return self.content.decode(response_encoding(self.headers, self.content), errors="replace")
+
+class HttpCache:
+    """
+    Disk-backed HTTP GET cache with conditional revalidation.
+
+    Each URL is one file: a JSON header line (status, ETag, Last-Modified,
+    fetch time) followed by the zlib-compressed body. Fresh entries (younger
+    than the caller's TTL) are served without a request; stale entries with a
+    validator are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged page costs a 304 instead of a download. Only 200 responses are
+    stored. Least recently used files are evicted when over max_bytes.
+    """
+
+    def __init__(self, cache_dir=".cache/http", max_bytes=200 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory for cache entries (created if missing)
+            max_bytes: Size bound for the whole cache directory
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._scan())
+
+    def get(self, url, ttl, session=None, timeout=10, headers=None):
+        """
+        GETs url through the cache.
+
+        Args:
+            url: Page URL
+            ttl: Seconds an entry is served without contacting the server
+            session: requests.Session to use (default: requests module)
+            timeout: Request timeout in seconds
+            headers: Extra request headers
+
+        Returns:
+            HttpResponse
+
+        Raises:
+            requests.RequestException if the server can't be reached and nothing is cached
+        """
+        path, entry, fresh = self._begin(url, ttl)
+        if fresh is not None:
+            return fresh
+
+        try:
+            response = (session or requests).get(url, headers=self._request_headers(entry, headers), timeout=timeout)
+        except requests.RequestException:
+            if entry is not None:
+                # Server unreachable - stale content beats none
+                return self._response(url, entry, revalidated=False)
+            raise
+        return self._finish(url, path, entry, response.status_code, response.headers, response.content)
+
+    async def aget(self, url, ttl, session, timeout=10, headers=None):
+        """
+        get() for asyncio crawlers, over a pooled aiohttp.ClientSession.
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError if the server can't be reached and nothing is cached
+        """
+        import asyncio
+        import aiohttp
+
+        path, entry, fresh = self._begin(url, ttl)
+        if fresh is not None:
+            return fresh
+
+        try:
+            async with session.get(url, headers=self._request_headers(entry, headers),
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                content = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if entry is not None:
+                return self._response(url, entry, revalidated=False)
+            raise
+        return self._finish(url, path, entry, response.status, response.headers, content)
+
+    async def aread(self, url, ttl, session, until, timeout=10, chunk_size=16 * 1024, drain_bytes=32 * 1024,
+                    headers=None):
+        """
+        aget() that reads the body incrementally and can stop early.
+
+        Each downloaded chunk is passed to until(chunk, headers); once it
+        returns True the connection is closed and the response is marked
+        partial. If the rest of the body (by Content-Length) is at most
+        drain_bytes it is read anyway, which keeps the keep-alive
+        connection and makes the body cacheable. Only complete bodies are
+        stored; fresh or revalidated entries are returned whole without
+        calling until.
+
+        Args:
+            url: Page URL
+            ttl: Seconds an entry is served without contacting the server
+            session: aiohttp.ClientSession
+            until: Called as until(chunk, headers) for every chunk; True stops the download
+            timeout: Request timeout in seconds
+            chunk_size: Bytes per read
+            drain_bytes: Remaining bodies this small are read to the end
+            headers: Extra request headers
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError if the server can't be reached and nothing is cached
+        """
+        import asyncio
+        import aiohttp
+
+        path, entry, fresh = self._begin(url, ttl)
+        if fresh is not None:
+            return fresh
+
+        body = []
+        partial = False
+        try:
+            async with session.get(url, headers=self._request_headers(entry, headers),
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status != 200:
+                    content = await response.read()
+                    return self._finish(url, path, entry, response.status, response.headers, content)
+                size = 0
+                stopped = False
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    body.append(chunk)
+                    size += len(chunk)
+                    if stopped or not until(chunk, response.headers):
+                        continue
+                    stopped = True
+                    # Content-Length counts encoded bytes, so only plain bodies can be drained
+                    remaining = None
+                    if response.content_length is not None and "Content-Encoding" not in response.headers:
+                        remaining = response.content_length - size
+                    if remaining is None or remaining > drain_bytes:
+                        partial = True
+                        response.close()
+                        break
+                kept = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if entry is not None:
+                return self._response(url, entry, revalidated=False)
+            raise
+
+        content = b"".join(body)
+        with self._lock:
+            self.misses += 1
+            self.bytes_downloaded += len(content)
+        if not partial:
+            self.store(url, content, kept)
+        return HttpResponse(url, 200, kept, content, partial=partial)
+
+    def stream(self, url, ttl, session=None, timeout=10, chunk_size=64 * 1024, max_store_bytes=64 * 1024 * 1024):
+        """
+        Like get(), but yields the body in chunks as it arrives (for large files such as sitemaps).
+
+        A fresh or revalidated entry is replayed from disk. A downloaded body
+        is stored once fully read, unless it is larger than max_store_bytes.
+
+        Args:
+            url: File URL
+            ttl: Seconds an entry is served without contacting the server
+            session: requests.Session to use (default: requests module)
+            timeout: Request timeout in seconds
+            chunk_size: Bytes per yielded chunk
+            max_store_bytes: Larger bodies are streamed but not cached
+
+        Yields:
+            Body bytes (Content-Encoding already decoded)
+
+        Raises:
+            requests.RequestException (incl. HTTPError for non-200) if nothing usable is cached
+        """
+        path, entry, fresh = self._begin(url, ttl)
+        if fresh is None:
+            try:
+                response = (session or requests).get(url, headers=self._request_headers(entry, None),
+                                                     timeout=timeout, stream=True)
+            except requests.RequestException:
+                if entry is None:
+                    raise
+                fresh = self._response(url, entry, revalidated=False)
+            else:
+                if response.status_code == 304 and entry is not None:
+                    response.close()
+                    fresh = self._finish(url, path, entry, 304, response.headers, b"")
+                elif response.status_code != 200:
+                    response.close()
+                    self._finish(url, path, entry, response.status_code, response.headers, b"")
+                    raise requests.HTTPError(f"{response.status_code} for {url}", response=response)
+
+        if fresh is not None:
+            for offset in range(0, len(fresh.content), chunk_size):
+                yield fresh.content[offset:offset + chunk_size]
+            return
+
+        kept = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        body = []
+        size = 0
+        with response:
+            for chunk in response.iter_content(chunk_size):
+                size += len(chunk)
+                if size <= max_store_bytes:
+                    body.append(chunk)
+                yield chunk
+        with self._lock:
+            self.misses += 1
+            self.bytes_downloaded += size
+        if size <= max_store_bytes:
+            self.store(url, b"".join(body), kept)
+
+    def _begin(self, url, ttl):
+        """Returns (path, entry, fresh response or None)."""
+        path = self._path(url)
+        entry = self._load(path)
+        if entry is not None and time.time() - entry[0]["fetched_at"] < ttl:
+            self._touch(path)
+            with self._lock:
+                self.hits += 1
+            return path, entry, self._response(url, entry, revalidated=False)
+        return path, entry, None
+
+    def _request_headers(self, entry, headers):
+        request_headers = dict(headers or {})
+        if entry is not None:
+            meta = entry[0]
+            if meta["headers"].get("ETag"):
+                request_headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                request_headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+        return request_headers
+
+    def _finish(self, url, path, entry, status_code, headers, content):
+        if status_code == 304 and entry is not None:
+            meta, body = entry
+            meta["fetched_at"] = time.time()
+            self._write(path, meta, body)
+            with self._lock:
+                self.revalidated += 1
+            return self._response(url, (meta, body), revalidated=True)
+
+        with self._lock:
+            self.misses += 1
+            self.bytes_downloaded += len(content)
+        kept = {name: headers[name] for name in _KEPT_HEADERS if name in headers}
+        if status_code == 200:
+            self.store(url, content, kept)
+        return HttpResponse(url, status_code, kept, content)
+
+    def lookup(self, url, ttl):
+        """Returns a fresh cached HttpResponse for url (e.g. a rendered page), or None."""
+        path = self._path(url)
+        entry = self._load(path)
+        if entry is None or time.time() - entry[0]["fetched_at"] >= ttl:
+            return None
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+        return self._response(url, entry, revalidated=False)
+
+    def store(self, url, content, headers=None):
+        """Stores a 200 response body for url."""
+        meta = {"url": url, "status": 200, "headers": headers or {}, "fetched_at": time.time()}
+        self._write(self._path(url), meta, zlib.compress(content, 6))
+
+    def _response(self, url, entry, revalidated):
+        meta, body = entry
+        return HttpResponse(url, meta["status"], meta["headers"], zlib.decompress(body),
+                            from_cache=True, revalidated=revalidated)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.bin")
+
+    def _scan(self):
+        """Yields (path, mtime, size) for every cache entry."""
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".bin"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield path, st.st_mtime, st.st_size
+
+    def _load(self, path):
+        try:
+            with open(path, "rb") as f:
+                header = f.readline()
+                body = f.read()
+            return json.loads(header), body
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, meta, body):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(meta, ensure_ascii=True).encode("ascii") + b"\n")
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._size += os.path.getsize(path) - old_size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _touch(self, path):
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def _evict(self):
+        """Removes least recently used entries down to 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        for path, _, _ in sorted(self._scan(), key=lambda e: e[1]):
+            if self._size <= target:
+                break
+            self._remove(path)
+
+    def clear(self):
+        for path, _, _ in list(self._scan()):
+            self._remove(path)
+
+    def stats(self):
+        """Returns hit/revalidation/miss counters, bytes downloaded and current size."""
+        total = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.revalidated) / total if total else 0.0,
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes": self._size
+        }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_http_cache(cache_dir=".cache/http"):
+    """Returns the process-wide HttpCache for cache_dir."""
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = HttpCache(cache_dir)
+        return _caches[cache_dir]
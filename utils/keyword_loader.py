@@ -8,7 +8,7 @@ def load_keywords_from_csv(project_name, file_manager, top_n=5):
     Args:
         project_name: Name of the project
         file_manager: FileManager instance
-        top_n: Number of top keywords to return (default: 5)
+        top_n: Number of top keywords to return (default: 5, None for all)
         
     Returns:
         List of keyword strings
@@ -31,7 +31,8 @@ def load_keywords_from_csv(project_name, file_manager, top_n=5):
             df = df.sort_values('volume', ascending=False)
         
         # Get top N keywords
-        keywords = df['keyword'].head(top_n).tolist()
+        keywords = df['keyword'].dropna().astype(str)
+        keywords = (keywords if top_n is None else keywords.head(top_n)).tolist()
         
         return keywords
         
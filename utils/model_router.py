@@ -0,0 +1,134 @@
+import threading
+from collections import deque
+
+from utils.rate_limiter import get_rate_limiter
+
+# Model per tier. Cheaper/faster tiers first.
+MODEL_TIERS = {
+    "lite": "gemini-2.5-flash-lite",
+    "fast": "gemini-2.5-flash",
+    "pro": "gemini-2.5-pro",
+}
+
+# Tiers to try when the preferred one is overloaded
+TIER_FALLBACK = {
+    "lite": ["fast"],
+    "fast": ["lite"],
+    "pro": ["fast"],
+}
+
+# Task type -> tier, output cap, latency SLO (seconds) and prompt token
+# ceiling (see utils.prompt_builder). Output caps include room for 2.5
+# "thinking" tokens.
+TASK_ROUTES = {
+    "classify": {"tier": "lite", "max_output_tokens": 1024, "latency_slo": 5.0, "max_prompt_tokens": 2000},
+    "extract": {"tier": "lite", "max_output_tokens": 4096, "latency_slo": 15.0, "max_prompt_tokens": 6000},
+    "outline": {"tier": "fast", "max_output_tokens": 8192, "latency_slo": 30.0, "max_prompt_tokens": 12000},
+    "long_form": {"tier": "fast", "max_output_tokens": 16384, "latency_slo": 90.0, "max_prompt_tokens": 12000},
+    "rewrite": {"tier": "fast", "max_output_tokens": 16384, "latency_slo": 90.0, "max_prompt_tokens": 24000},
+}
+
+# Latency samples kept per task for percentile estimates
+_WINDOW = 200
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+class ModelRouter:
+    """
+    Picks the model for a task type and records observed latency.
+
+    Each task maps to a tier (model), a max output token count and a
+    latency SLO. If the tier's rate limiter is currently paused by a 429,
+    the fallback tiers are tried first; AIHandler also moves on to the next
+    candidate when a call fails with an overload error.
+    """
+
+    def __init__(self, routes=None, tiers=None, fallback=None):
+        self.routes = routes or TASK_ROUTES
+        self.tiers = tiers or MODEL_TIERS
+        self.fallback = fallback or TIER_FALLBACK
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._failures = {}
+        self._slo_misses = {}
+
+    def candidates(self, task):
+        """
+        Returns [(model_name, generation_config), ...] to try in order.
+
+        Args:
+            task: Task type (key of TASK_ROUTES)
+        """
+        if task not in self.routes:
+            raise ValueError(f"Unknown task type: {task}")
+        route = self.routes[task]
+        config = {"max_output_tokens": route["max_output_tokens"]}
+        tiers = [route["tier"]] + self.fallback.get(route["tier"], [])
+        models = []
+        for tier in tiers:
+            model_name = self.tiers[tier]
+            if model_name not in models:
+                models.append(model_name)
+
+        healthy = [m for m in models if not self._overloaded(m)]
+        overloaded = [m for m in models if m not in healthy]
+        return [(m, config) for m in healthy + overloaded]
+
+    def _overloaded(self, model_name):
+        return get_rate_limiter(model_name).metrics()["paused_for"] > 0
+
+    def record(self, task, model_name, seconds, ok=True):
+        """Records one call's latency (successful calls) or failure."""
+        with self._lock:
+            if not ok:
+                self._failures[(task, model_name)] = self._failures.get((task, model_name), 0) + 1
+                return
+            self._samples.setdefault((task, model_name), deque(maxlen=_WINDOW)).append(seconds)
+            if seconds > self.routes.get(task, {}).get("latency_slo", float("inf")):
+                self._slo_misses[task] = self._slo_misses.get(task, 0) + 1
+
+    def stats(self):
+        """
+        Returns per-task latency percentiles, SLO misses and per-model breakdown,
+        for tuning TASK_ROUTES.
+        """
+        with self._lock:
+            report = {}
+            for (task, model_name), samples in self._samples.items():
+                entry = report.setdefault(task, {"samples": [], "models": {}})
+                entry["samples"].extend(samples)
+                entry["models"][model_name] = {
+                    "count": len(samples),
+                    "p50": _percentile(samples, 50),
+                    "p95": _percentile(samples, 95),
+                    "failures": self._failures.get((task, model_name), 0)
+                }
+            for (task, model_name), count in self._failures.items():
+                entry = report.setdefault(task, {"samples": [], "models": {}})
+                entry["models"].setdefault(model_name, {"count": 0, "p50": None, "p95": None, "failures": count})
+
+            for task, entry in report.items():
+                samples = entry.pop("samples")
+                entry.update({
+                    "count": len(samples),
+                    "p50": _percentile(samples, 50),
+                    "p95": _percentile(samples, 95),
+                    "latency_slo": self.routes.get(task, {}).get("latency_slo"),
+                    "slo_misses": self._slo_misses.get(task, 0)
+                })
+            return report
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_model_router():
+    """Returns the process-wide ModelRouter."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
@@ -0,0 +1,201 @@
+import logging
+import os
+
+from utils.rate_limiter import estimate_tokens
+from utils.model_router import TASK_ROUTES
+
+DEFAULT_MAX_PROMPT_TOKENS = 8000
+# Marker appended where a section was cut
+TRUNCATED_MARKER = "... (скорочено)"
+
+logger = logging.getLogger(__name__)
+# Invalid SEO_MAX_PROMPT_TOKENS values already warned about (max_prompt_tokens runs per prompt)
+_warned_overrides = set()
+
+def max_prompt_tokens(task=None):
+    """
+    Prompt token ceiling for a task type.
+
+    TASK_ROUTES[task]["max_prompt_tokens"] sets it per task;
+    SEO_MAX_PROMPT_TOKENS caps every task (e.g. on a low-TPM tier);
+    non-integer or non-positive values are ignored with a warning.
+    """
+    ceiling = TASK_ROUTES.get(task, {}).get("max_prompt_tokens", DEFAULT_MAX_PROMPT_TOKENS)
+    override = os.getenv("SEO_MAX_PROMPT_TOKENS")
+    if override is None:
+        return ceiling
+    try:
+        value = int(override)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        if override not in _warned_overrides:
+            _warned_overrides.add(override)
+            logger.warning("Ignoring SEO_MAX_PROMPT_TOKENS=%r: expected a positive integer", override)
+        return ceiling
+    return min(ceiling, value)
+
+class Section:
+    """One variable-size part of a prompt (site text, page inventory, a document...)."""
+
+    def __init__(self, name, text, priority=1, max_tokens=None, min_tokens=0, by_lines=False, header=""):
+        """
+        Args:
+            name: Key of the section in fit()/build() results
+            text: Section content
+            priority: Lower = more important; highest numbers are cut first
+            max_tokens: Cap for this section regardless of the overall budget
+            min_tokens: Drop the section entirely rather than keep less than this
+            by_lines: Cut at line boundaries and note how many lines were left out
+                (for CSV rows and lists)
+            header: Text placed before the content; dropped together with it
+        """
+        self.name = name
+        self.text = text or ""
+        self.priority = priority
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.by_lines = by_lines
+        self.header = header
+
+class PromptBuilder:
+    """
+    Fits prompt sections into a token ceiling.
+
+    Sections are first cut to their own max_tokens; if the prompt is still
+    over the ceiling, the lowest-priority sections (ties: the one added
+    last) are shortened and then dropped until it fits. Text is cut at
+    line or sentence boundaries, never mid-word.
+
+    Usage:
+        builder = PromptBuilder(max_prompt_tokens("extract"))
+        builder.add("site", site_text, priority=2)
+        prompt = builder.build(lambda s: f"Analyze:\\n{s['site']}")
+    """
+
+    def __init__(self, max_tokens=None, count=estimate_tokens):
+        """
+        Args:
+            max_tokens: Prompt token ceiling (default: max_prompt_tokens())
+            count: Token counter (default: local estimator)
+        """
+        self.max_tokens = max_tokens or max_prompt_tokens()
+        self.count = count
+        self.sections = []
+        self.report = {}
+
+    def add(self, name, text, **options):
+        """Adds a section (see Section for options) and returns the builder."""
+        self.sections.append(Section(name, text, **options))
+        return self
+
+    def fit(self, fixed_tokens=0):
+        """
+        Returns {name: fitted text} for all sections.
+
+        Args:
+            fixed_tokens: Tokens taken by the rest of the prompt
+        """
+        budgets = {}
+        for section in self.sections:
+            tokens = self._tokens(section, section.text)
+            if section.max_tokens is not None:
+                tokens = min(tokens, section.max_tokens)
+            budgets[section.name] = tokens
+
+        overflow = fixed_tokens + sum(budgets.values()) - self.max_tokens
+        order = sorted(enumerate(self.sections), key=lambda item: (item[1].priority, item[0]), reverse=True)
+        for _, section in order:
+            if overflow <= 0:
+                break
+            cut = min(overflow, budgets[section.name])
+            budgets[section.name] -= cut
+            overflow -= cut
+            if budgets[section.name] < max(section.min_tokens, 1):
+                overflow -= budgets[section.name]
+                budgets[section.name] = 0
+
+        fitted = {}
+        self.report = {}
+        for section in self.sections:
+            text = self._fit_section(section, budgets[section.name])
+            fitted[section.name] = text
+            self.report[section.name] = {
+                "tokens": self.count(text) if text else 0,
+                "original_tokens": self._tokens(section, section.text),
+                "status": "dropped" if not text and section.text else ("trimmed" if text != self._render(section, section.text) else "full")
+            }
+        return fitted
+
+    def build(self, render):
+        """
+        Renders a prompt within the ceiling.
+
+        Args:
+            render: Callable taking {name: section text} and returning the prompt
+
+        Returns:
+            Prompt string
+        """
+        fixed_tokens = self.count(render({section.name: "" for section in self.sections}))
+        prompt = render(self.fit(fixed_tokens))
+        # Glue text added by render() around non-empty sections isn't in the
+        # fixed part - refit with the excess reserved
+        for _ in range(3):
+            excess = self.count(prompt) - self.max_tokens
+            if excess <= 0:
+                break
+            fixed_tokens += excess
+            prompt = render(self.fit(fixed_tokens))
+        return prompt
+
+    def _render(self, section, content):
+        return f"{section.header}{content}" if content else ""
+
+    def _tokens(self, section, content):
+        return self.count(self._render(section, content)) if content else 0
+
+    def _fit_section(self, section, budget):
+        if budget <= 0 or not section.text:
+            return ""
+        if self._tokens(section, section.text) <= budget:
+            return self._render(section, section.text)
+        budget -= self.count(section.header)
+        content = self._cut_lines(section.text, budget) if section.by_lines else self._cut_text(section.text, budget)
+        return self._render(section, content) if content else ""
+
+    def _cut_lines(self, text, budget):
+        lines = text.splitlines()
+        kept = []
+        used = 0
+        for line in lines:
+            tokens = self.count(line + "\n")
+            # Leave room for the omission note
+            if used + tokens > budget - 12:
+                break
+            kept.append(line)
+            used += tokens
+        if not kept:
+            return ""
+        return "\n".join(kept) + f"\n... (ще {len(lines) - len(kept)} рядків пропущено)"
+
+    def _cut_text(self, text, budget):
+        budget -= self.count(TRUNCATED_MARKER)
+        if budget <= 0:
+            return ""
+        # Binary search for the longest prefix within budget
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(text[:mid]) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        prefix = text[:low]
+        # Prefer a sentence end, then any whitespace, in the last fifth of the prefix
+        boundary = max(prefix.rfind(". "), prefix.rfind("\n"))
+        if boundary < len(prefix) * 0.8:
+            boundary = prefix.rfind(" ")
+        if boundary > 0:
+            prefix = prefix[:boundary + 1]
+        return prefix.rstrip() + TRUNCATED_MARKER
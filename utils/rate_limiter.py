@@ -0,0 +1,223 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# Published free-tier quota per model (requests / tokens per minute).
+# Override with SEO_RPM_<MODEL> / SEO_TPM_<MODEL> (e.g. SEO_RPM_GEMINI_2_5_FLASH=1000),
+# SEO_RPM / SEO_TPM for every model, or via get_rate_limiter().
+MODEL_LIMITS = {
+    "gemini-2.5-flash": {"rpm": 10, "tpm": 250_000},
+    "gemini-2.5-flash-lite": {"rpm": 15, "tpm": 250_000},
+    "gemini-2.5-pro": {"rpm": 5, "tpm": 250_000},
+}
+DEFAULT_LIMITS = {"rpm": 10, "tpm": 250_000}
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Pause applied on a 429 that carries no retry hint
+DEFAULT_BACKOFF_SECONDS = 10.0
+# Tokens reserved for the model output when admitting a request
+OUTPUT_TOKEN_RESERVE = 1024
+
+_RETRY_HINT_PATTERNS = [
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE),
+]
+
+def parse_retry_after(error_text):
+    """Extracts the server retry hint (seconds) from an error message, or None."""
+    for pattern in _RETRY_HINT_PATTERNS:
+        match = pattern.search(error_text)
+        if match:
+            return float(match.group(1))
+    return None
+
+# Average characters per token: Latin text vs. Cyrillic and other non-ASCII
+_ASCII_CHARS_PER_TOKEN = 4.0
+_NON_ASCII_CHARS_PER_TOKEN = 2.5
+
+def estimate_tokens(text):
+    """
+    Cheap local token estimate, used for admission control and prompt budgets.
+
+    Ukrainian text tokenizes much denser than English, so non-ASCII
+    characters (counted via their extra UTF-8 bytes) weigh more.
+    """
+    non_ascii = min(len(text), len(text.encode("utf-8", "ignore")) - len(text))
+    ascii_chars = len(text) - non_ascii
+    return int(ascii_chars / _ASCII_CHARS_PER_TOKEN + non_ascii / _NON_ASCII_CHARS_PER_TOKEN) + 1
+
+class TokenBucket:
+    """Continuous-refill token bucket."""
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def time_until(self, amount, now):
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        # May go negative when actual usage exceeds the estimate - that debt delays later callers
+        self.tokens -= amount
+
+    def refund(self, amount):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """
+    Process-wide admission control for one model.
+
+    Requests wait in a FIFO queue and are admitted only when both the
+    requests-per-minute and tokens-per-minute buckets have budget and fewer
+    than max_concurrency calls are in flight. A 429 with a retry hint pauses
+    admissions for everybody, so callers back off once instead of
+    independently retrying into the same wall.
+    """
+
+    def __init__(self, rpm, tpm, max_concurrency=DEFAULT_MAX_CONCURRENCY, period=60.0):
+        """
+        Args:
+            rpm: Requests per period
+            tpm: Tokens per period
+            max_concurrency: Max calls in flight at once
+            period: Bucket window in seconds (60 for real quotas)
+        """
+        self.requests = TokenBucket(rpm, period)
+        self.tokens = TokenBucket(tpm, period)
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._active = 0
+        self._paused_until = 0.0
+
+        # Metrics
+        self.admitted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self, est_tokens):
+        """
+        Blocks until the call is within budget. Returns seconds spent waiting.
+
+        Args:
+            est_tokens: Estimated tokens (prompt + output reserve) for this call
+        """
+        ticket = object()
+        start = time.monotonic()
+        with self._cond:
+            self._queue.append(ticket)
+            while True:
+                now = time.monotonic()
+                wait = None
+                if self._queue[0] is ticket and self._active < self.max_concurrency:
+                    wait = max(
+                        self._paused_until - now,
+                        self.requests.time_until(1, now),
+                        self.tokens.time_until(est_tokens, now)
+                    )
+                    if wait <= 0:
+                        self.requests.consume(1)
+                        self.tokens.consume(est_tokens)
+                        self._queue.popleft()
+                        self._active += 1
+                        break
+                self._cond.wait(timeout=wait)
+
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self._cond.notify_all()
+        return waited
+
+    def release(self, est_tokens, actual_tokens=None):
+        """
+        Marks a call as finished and reconciles the token estimate with real usage.
+
+        Args:
+            est_tokens: Value passed to acquire()
+            actual_tokens: Total tokens reported by the API, if known
+        """
+        with self._cond:
+            self._active -= 1
+            if actual_tokens is not None:
+                if actual_tokens > est_tokens:
+                    self.tokens.consume(actual_tokens - est_tokens)
+                else:
+                    self.tokens.refund(est_tokens - actual_tokens)
+            self._cond.notify_all()
+
+    def backoff(self, seconds):
+        """Pauses all admissions for `seconds` (server retry hint)."""
+        with self._cond:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Returns queue depth, in-flight count and wait-time statistics."""
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "in_flight": self._active,
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+                "avg_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+                "max_wait": self.max_wait,
+                "paused_for": max(0.0, self._paused_until - time.monotonic())
+            }
+
+def env_limits(model_name):
+    """
+    rpm / tpm set in the environment for a model (paid-tier keys).
+
+    SEO_RPM_<MODEL> / SEO_TPM_<MODEL> win over SEO_RPM / SEO_TPM; <MODEL> is the
+    model name upper-cased with non-alphanumerics as "_". Invalid values are ignored.
+    """
+    suffix = re.sub(r"[^A-Z0-9]", "_", model_name.upper())
+    limits = {}
+    for key in ("rpm", "tpm"):
+        for name in (f"SEO_{key.upper()}_{suffix}", f"SEO_{key.upper()}"):
+            try:
+                value = int(os.getenv(name, ""))
+            except ValueError:
+                continue
+            if value > 0:
+                limits[key] = value
+                break
+    return limits
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(model_name, **overrides):
+    """
+    Returns the shared RateLimiter for a model, creating it on first use.
+
+    Args:
+        model_name: Gemini model name
+        **overrides: rpm / tpm / max_concurrency used when the limiter is created
+            (take precedence over env_limits())
+    """
+    with _limiters_lock:
+        if model_name not in _limiters:
+            limits = dict(MODEL_LIMITS.get(model_name, DEFAULT_LIMITS))
+            limits.update(env_limits(model_name))
+            limits.update(overrides)
+            _limiters[model_name] = RateLimiter(**limits)
+        return _limiters[model_name]
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+import time
+
+RESEARCH_FILENAME = "research.jsonl"
+
+class ResearchStore:
+    """
+    Append-only per-project store of SERP research results.
+
+    One JSON line per analysed topic, appended as soon as the topic
+    finishes, so an interrupted bulk run loses at most the topics in
+    flight. A topic may appear several times (retries, re-runs); the
+    latest line wins.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: JSONL file, e.g. projects/<brand>/research.jsonl
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_project(cls, project_name, base_dir="projects"):
+        return cls(os.path.join(base_dir, project_name, RESEARCH_FILENAME))
+
+    def append(self, record):
+        """Appends one topic result (a dict with at least "topic")."""
+        record = dict(record, saved_at=time.time())
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def load(self):
+        """
+        Returns the latest record per topic, in first-seen order.
+
+        A truncated last line (process killed mid-write) is skipped.
+        """
+        records = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    records[record["topic"]] = record
+        except OSError:
+            pass
+        return list(records.values())
+
+    def done_topics(self):
+        """Topics with a successful result - skipped when a run resumes."""
+        return {r["topic"] for r in self.load() if not r.get("error")}
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
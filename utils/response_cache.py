@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+class CachedResponse:
+    """Minimal stand-in for GenerateContentResponse when served from cache."""
+
+    def __init__(self, text):
+        self.text = text
+        self.from_cache = True
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for LLM responses.
+
+    Each entry is a small JSON file named by the SHA-256 of
+    (model name, generation config, prompt). File mtime doubles as the
+    LRU clock: hits touch the file, eviction removes the oldest files
+    until the directory fits into max_bytes again.
+    """
+
+    def __init__(self, cache_dir=".cache/llm", max_bytes=50 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory for cache entries (created if missing)
+            max_bytes: Size bound for the whole cache directory
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._scan())
+
+    @staticmethod
+    def make_key(model_name, generation_config, prompt):
+        """Returns the content hash used as cache key."""
+        payload = json.dumps(
+            {"model": model_name, "config": generation_config or {}, "prompt": prompt},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scan(self):
+        """Yields (path, mtime, size) for every cache entry."""
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield path, st.st_mtime, st.st_size
+
+    def get(self, key, ttl):
+        """
+        Returns cached text for key, or None on miss / expiry.
+
+        Args:
+            key: Cache key from make_key()
+            ttl: Max entry age in seconds
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get("created_at", 0) > ttl:
+            self._remove(path)
+            with self._lock:
+                self.expired += 1
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry.get("text")
+
+    def set(self, key, text):
+        """Stores text under key and evicts old entries if over budget."""
+        path = self._path(key)
+        data = json.dumps({"created_at": time.time(), "text": text}, ensure_ascii=False)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._size += os.path.getsize(path) - old_size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def delete(self, key):
+        """Drops the entry for key (e.g. text that turned out to be unusable)."""
+        self._remove(self._path(key))
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def _evict(self):
+        """Removes least recently used entries down to 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        for path, _, _ in sorted(self._scan(), key=lambda e: e[1]):
+            if self._size <= target:
+                break
+            self._remove(path)
+
+    def clear(self):
+        for path, _, _ in list(self._scan()):
+            self._remove(path)
+
+    def stats(self):
+        """Returns hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self._size
+        }
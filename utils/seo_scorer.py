@@ -1,5 +1,6 @@
 import textstat
-from bs4 import BeautifulSoup
+
+from utils.html_extract import HtmlDoc
 
 def calculate_seo_score(html_content, target_keywords, tov_rules):
     """
@@ -9,8 +10,8 @@ def calculate_seo_score(html_content, target_keywords, tov_rules):
     max_score = 100
     feedback = []
 
-    soup = BeautifulSoup(html_content, 'html.parser')
-    text_content = soup.get_text()
+    doc = HtmlDoc(html_content)
+    text_content = doc.text()
 
     # 1. Keyword Presence (30 points)
     found_keywords = []
@@ -50,22 +51,21 @@ def calculate_seo_score(html_content, target_keywords, tov_rules):
 
     # 3. HTML Structure (30 points)
     # Check H1
-    if len(soup.find_all('h1')) == 1:
+    if doc.count('h1') == 1:
         score += 10
     else:
         feedback.append("Document must have exactly one H1 tag.")
     
     # Check H2/H3 hierarchy
-    h2s = soup.find_all('h2')
-    if h2s:
+    if doc.count('h2'):
         score += 10
     else:
         feedback.append("Document lacks H2 headings.")
 
     # Check Images/Alt
-    imgs = soup.find_all('img')
+    imgs = doc.images()
     if imgs:
-        missing_alt = [img for img in imgs if not img.get('alt')]
+        missing_alt = [img for img in imgs if not img['alt']]
         if not missing_alt:
             score += 10
         else:
@@ -0,0 +1,101 @@
+import os
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical calls.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight block on the same future and get its result (or exception).
+    Nothing is remembered once the call completes - persistence is the
+    response cache's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Runs fn() once per key among concurrent callers.
+
+        Args:
+            key: Identity of the call (e.g. response cache key)
+            fn: Zero-argument callable
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "shared": self.shared}
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, for coordinating worker processes.
+
+    Usage:
+        with FileLock(path):
+            ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.name == "nt":
+            import msvcrt
+            import time
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 s - keep waiting
+                    time.sleep(0.1)
+        else:
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if os.name == "nt":
+                import msvcrt
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            # The file itself is left in place: unlinking it would let a third
+            # process lock a fresh inode while another still waits on the old one
+            os.close(self._fd)
+            self._fd = None
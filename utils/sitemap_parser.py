@@ -1,107 +1,322 @@
-import requests
-from bs4 import BeautifulSoup
+import concurrent.futures
+import queue
+import threading
+import zlib
+from collections import namedtuple
+
 import pandas as pd
-from urllib.parse import urlparse
+from lxml import etree
+
+from utils.http_cache import get_http_cache, HTTP_TTL_SITEMAP, HTTP_TTL_PAGE
+from utils.crawler import crawl_pages
+
+# One <url> (or <sitemap>) record; missing fields are None
+SitemapEntry = namedtuple("SitemapEntry", ["loc", "lastmod", "changefreq", "priority"])
 
-def ingest_sitemap(url, max_pages=10000):
+_GZIP_MAGIC = b"\x1f\x8b"
+_TRAVERSAL_DONE = object()
+
+# Child sitemaps of an index read at once
+SITEMAP_WORKERS = 8
+# Levels of nested sitemap indexes followed
+MAX_SITEMAP_DEPTH = 3
+# Page records buffered between the sitemap readers and the crawler
+SITEMAP_QUEUE_SIZE = 1000
+
+def parse_sitemap(chunks):
     """
-    Parses a sitemap XML (handles nested sitemaps) and extracts URL, Title, and H1.
-    Uses ThreadPoolExecutor for concurrent crawling.
-    Returns a DataFrame.
+    Parses a sitemap incrementally from byte chunks.
+
+    Gzipped files (.xml.gz) are decompressed on the fly, and every record
+    is freed once yielded, so memory stays flat however many URLs the
+    file lists.
+
+    Args:
+        chunks: Iterable of body bytes
+
+    Yields:
+        (kind, SitemapEntry) - kind is "url" for pages, "sitemap" for index entries
     """
-    import concurrent.futures
-    import time
-    
-    all_urls = []
-    
-    def fetch_urls(sitemap_url):
-        try:
-            response = requests.get(sitemap_url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'xml')
-            
-            # Check for nested sitemaps
-            sitemaps = soup.find_all('sitemap')
-            if sitemaps:
-                # print(f"Found nested sitemap index: {sitemap_url}")
-                for sm in sitemaps:
-                    loc = sm.find('loc')
-                    if loc:
-                        fetch_urls(loc.text)
-            else:
-                # Standard urlset
-                locs = soup.find_all('loc')
-                # print(f"Found {len(locs)} URLs in {sitemap_url}")
-                for loc in locs:
-                    all_urls.append(loc.text)
-                    
-        except Exception as e:
-            # print(f"Error fetching sitemap {sitemap_url}: {e}")
-            pass
-
-    # 1. Collect all URLs
-    # print(f"Fetching sitemap structure from: {url}")
-    fetch_urls(url)
-    
-    # Remove duplicates
-    unique_urls = list(set(all_urls))
-    # print(f"Total unique URLs found: {len(unique_urls)}")
-    
-    # Limit if specified (default is high)
-    target_urls = unique_urls[:max_pages]
-    
-    data = []
-    processed_count = 0
-    total_count = len(target_urls)
-    
-    # Session for connection pooling - NOT thread safe to share!
-    # We will create a session per request or just use requests.get (which is fine for this volume)
-    # Or better: create a session inside the thread.
-    
-    def process_url(page_url):
-        nonlocal processed_count
+    parser = etree.XMLPullParser(events=("end",), recover=True, resolve_entities=False, huge_tree=True)
+    inflater = None
+    first = True
+    for chunk in chunks:
+        if first:
+            first = False
+            if chunk[:2] == _GZIP_MAGIC:
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if inflater is not None:
+            chunk = inflater.decompress(chunk)
+        parser.feed(chunk)
+        yield from _read_records(parser)
+    if inflater is not None:
+        parser.feed(inflater.flush())
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    yield from _read_records(parser)
+
+def _read_records(parser):
+    for _, el in parser.read_events():
+        if not isinstance(el.tag, str):
+            continue
+        kind = etree.QName(el).localname
+        if kind not in ("url", "sitemap"):
+            continue
+        fields = {etree.QName(child).localname: (child.text or "").strip()
+                  for child in el if isinstance(child.tag, str)}
+        if fields.get("loc"):
+            yield kind, SitemapEntry(fields["loc"], fields.get("lastmod") or None,
+                                     fields.get("changefreq") or None, fields.get("priority") or None)
+        # Free the record and everything parsed before it
+        el.clear()
+        while el.getprevious() is not None:
+            del el.getparent()[0]
+
+class SitemapReport:
+    """What a sitemap traversal read: pages, children and errors per sitemap file."""
+
+    def __init__(self):
+        self.sitemaps = {}
+        self._lock = threading.Lock()
+
+    def record(self, url, parent, depth, pages=0, children=0, error=None):
+        with self._lock:
+            self.sitemaps[url] = {"parent": parent, "depth": depth, "pages": pages, "children": children, "error": error}
+
+    def errors(self):
+        """{sitemap_url: error} for files that failed or were skipped."""
+        with self._lock:
+            return {url: info["error"] for url, info in self.sitemaps.items() if info["error"]}
+
+    def as_dict(self):
+        """Totals plus, per index file, its children count and failed children."""
+        with self._lock:
+            indexes = {}
+            for url, info in self.sitemaps.items():
+                if info["children"]:
+                    indexes.setdefault(url, {"children": info["children"], "failed": {}})
+            for url, info in self.sitemaps.items():
+                if info["error"] and info["parent"]:
+                    indexes.setdefault(info["parent"], {"children": 0, "failed": {}})["failed"][url] = info["error"]
+            return {
+                "sitemaps": len(self.sitemaps),
+                "pages": sum(info["pages"] for info in self.sitemaps.values()),
+                "errors": sum(1 for info in self.sitemaps.values() if info["error"]),
+                "indexes": indexes
+            }
+
+def iter_sitemap(url, http_cache=None, session=None, workers=SITEMAP_WORKERS, max_depth=MAX_SITEMAP_DEPTH,
+                 report=None, ttl=HTTP_TTL_SITEMAP):
+    """
+    Streams page records from a sitemap or sitemap index.
+
+    Child sitemaps of an index are downloaded and parsed concurrently.
+    Every file is read once (an index listing itself or an ancestor is
+    skipped), indexes nested deeper than max_depth are not followed, and
+    failures are recorded per file instead of ending the traversal.
+    Records pass through a bounded queue, so readers wait while the
+    consumer (the crawler's work queue) is full.
+
+    Args:
+        url: Sitemap URL (.xml or .xml.gz)
+        http_cache: HttpCache for the sitemap files (default: process-wide cache)
+        session: requests.Session to use
+        workers: Sitemap files read at once
+        max_depth: Levels of nested indexes followed below url
+        report: SitemapReport to fill (optional)
+        ttl: HTTP cache freshness of the sitemap files (0 = always revalidate)
+
+    Yields:
+        SitemapEntry for every page (file order within each sitemap)
+    """
+    http_cache = http_cache or get_http_cache()
+    report = report if report is not None else SitemapReport()
+    out = queue.Queue(maxsize=SITEMAP_QUEUE_SIZE)
+    stop = threading.Event()
+    lock = threading.Lock()
+    seen = set()
+    in_flight = [0]
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sitemap-reader")
+
+    def put(item):
+        # Gives up once the consumer is gone, so no reader blocks forever
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def submit(sitemap_url, depth, parent):
+        with lock:
+            if sitemap_url in seen or stop.is_set():
+                return
+            seen.add(sitemap_url)
+            if depth > max_depth:
+                report.record(sitemap_url, parent, depth, error=f"Skipped: nested deeper than {max_depth} levels")
+                return
+            in_flight[0] += 1
+        executor.submit(read, sitemap_url, depth, parent)
+
+    def read(sitemap_url, depth, parent):
+        pages = children = 0
+        error = None
         try:
-            # Create a new session for thread safety (or just use requests.get)
-            with requests.Session() as session:
-                session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'})
-                
-                page_res = session.get(page_url, timeout=10)
-                
-                if page_res.status_code == 200:
-                    page_soup = BeautifulSoup(page_res.content, 'html.parser')
-                    title = page_soup.title.string.strip() if page_soup.title and page_soup.title.string else ""
-                    
-                    h1_tag = page_soup.find('h1')
-                    h1 = h1_tag.get_text(strip=True) if h1_tag else ""
-                    
-                    if not h1:
-                        h1 = title
-                    
-                    # Print progress every 10 pages to avoid spamming terminal
-                    # if processed_count % 10 == 0:
-                    #    print(f"Processed {processed_count}/{total_count}")
-                    
-                    return {
-                        "url": page_url,
-                        "title": title,
-                        "h1": h1
-                    }
+            # Unchanged sitemaps are replayed from disk or revalidated with a 304
+            for kind, entry in parse_sitemap(http_cache.stream(sitemap_url, ttl, session=session)):
+                if kind == "sitemap":
+                    children += 1
+                    submit(entry.loc, depth + 1, sitemap_url)
+                elif put(entry):
+                    pages += 1
+                else:
+                    break
         except Exception as e:
-            # print(f"Failed to parse {page_url}: {e}")
-            pass
+            error = str(e)
         finally:
-            processed_count += 1
-            
-        return None
-
-    # 2. Concurrent Crawling
-    # Reduce workers to 5 to be safer and avoid overwhelming the server/local network
-    # print(f"Starting concurrent crawl of {total_count} pages with 5 workers...")
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        results = list(executor.map(process_url, target_urls))
-        
-    # Filter None results
-    data = [r for r in results if r]
-            
-    return pd.DataFrame(data)
+            report.record(sitemap_url, parent, depth, pages, children, error)
+            with lock:
+                in_flight[0] -= 1
+                finished = in_flight[0] == 0
+            if finished:
+                put(_TRAVERSAL_DONE)
+
+    submit(url, 0, None)
+    try:
+        while True:
+            item = out.get()
+            if item is _TRAVERSAL_DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def ingest_sitemap(url, max_pages=10000, concurrency=None, on_progress=None):
+    """
+    Parses a sitemap XML (handles nested sitemaps and .gz) and extracts URL, Title, and H1.
+    Pages are crawled by the async crawler (utils.crawler) while the sitemap is still being read.
+    Returns a DataFrame; df.attrs["crawl_stats"] holds throughput (pages_per_sec) and counters,
+    df.attrs["sitemap_report"] the sitemap files read and the failures per index.
+
+    Args:
+        url: Sitemap or sitemap index URL
+        max_pages: Max pages crawled
+        concurrency: Pages in flight at once (default: SEO_CRAWL_CONCURRENCY or 32)
+        on_progress: Called with a utils.crawler.CrawlStats after every page
+    """
+    report = SitemapReport()
+
+    def page_urls():
+        # Unique URLs in sitemap order, up to max_pages
+        seen = set()
+        for entry in iter_sitemap(url, report=report):
+            if entry.loc in seen:
+                continue
+            seen.add(entry.loc)
+            yield entry.loc
+            if len(seen) >= max_pages:
+                return
+
+    # Concurrent Crawling - one pooled keep-alive client, fed by the streaming reader
+    data, stats = crawl_pages(page_urls(), concurrency=concurrency, on_progress=on_progress)
+
+    df = pd.DataFrame(data, columns=["url", "title", "h1"])
+    df.attrs["crawl_stats"] = stats
+    df.attrs["sitemap_report"] = report.as_dict()
+    return df
+
+def refresh_sitemap(url, state, max_pages=10000, concurrency=None, on_progress=None, full=False):
+    """
+    Incremental re-crawl: fetches only pages that are new or may have changed.
+
+    A page listed with the same lastmod as in state is not requested at all.
+    Every other page is fetched with ttl=0 as a conditional request
+    (If-None-Match / If-Modified-Since, from the HTTP cache or else from the
+    ETag / Last-Modified stored in state), so an unchanged page costs a 304. URLs that left the sitemap are dropped,
+    but only when every sitemap file was read and max_pages was not reached,
+    so a failed child sitemap never deletes its pages.
+
+    Args:
+        url: Sitemap or sitemap index URL
+        state: utils.crawl_state.CrawlState - updated in place, not saved
+        max_pages: Max pages listed
+        concurrency: Pages in flight at once (default: SEO_CRAWL_CONCURRENCY or 32)
+        on_progress: Called with a utils.crawler.CrawlStats after every page
+        full: Fetch every listed page (HTTP cache TTL applies) and return all of them as changed
+
+    Returns:
+        dict with "pages" (DataFrame of every known page, the pages.csv layout),
+        "changed" (DataFrame of new and changed pages - the ones to index),
+        "removed" (URLs gone from the sitemap), "counts" (listed, new, changed,
+        unchanged, skipped, removed, failed), "crawl_stats" and "sitemap_report"
+    """
+    report = SitemapReport()
+    listed = {}
+    truncated = []
+
+    def page_urls():
+        # Unique URLs up to max_pages; those with an unchanged lastmod are not fetched.
+        # The sitemap itself is always revalidated - a cached copy would hide changes
+        for entry in iter_sitemap(url, report=report, ttl=0):
+            if entry.loc in listed:
+                continue
+            if len(listed) >= max_pages:
+                truncated.append(entry.loc)
+                return
+            listed[entry.loc] = entry.lastmod
+            known = state.get(entry.loc)
+            if not full and known and entry.lastmod and known["lastmod"] == entry.lastmod:
+                continue
+            yield entry.loc
+
+    data, stats = crawl_pages(page_urls(), concurrency=concurrency, ttl=HTTP_TTL_PAGE if full else 0,
+                              on_progress=on_progress, validators=None if full else state.pages)
+
+    counts = {"listed": len(listed), "new": 0, "changed": 0, "unchanged": 0,
+              "skipped": len(listed) - stats["total"], "removed": 0, "failed": stats["failed"]}
+    changed = []
+    for record in data:
+        known = state.get(record["url"])
+        if record["not_modified"]:
+            # 304 to the stored validators - keep what was extracted last time
+            counts["unchanged"] += 1
+            state.update(record["url"], known["title"], known["h1"], lastmod=listed.get(record["url"]),
+                         etag=record["etag"] or known.get("etag"),
+                         last_modified=record["last_modified"] or known.get("last_modified"),
+                         content_hash=known.get("content_hash"))
+            continue
+        if known is None:
+            counts["new"] += 1
+            changed.append(record)
+        elif (known["title"], known["h1"]) != (record["title"], record["h1"]) or (
+                # Hashes exist only for fully read bodies
+                known.get("content_hash") and record["content_hash"]
+                and known["content_hash"] != record["content_hash"]):
+            counts["changed"] += 1
+            changed.append(record)
+        else:
+            counts["unchanged"] += 1
+            if full:
+                changed.append(record)
+        state.update(record["url"], record["title"], record["h1"], lastmod=listed.get(record["url"]),
+                     etag=record["etag"], last_modified=record["last_modified"],
+                     content_hash=record["content_hash"])
+
+    removed = []
+    if not truncated and not report.errors():
+        removed = [page_url for page_url in list(state.pages) if page_url not in listed]
+        state.remove(removed)
+    counts["removed"] = len(removed)
+
+    return {
+        "pages": state.to_dataframe(),
+        "changed": pd.DataFrame(changed, columns=["url", "title", "h1"]),
+        "removed": removed,
+        "counts": counts,
+        "crawl_stats": stats,
+        "sitemap_report": report.as_dict()
+    }
@@ -0,0 +1,214 @@
+import json
+import re
+
+# Per-task response schemas (OpenAPI subset understood by Gemini response_schema)
+SCHEMAS = {
+    "topic_ideas": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"title": {"type": "string"}, "description": {"type": "string"}},
+            "required": ["title", "description"]
+        }
+    },
+    "keywords": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"keyword": {"type": "string"}, "type": {"type": "string"}},
+            "required": ["keyword", "type"]
+        }
+    },
+    "serp_intent": {
+        "type": "object",
+        "properties": {
+            "intent": {"type": "string"},
+            "features": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["intent", "features"]
+    },
+    "string_list": {
+        "type": "array",
+        "items": {"type": "string"}
+    },
+    "competitor_tov": {
+        "type": "object",
+        "properties": {
+            "emotional_tone": {
+                "type": "string",
+                "enum": ["Нейтральний", "Дружній", "Серйозний", "Веселий", "Натхненний", "Експертний"]
+            },
+            "formality_level": {
+                "type": "string",
+                "enum": ["Дуже офіційний", "Офіційний", "Середній", "Нейтральний", "Дружній", "Дуже дружній"]
+            },
+            "unique_trait": {"type": "string"},
+            "values": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["emotional_tone", "formality_level", "unique_trait", "values"]
+    },
+    "outline": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "sections": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "heading": {"type": "string"},
+                        "subheadings": {"type": "array", "items": {"type": "string"}},
+                        "notes": {"type": "string"}
+                    },
+                    "required": ["heading", "subheadings", "notes"]
+                }
+            },
+            "faq": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["title", "sections", "faq"]
+    }
+}
+
+# Model families that accept response_mime_type / response_schema
+_JSON_MODE_MODELS = ("gemini-1.5", "gemini-2", "gemini-3")
+
+def supports_json_mode(model_name):
+    """True if the model can be asked for schema-constrained JSON natively."""
+    name = model_name.split("/")[-1]
+    return name.startswith(_JSON_MODE_MODELS)
+
+def json_generation_config(model_name, schema):
+    """Generation config enabling native JSON mode, or None if unsupported."""
+    if not supports_json_mode(model_name):
+        return None
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+def _close_truncated(text):
+    """
+    Closes strings/brackets left open by a truncated response.
+
+    Incomplete trailing members (`"key":`, `"key"` or a dangling comma) are
+    dropped before closing, so `[{"a": 1}, {"b": ` becomes `[{"a": 1}]`.
+    """
+    stack = []
+    in_string = False
+    escape = False
+    last_safe = 0  # Index after the last complete value inside a container
+    safe_stack = []
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+        elif ch in "]}":
+            if stack:
+                stack.pop()
+            last_safe, safe_stack = i + 1, list(stack)
+        elif ch == ",":
+            last_safe, safe_stack = i, list(stack)
+
+    if not stack and not in_string:
+        return text
+
+    # Cut back to the last complete member, then close what is still open
+    head = text[:last_safe] if last_safe else text
+    closers = safe_stack if last_safe else stack
+    if in_string and not last_safe:
+        head += '"'
+    head = head.rstrip().rstrip(",")
+    return head + "".join(reversed(closers))
+
+def parse_json(text):
+    """
+    Tolerant JSON parser for LLM output.
+
+    Handles Markdown fences, prose before/after the payload, trailing
+    commas and truncated output.
+
+    Raises:
+        ValueError: If the text cannot be repaired into JSON
+    """
+    if text is None:
+        raise ValueError("Empty response")
+    cleaned = _FENCE_RE.sub("", text).strip()
+    try:
+        return json.loads(cleaned)
+    except ValueError:
+        pass
+
+    # Strip prose wrappers: start at the first bracket, end at the last matching one
+    starts = [i for i in (cleaned.find("{"), cleaned.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON payload found")
+    start = min(starts)
+    closer = "}" if cleaned[start] == "{" else "]"
+    end = cleaned.rfind(closer)
+    candidate = cleaned[start:end + 1] if end > start else cleaned[start:]
+
+    for attempt in (candidate, cleaned[start:]):
+        repaired = _TRAILING_COMMA_RE.sub(r"\1", attempt)
+        for variant in (repaired, _close_truncated(repaired)):
+            try:
+                return json.loads(_TRAILING_COMMA_RE.sub(r"\1", variant))
+            except ValueError:
+                continue
+    raise ValueError("Could not repair JSON")
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+}
+
+def matches_schema(value, schema):
+    """Lightweight structural validation (types and required keys only)."""
+    check = _TYPE_CHECKS.get(schema.get("type"))
+    if check and not check(value):
+        return False
+    if isinstance(value, dict):
+        if any(key not in value for key in schema.get("required", [])):
+            return False
+        props = schema.get("properties", {})
+        return all(matches_schema(value[k], props[k]) for k in props if k in value)
+    if isinstance(value, list) and "items" in schema:
+        return all(matches_schema(item, schema["items"]) for item in value)
+    return True
+
+def parse_structured(text, schema, fallback=None):
+    """Parses and validates LLM output, returning fallback if either step fails."""
+    try:
+        value = parse_json(text)
+    except ValueError:
+        return fallback
+    return value if matches_schema(value, schema) else fallback
+
+def has_json_payload(text):
+    """True if the text contains something JSON-like to repair (not just a refusal or prose)."""
+    return bool(text) and ("{" in text or "[" in text)
+
+def repair_prompt(broken_text, schema):
+    """Cheap re-ask: fix the existing output instead of regenerating it."""
+    return f"""
+        The following output was supposed to be valid JSON matching this JSON schema, but it could not be parsed.
+        Fix it WITHOUT changing the content. Return ONLY the corrected JSON.
+
+        Schema:
+        {json.dumps(schema, ensure_ascii=False)}
+
+        Output:
+        {broken_text}
+        """
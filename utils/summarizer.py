@@ -0,0 +1,156 @@
+from utils.ai_handler import CACHE_TTL_WEEK
+from utils.prompt_builder import PromptBuilder
+from utils.rate_limiter import estimate_tokens
+
+# Tokens of source text per map call
+SUMMARY_CHUNK_TOKENS = 3000
+# Chunks per source at most; beyond that the tail is trimmed rather than mapped
+SUMMARY_MAX_CHUNKS = 16
+
+def split_chunks(text, chunk_tokens=SUMMARY_CHUNK_TOKENS, count=estimate_tokens):
+    """
+    Splits text into chunks of about chunk_tokens, on paragraph/sentence boundaries.
+
+    Args:
+        text: Source text
+        chunk_tokens: Target tokens per chunk
+        count: Token counter
+
+    Returns:
+        List of chunk strings (in order, covering the whole text)
+    """
+    units = []
+    for paragraph in text.split("\n"):
+        if count(paragraph) <= chunk_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in paragraph.replace(". ", ".\n").split("\n"):
+            # Text without punctuation (lists, tables) - hard split by characters
+            step = max(1, int(len(sentence) * chunk_tokens / max(1, count(sentence))))
+            units.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+
+    chunks, current, current_tokens = [], [], 0
+    for unit in units:
+        tokens = count(unit)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+class Summarizer:
+    """
+    Map-reduce condensing of long texts through AIHandler.
+
+    Text that already fits the budget is returned as is. Longer text is
+    split into chunks, and every chunk is summarized with the caller's
+    focus in parallel (generate_many). Each map prompt embeds its chunk,
+    so the response cache keys results by chunk content: re-analysing a
+    page where only one section changed costs one call. The chunk notes
+    are joined in order; a reduce call runs only if they still exceed the
+    budget, otherwise the caller's own analysis prompt is the reduce step.
+    """
+
+    def __init__(self, ai_handler, chunk_tokens=SUMMARY_CHUNK_TOKENS, max_concurrency=6, count=estimate_tokens):
+        """
+        Args:
+            ai_handler: AIHandler for the map/reduce calls
+            chunk_tokens: Tokens of source text per map call
+            max_concurrency: Map calls in flight at once
+            count: Token counter
+        """
+        self.ai_handler = ai_handler
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max_concurrency
+        self.count = count
+
+    def condense(self, text, focus, max_tokens):
+        """
+        Condenses one text to about max_tokens, keeping what matters for focus.
+
+        Args:
+            text: Source text
+            focus: What the notes should keep (e.g. "tone of voice and style")
+            max_tokens: Token budget for the result
+
+        Returns:
+            The text itself if it fits, otherwise ordered chunk notes
+        """
+        return self.condense_many([text], focus, max_tokens)[0]
+
+    def condense_many(self, texts, focus, max_tokens):
+        """
+        condense() for several sources at once - all their chunks go out as one parallel batch.
+
+        Returns:
+            List of condensed texts in input order
+        """
+        plans = []
+        prompts = []
+        for text in texts:
+            text = text or ""
+            if self.count(text) <= max_tokens:
+                plans.append(None)
+                continue
+            chunks = split_chunks(text, self.chunk_tokens, self.count)
+            if len(chunks) > SUMMARY_MAX_CHUNKS:
+                chunks = chunks[:SUMMARY_MAX_CHUNKS]
+            words = max(60, int(max_tokens / len(chunks) * 0.6))
+            plans.append((len(prompts), chunks))
+            prompts.extend(self._map_prompt(chunk, focus, words) for chunk in chunks)
+
+        results = self.ai_handler.generate_many(
+            prompts, max_concurrency=self.max_concurrency, cache_ttl=CACHE_TTL_WEEK, task="extract"
+        ) if prompts else []
+
+        condensed = []
+        for text, plan in zip(texts, plans):
+            if plan is None:
+                condensed.append(text or "")
+                continue
+            start, chunks = plan
+            notes = []
+            for chunk, result in zip(chunks, results[start:start + len(chunks)]):
+                try:
+                    note = result.text.strip() if result.ok else ""
+                except ValueError:
+                    # Blocked/empty response - reading .text raises
+                    note = ""
+                # Failed map call - keep the chunk's opening instead of losing it
+                notes.append(note or self._trim(chunk, max_tokens // len(chunks)))
+            condensed.append(self._reduce("\n\n".join(notes), focus, max_tokens))
+        return condensed
+
+    def _reduce(self, notes, focus, max_tokens):
+        if self.count(notes) <= max_tokens:
+            return notes
+        try:
+            response = self.ai_handler.generate_content(
+                f"""Combine these notes (from consecutive parts of one document) into a single summary.
+Keep what matters for: {focus}. Keep concrete facts, names, numbers and characteristic phrases verbatim.
+Write in the language of the notes. At most {int(max_tokens * 0.6)} words. No preamble.
+
+NOTES:
+{notes}""",
+                cache_ttl=CACHE_TTL_WEEK,
+                task="extract"
+            )
+            return response.text.strip()
+        except Exception:
+            return self._trim(notes, max_tokens)
+
+    def _map_prompt(self, chunk, focus, words):
+        return f"""Summarize this part of a longer document. Keep what matters for: {focus}.
+Keep concrete facts, names, numbers and characteristic phrases verbatim.
+Write in the language of the text. At most {words} words. No preamble.
+
+TEXT:
+{chunk}"""
+
+    def _trim(self, text, max_tokens):
+        builder = PromptBuilder(max_tokens, count=self.count)
+        builder.add("text", text)
+        return builder.fit()["text"]
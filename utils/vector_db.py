@@ -85,6 +85,14 @@ class VectorDB:
                 ids=ids
             )
 
+    def delete_pages(self, brand_name, urls):
+        """
+        Removes pages (by URL) from the brand's collection, e.g. ones dropped from the sitemap.
+        """
+        urls = [str(url) for url in urls]
+        if urls:
+            self.get_collection(brand_name).delete(ids=urls)
+
     def query_similar(self, brand_name, query_text, n_results=5):
         """Finds semantically similar pages for internal linking."""
         collection = self.get_collection(brand_name)